@@ -29,6 +29,11 @@ if not DATABASE_URL:
 # Engine dùng chung
 engine = create_engine(DATABASE_URL, pool_pre_ping=True)
 
+# Adapter pgvector: bind embedding làm tham số thay vì format literal
+from app.core.vector_codec import register_pgvector
+
+register_pgvector(engine)
+
 # Base dùng chung cho tất cả models (cái bạn đang thiếu)
 Base = declarative_base()
 
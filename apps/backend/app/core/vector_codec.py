@@ -0,0 +1,62 @@
+# apps/backend/app/core/vector_codec.py
+"""
+Codec cho cột pgvector / real[] khi ghi từ backend (ai.user_embeddings, ai.user_trait_*).
+
+- Đăng ký adapter pgvector cho mọi connection của engine → embedding được
+  bind làm tham số (pgvector.Vector, float32) thay vì tự format f-string.
+- psycopg2 chỉ có text protocol nên đây là đường ngắn nhất với driver hiện tại;
+  nếu thiếu package pgvector thì fallback về literal "[...]" như trước.
+"""
+
+from typing import Any, Optional
+
+try:
+    from pgvector import Vector
+    from pgvector.psycopg2 import register_vector
+except ImportError:
+    Vector = None
+    register_vector = None
+
+# True khi adapter đã đăng ký thành công (register_adapter của psycopg2 là global)
+_registered = False
+
+
+def register_pgvector(engine) -> None:
+    """
+    Gắn listener "connect" để đăng ký kiểu vector cho từng DBAPI connection.
+    """
+    if register_vector is None:
+        return
+
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _register_vector(dbapi_connection, connection_record):
+        global _registered
+        try:
+            register_vector(dbapi_connection)
+            dbapi_connection.commit()
+            _registered = True
+        except Exception as e:
+            # DB chưa có extension vector → vẫn chạy được với fallback literal
+            print("[vector_codec] register_vector skipped:", repr(e))
+
+
+def vector_param(values: Optional[list[float]]) -> Any:
+    """
+    list[float] -> tham số bind cho `CAST(:emb AS vector)`.
+    """
+    if not values:
+        return None
+    if _registered:
+        return Vector([float(x) for x in values])
+    return "[" + ",".join(f"{float(x):.8f}" for x in values) + "]"
+
+
+def real_array_param(values: Optional[list[float]]) -> Optional[list[float]]:
+    """
+    list[float] -> tham số bind cho `CAST(:arr AS real[])` (psycopg2 adapt list → ARRAY).
+    """
+    if not values:
+        return None
+    return [float(x) for x in values]
@@ -72,8 +72,54 @@ async def lifespan(_: FastAPI):
     except Exception as e:
         print("Skip email verification auto-migration:", repr(e))
 
+    # Index chat_messages / chat_sessions (CREATE INDEX CONCURRENTLY, autocommit)
+    try:
+        from app.modules.chatbot.chat_service import ensure_chat_indexes
+
+        ensure_chat_indexes(engine)
+    except Exception as e:
+        print("Skip chat index migration:", repr(e))
+
+    # Bảng hàng đợi chấm essay: tạo lúc boot → poll /essay/{id}/status chỉ đọc, không chạy DDL
+    try:
+        from app.modules.assessments.essay_jobs import ensure_jobs_table
+
+        with SessionLocal() as session:
+            ensure_jobs_table(session)
+    except Exception as e:
+        print("Skip essay jobs table migration:", repr(e))
+
+    # Worker chấm essay trong process (tắt khi chạy `python -m app.tasks.essay_worker` riêng)
+    essay_worker_stop = None
+    if _bool_env("ESSAY_WORKER_INPROCESS", True):
+        try:
+            import asyncio
+
+            from app.tasks.essay_worker import start_background_worker
+
+            _, essay_worker_stop = start_background_worker(asyncio.get_running_loop())
+        except Exception as e:
+            print("Skip in-process essay worker:", repr(e))
+
     yield
 
+    if essay_worker_stop is not None:
+        essay_worker_stop.set()
+
+    try:
+        from app.modules.analytics.event_buffer import career_event_buffer
+
+        career_event_buffer.stop()
+    except Exception as e:
+        print("Career event buffer flush error:", repr(e))
+
+    try:
+        from app.services.ai_core_client import ai_core
+
+        await ai_core.aclose()
+    except Exception as e:
+        print("AI-core client close error:", repr(e))
+
 
 def create_app() -> FastAPI:
     app = FastAPI(
@@ -1,3 +1,4 @@
+import asyncio
 import csv
 import importlib.util as _importlib_util
 import json
@@ -29,6 +30,11 @@ from sqlalchemy.orm import Session, registry
 from ...core.jwt import require_admin
 from ..assessments.models import Assessment, AssessmentForm, AssessmentQuestion
 from ..content.models import BlogPost, Career, CareerKSA, CareerInterest, CareerOverview, Comment
+from ..notifications.broadcast import get_job as get_broadcast_fanout
+from ..notifications.broadcast import insert_broadcast, start_fanout
+from ..notifications.broadcast import list_jobs as list_broadcast_fanouts
+from ..realtime.ws_notifications import manager as ws_manager
+from ..recommendation.career_meta_cache import invalidate_career_meta
 from ..system.models import AppSettings
 from ..users.models import User
 
@@ -928,6 +934,7 @@ def update_career(request: Request, career_id: int, payload: dict):
         c.short_desc_en = desc
     session.commit()
     session.refresh(c)
+    invalidate_career_meta([c.onet_code] if c.onet_code else None)
     return {"career": _career_to_client(c, session)}
 
 
@@ -938,8 +945,18 @@ def delete_career(request: Request, career_id: int):
     c = session.get(Career, career_id)
     if not c:
         raise HTTPException(status_code=404, detail="Career not found")
+    onet_code = c.onet_code
     session.delete(c)
     session.commit()
+    invalidate_career_meta([onet_code] if onet_code else None)
+    return {"status": "ok"}
+
+
+@router.post("/recommendations/cache/invalidate")
+def invalidate_recommendation_cache(request: Request):
+    """Xoá cache recommendation + meta nghề (vd. sau khi deploy model / sync O*NET)."""
+    _ = require_admin(request)
+    invalidate_career_meta()
     return {"status": "ok"}
 
 
@@ -2231,40 +2248,64 @@ def broadcast_notification(request: Request, payload: dict):
         raise HTTPException(status_code=400, detail="Title is required")
     
     try:
-        # Get all user IDs
-        users_result = session.execute(text("SELECT id FROM core.users")).fetchall()
-        user_ids = [row[0] for row in users_result]
+        # 1 câu INSERT ... SELECT cho mọi user (set-based)
+        inserted = insert_broadcast(
+            session,
+            notification_type=notification_type,
+            title=title,
+            message=message,
+            link=link or None,
+            online_user_ids=ws_manager.online_user_ids(),
+        )
+        session.commit()
+        inserted_count = inserted["total"]
         
-        if not user_ids:
+        if not inserted_count:
             return {"status": "success", "message": "No users found", "count": 0}
         
-        # Insert notification for each user
-        inserted_count = 0
-        for user_id in user_ids:
-            try:
-                session.execute(text("""
-                    INSERT INTO core.notifications (user_id, type, title, message, link, is_read)
-                    VALUES (:user_id, :type, :title, :message, :link, FALSE)
-                """), {
-                    "user_id": user_id,
-                    "type": notification_type,
-                    "title": title,
-                    "message": message,
-                    "link": link or None,
-                })
-                inserted_count += 1
-            except Exception as e:
-                logger.warning(f"Failed to insert notification for user {user_id}: {e}")
-        
-        session.commit()
+        # Push ws cho user đang online: job chạy nền trên event loop, admin theo dõi tiến độ
+        job = None
+        try:
+            import anyio
+
+            loop = anyio.from_thread.run_sync(asyncio.get_running_loop)
+            job = start_fanout(
+                loop,
+                total_recipients=inserted_count,
+                online=inserted["online"],
+                notification_type=notification_type,
+                title=title,
+                message=message,
+                link=link or None,
+            )
+        except Exception as e:
+            logger.warning(f"Broadcast fan-out not started: {e}")
         
         return {
             "status": "success",
             "message": f"Notification sent to {inserted_count} users",
-            "count": inserted_count
+            "count": inserted_count,
+            "job": job.to_dict() if job else None,
         }
         
     except Exception as e:
         logger.error(f"Error broadcasting notification: {e}")
         raise HTTPException(status_code=500, detail="Failed to broadcast notification")
         raise HTTPException(status_code=500, detail="Failed to create notification")
+
+
+@router.get("/notifications/broadcast/jobs")
+def list_broadcast_jobs(request: Request):
+    """Các broadcast fan-out gần đây (trên process này) và tiến độ"""
+    _ = require_admin(request)
+    return {"items": [job.to_dict() for job in list_broadcast_fanouts()]}
+
+
+@router.get("/notifications/broadcast/{job_id}")
+def get_broadcast_job(request: Request, job_id: str):
+    """Tiến độ fan-out websocket của 1 broadcast"""
+    _ = require_admin(request)
+    job = get_broadcast_fanout(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Broadcast job not found")
+    return job.to_dict()
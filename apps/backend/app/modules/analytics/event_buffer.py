@@ -0,0 +1,222 @@
+# app/modules/analytics/event_buffer.py
+"""
+Buffer ghi analytics.career_events ngoài transaction của request.
+
+- add() / add_many() chỉ append vào deque (O(1), không đụng DB).
+- Thread nền flush mỗi CAREER_EVENT_FLUSH_SEC giây hoặc khi đủ CAREER_EVENT_BATCH event,
+  mỗi batch = 1 lệnh COPY ... FROM STDIN (psycopg2); driver không có COPY
+  hoặc CAREER_EVENT_USE_COPY=0 → 1 câu INSERT ... SELECT FROM unnest(...).
+- Buffer bị chặn trên CAREER_EVENT_BUFFER_MAX: DB chậm / chết thì bỏ event cũ nhất
+  (analytics chấp nhận mất mát, không được làm nghẽn request).
+- Batch lỗi vì dữ liệu (SQLSTATE 22xxx / 23xxx, hoặc lỗi dựng batch phía Python) được
+  chia đôi và ghi lại tới khi cô lập được event hỏng → bỏ event đó + log, phần còn lại
+  vẫn được ghi. Lỗi khác (mất kết nối, DB down) → trả batch về đầu hàng đợi, thử lại sau.
+- Lifespan gọi stop() để flush phần còn lại khi tắt app.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional
+
+from sqlalchemy import text
+
+from app.core.db import SessionLocal
+
+CAREER_EVENT_FLUSH_SEC = float(os.getenv("CAREER_EVENT_FLUSH_SEC", "2.0"))
+CAREER_EVENT_BATCH = int(os.getenv("CAREER_EVENT_BATCH", "500"))
+CAREER_EVENT_BUFFER_MAX = int(os.getenv("CAREER_EVENT_BUFFER_MAX", "50000"))
+CAREER_EVENT_USE_COPY = os.getenv("CAREER_EVENT_USE_COPY", "1") != "0"
+
+EVENT_COLUMNS = (
+    "user_id",
+    "session_id",
+    "job_id",
+    "event_type",
+    "rank_pos",
+    "score_shown",
+    "source",
+    "ref",
+    "dwell_ms",
+)
+
+_INSERT_SQL = text(
+    """
+    INSERT INTO analytics.career_events
+        (user_id, session_id, job_id, event_type,
+         rank_pos, score_shown, source, ref, dwell_ms)
+    SELECT * FROM unnest(
+        CAST(:user_id     AS bigint[]),
+        CAST(:session_id  AS text[]),
+        CAST(:job_id      AS text[]),
+        CAST(:event_type  AS text[]),
+        CAST(:rank_pos    AS int[]),
+        CAST(:score_shown AS float8[]),
+        CAST(:source      AS text[]),
+        CAST(:ref         AS text[]),
+        CAST(:dwell_ms    AS int[])
+    )
+    """
+)
+
+
+def insert_events(session, events: List[Dict[str, Any]]) -> None:
+    """Ghi 1 batch event bằng 1 câu lệnh (không commit)."""
+    if not events:
+        return
+    params = {col: [ev.get(col) for ev in events] for col in EVENT_COLUMNS}
+    params["source"] = [s or "neumf" for s in params["source"]]
+    session.execute(_INSERT_SQL, params)
+
+
+def _is_rejected_batch(e: Exception) -> bool:
+    """True nếu lỗi do nội dung batch (retry nguyên batch sẽ lỗi mãi), False nếu lỗi tạm thời."""
+    orig = getattr(e, "orig", None) or e
+    code = getattr(orig, "pgcode", None) or getattr(orig, "sqlstate", None)
+    if code:
+        # 22 = data exception, 23 = integrity constraint violation
+        return code[:2] in ("22", "23")
+    return isinstance(e, (TypeError, ValueError))
+
+
+_COPY_SQL = f"COPY analytics.career_events ({', '.join(EVENT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+
+
+def copy_events(session, events: List[Dict[str, Any]]) -> None:
+    """
+    Ghi 1 batch bằng COPY (CSV, ô trống = NULL) trên connection của session (không commit).
+    """
+    if not events:
+        return
+    dbapi_conn = session.connection().connection.dbapi_connection
+    cur = dbapi_conn.cursor()
+    if not CAREER_EVENT_USE_COPY or not hasattr(cur, "copy_expert"):
+        cur.close()
+        insert_events(session, events)
+        return
+
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for ev in events:
+        row = [ev.get(col) for col in EVENT_COLUMNS]
+        row[EVENT_COLUMNS.index("source")] = ev.get("source") or "neumf"
+        writer.writerow(["" if v is None else v for v in row])
+    buf.seek(0)
+    try:
+        cur.copy_expert(_COPY_SQL, buf)
+    finally:
+        cur.close()
+
+
+class CareerEventBuffer:
+    def __init__(
+        self,
+        flush_sec: float = CAREER_EVENT_FLUSH_SEC,
+        batch_size: int = CAREER_EVENT_BATCH,
+        max_size: int = CAREER_EVENT_BUFFER_MAX,
+        session_factory=SessionLocal,
+        writer: Callable[[Any, List[Dict[str, Any]]], None] = copy_events,
+    ) -> None:
+        self.flush_sec = flush_sec
+        self.batch_size = max(1, batch_size)
+        self.session_factory = session_factory
+        self.writer = writer
+        self._queue: Deque[Dict[str, Any]] = deque(maxlen=max_size)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.dropped = 0
+        self.rejected = 0
+
+    def add(self, event: Dict[str, Any]) -> None:
+        self.add_many([event])
+
+    def add_many(self, events: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            for ev in events:
+                if len(self._queue) == self._queue.maxlen:
+                    self.dropped += 1
+                self._queue.append(ev)
+            pending = len(self._queue)
+        self._ensure_started()
+        if pending >= self.batch_size:
+            self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        session = self.session_factory()
+        try:
+            self.writer(session, batch)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def flush(self) -> int:
+        """Ghi hết event đang chờ (theo batch). Trả về số event đã ghi."""
+        written = 0
+        while True:
+            with self._lock:
+                n = min(self.batch_size, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(n)]
+            if not batch:
+                return written
+            # stack các phần của batch; phần lỗi dữ liệu được chia đôi tới khi còn 1 event
+            chunks = [batch]
+            while chunks:
+                chunk = chunks.pop()
+                try:
+                    self._write(chunk)
+                    written += len(chunk)
+                except Exception as e:
+                    if not _is_rejected_batch(e):
+                        # lỗi tạm thời: trả phần chưa ghi về đầu hàng đợi, thử lại ở lần flush sau
+                        rest = chunk + [ev for c in reversed(chunks) for ev in c]
+                        with self._lock:
+                            self._queue.extendleft(reversed(rest))
+                        print(f"[career_events] flush failed ({len(rest)} events pending): {repr(e)}")
+                        return written
+                    if len(chunk) == 1:
+                        self.rejected += 1
+                        print(f"[career_events] drop rejected event {chunk[0]!r}: {repr(e)}")
+                        continue
+                    mid = len(chunk) // 2
+                    chunks.append(chunk[mid:])
+                    chunks.append(chunk[:mid])
+
+    # ---- background thread ----
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None or self._stop.is_set():
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="career-event-writer", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_sec)
+            self._wake.clear()
+            self.flush()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+
+career_event_buffer = CareerEventBuffer()
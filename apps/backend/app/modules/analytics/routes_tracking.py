@@ -2,22 +2,21 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, Request, status
-from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from pydantic import BaseModel, Field, field_validator
 
-from app.core.db import get_db
 from app.modules.auth.deps import get_current_user_optional
 from app.modules.users.models import User
-from .service_career_events import CareerEventsService
+from .event_buffer import career_event_buffer
 
 router = APIRouter(prefix="", tags=["tracking"])
 logger = logging.getLogger(__name__)
 
 # Event types that require dwell_ms
 DWELL_REQUIRED_EVENTS = {"click", "save", "apply"}
+CAREER_EVENT_TYPES = {"impression"} | DWELL_REQUIRED_EVENTS
 
 
 class CareerEventIn(BaseModel):
@@ -28,17 +27,25 @@ class CareerEventIn(BaseModel):
     ref: Optional[str] = None
     dwell_ms: Optional[int] = None
 
+    @field_validator("event_type")
+    @classmethod
+    def _check_event_type(cls, v: str) -> str:
+        # chặn ngay ở request: event lạ không được vào buffer ghi DB
+        v = v.strip().lower()
+        if v not in CAREER_EVENT_TYPES:
+            raise ValueError(f"event_type must be one of {sorted(CAREER_EVENT_TYPES)}")
+        return v
 
-@router.post("/career-event", status_code=status.HTTP_204_NO_CONTENT)
-def track_career_event(
-    payload: CareerEventIn,
-    request: Request,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user_optional),
-):
-    svc = CareerEventsService(db)
 
-    session_id = request.headers.get("X-Session-Id")
+# Giới hạn số event / request batch
+MAX_BATCH_EVENTS = 500
+
+
+class CareerEventBatchIn(BaseModel):
+    events: List[CareerEventIn] = Field(default_factory=list, max_length=MAX_BATCH_EVENTS)
+
+
+def _resolve_user_id(request: Request, current_user: Optional[User]) -> Optional[int]:
     # ưu tiên user đang login, fallback X-User-Id nếu có
     user_id: Optional[int] = current_user.id if current_user else None
     if not user_id:
@@ -48,38 +55,77 @@ def track_career_event(
                 user_id = int(raw_uid)
             except ValueError:
                 user_id = None
+    return user_id
 
-    # Validate and normalize dwell_ms based on event_type
-    dwell_ms: Optional[int] = payload.dwell_ms
-    event_type = payload.event_type.lower()
 
+def _normalize_dwell_ms(
+    event_type: str,
+    dwell_ms: Optional[int],
+    job_id: str,
+    user_id: Optional[int],
+) -> Optional[int]:
     if event_type == "impression":
         # Impression: dwell_ms should be NULL
-        dwell_ms = None
-    elif event_type in DWELL_REQUIRED_EVENTS:
+        return None
+    if event_type in DWELL_REQUIRED_EVENTS:
         # Click/save/apply: dwell_ms is required
         if dwell_ms is None:
             # Auto-fix: set to 0 with warning log
             logger.warning(
                 f"[TRACKING] {event_type} event missing dwell_ms, "
-                f"auto-fixing to 0. job_id={payload.job_id}, user_id={user_id}"
+                f"auto-fixing to 0. job_id={job_id}, user_id={user_id}"
             )
-            dwell_ms = 0
-        elif dwell_ms < 0:
+            return 0
+        if dwell_ms < 0:
             # Invalid negative value, fix to 0
             logger.warning(
                 f"[TRACKING] {event_type} event has negative dwell_ms={dwell_ms}, "
-                f"auto-fixing to 0. job_id={payload.job_id}, user_id={user_id}"
+                f"auto-fixing to 0. job_id={job_id}, user_id={user_id}"
             )
-            dwell_ms = 0
-
-    svc.log_event(
-        user_id=user_id,
-        session_id=session_id,
-        job_id=payload.job_id,
-        event_type=event_type,
-        rank_pos=payload.rank_pos,
-        score_shown=payload.score_shown,
-        ref=payload.ref,
-        dwell_ms=dwell_ms,
-    )
+            return 0
+    return dwell_ms
+
+
+def _to_event(
+    payload: CareerEventIn,
+    user_id: Optional[int],
+    session_id: Optional[str],
+) -> Dict[str, Any]:
+    event_type = payload.event_type.lower()
+    return {
+        "user_id": user_id,
+        "session_id": session_id,
+        "job_id": payload.job_id,
+        "event_type": event_type,
+        "rank_pos": payload.rank_pos,
+        "score_shown": payload.score_shown,
+        "source": "neumf",
+        "ref": payload.ref,
+        "dwell_ms": _normalize_dwell_ms(event_type, payload.dwell_ms, payload.job_id, user_id),
+    }
+
+
+@router.post("/career-event", status_code=status.HTTP_204_NO_CONTENT)
+def track_career_event(
+    payload: CareerEventIn,
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+):
+    user_id = _resolve_user_id(request, current_user)
+    session_id = request.headers.get("X-Session-Id")
+    career_event_buffer.add(_to_event(payload, user_id, session_id))
+
+
+@router.post("/career-events", status_code=status.HTTP_204_NO_CONTENT)
+def track_career_events(
+    payload: CareerEventBatchIn,
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user_optional),
+):
+    """
+    Nhận nhiều event trong 1 request (FE gom impression / click theo lô).
+    Ghi qua write-behind buffer như /career-event.
+    """
+    user_id = _resolve_user_id(request, current_user)
+    session_id = request.headers.get("X-Session-Id")
+    career_event_buffer.add_many(_to_event(ev, user_id, session_id) for ev in payload.events)
@@ -1,8 +1,10 @@
 # app/modules/analytics/service_career_events.py
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 
+from .event_buffer import career_event_buffer
+
 
 class CareerEventsService:
     def __init__(self, db: Session) -> None:
@@ -59,17 +61,27 @@ class CareerEventsService:
         ref: Optional[str] = None,
         dwell_ms: Optional[int] = None,
     ) -> None:
-        self._insert_event(
-            user_id=user_id,
-            session_id=session_id,
-            job_id=job_id,
-            event_type=event_type,
-            rank_pos=rank_pos,
-            score_shown=score_shown,
-            ref=ref,
-            dwell_ms=dwell_ms,
+        # write-behind: không mở transaction trong request, buffer flush bằng COPY
+        self.log_events(
+            [
+                {
+                    "user_id": user_id,
+                    "session_id": session_id,
+                    "job_id": job_id,
+                    "event_type": event_type,
+                    "rank_pos": rank_pos,
+                    "score_shown": score_shown,
+                    "source": "neumf",
+                    "ref": ref,
+                    "dwell_ms": dwell_ms,
+                }
+            ]
         )
 
+    def log_events(self, events: List[Dict[str, Any]]) -> None:
+        """Đẩy nhiều event (đã chuẩn hoá) vào buffer ghi nền."""
+        career_event_buffer.add_many(events)
+
     def log_impression(
         self,
         *,
@@ -80,14 +92,18 @@ class CareerEventsService:
         score_shown: Optional[float],
         ref: Optional[str] = None,
     ) -> None:
-        self._insert_event(
-            user_id=user_id,
-            session_id=session_id,
-            job_id=job_id,
-            event_type="impression",
-            rank_pos=rank_pos,
-            score_shown=score_shown,
-            ref=ref,
+        # impression nhiều + không cần đọc lại ngay → ghi qua buffer, không chặn request
+        career_event_buffer.add(
+            {
+                "user_id": user_id,
+                "session_id": session_id,
+                "job_id": job_id,
+                "event_type": "impression",
+                "rank_pos": rank_pos,
+                "score_shown": score_shown,
+                "source": "neumf",
+                "ref": ref,
+            }
         )
 
     def log_click(
@@ -0,0 +1,276 @@
+# apps/backend/app/modules/assessments/essay_jobs.py
+"""
+Hàng đợi chấm essay bất đồng bộ (Postgres-backed).
+
+- save_essay() chỉ INSERT essay + 1 job vào ai.essay_scoring_jobs (cùng 1 transaction) rồi trả về ngay,
+  không giữ request / DB session trong lúc AI-core chạy model.
+- Worker (app/tasks/essay_worker.py, hoặc thread trong process API khi
+  ESSAY_WORKER_INPROCESS=1) claim job bằng FOR UPDATE SKIP LOCKED → chạy nhiều
+  worker song song an toàn, job đang chạy mà worker chết sẽ được claim lại sau
+  ESSAY_JOB_STALE_SEC (hết ESSAY_JOB_MAX_ATTEMPTS lượt → failed).
+- Trạng thái: pending → running → done | failed (retry với backoff tới ESSAY_JOB_MAX_ATTEMPTS).
+  FE poll GET /api/assessments/essay/{essay_id}/status hoặc nhận push qua /ws/notifications.
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.modules.recommendation.rec_cache import rec_cache
+
+ESSAY_JOB_MAX_ATTEMPTS = int(os.getenv("ESSAY_JOB_MAX_ATTEMPTS", "3"))
+ESSAY_JOB_RETRY_SEC = int(os.getenv("ESSAY_JOB_RETRY_SEC", "30"))
+ESSAY_JOB_STALE_SEC = int(os.getenv("ESSAY_JOB_STALE_SEC", "300"))
+
+_table_ready = False
+
+
+@dataclass
+class EssayJob:
+    id: int
+    user_id: int
+    essay_id: int
+    attempts: int
+
+
+def ensure_jobs_table(session: Session) -> None:
+    """
+    Best-effort migration (giống core.sync_jobs): tạo bảng job nếu chưa có, 1 lần / process.
+    Gọi lúc boot (app/main.py) và trước các đường ghi (save_essay, claim_next_job).
+    """
+    global _table_ready
+    if _table_ready:
+        return
+    session.execute(text("""
+        CREATE TABLE IF NOT EXISTS ai.essay_scoring_jobs (
+            id            BIGSERIAL PRIMARY KEY,
+            essay_id      BIGINT NOT NULL UNIQUE,
+            user_id       BIGINT NOT NULL,
+            status        VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts      INT NOT NULL DEFAULT 0,
+            last_error    TEXT,
+            available_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            started_at    TIMESTAMPTZ,
+            finished_at   TIMESTAMPTZ,
+            created_at    TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            updated_at    TIMESTAMPTZ NOT NULL DEFAULT NOW()
+        )
+    """))
+    session.execute(text("""
+        CREATE INDEX IF NOT EXISTS ix_essay_scoring_jobs_queue
+            ON ai.essay_scoring_jobs (status, available_at)
+    """))
+    session.commit()
+    _table_ready = True
+
+
+def enqueue_essay_job(session: Session, user_id: int, essay_id: int) -> int:
+    """
+    Tạo (hoặc reset) job chấm cho essay. Caller gọi ensure_jobs_table() trước
+    (hàm đó tự commit) và tự commit sau → job nằm chung transaction với essay.
+    """
+    row = session.execute(
+        text("""
+            INSERT INTO ai.essay_scoring_jobs (essay_id, user_id)
+            VALUES (:eid, :uid)
+            ON CONFLICT (essay_id) DO UPDATE
+              SET status       = 'pending',
+                  attempts     = 0,
+                  last_error   = NULL,
+                  available_at = NOW(),
+                  updated_at   = NOW()
+            RETURNING id
+        """),
+        {"eid": int(essay_id), "uid": int(user_id)},
+    ).first()
+    return int(row[0])
+
+
+def _fail_exhausted_stale_jobs(session: Session) -> None:
+    """
+    Job running treo quá ESSAY_JOB_STALE_SEC mà đã hết lượt (worker chết / OOM mỗi lần chạy)
+    → failed, không claim lại mãi.
+    """
+    session.execute(
+        text("""
+            UPDATE ai.essay_scoring_jobs
+               SET status      = 'failed',
+                   last_error  = COALESCE(last_error, 'worker died or timed out (stale running job)'),
+                   finished_at = NOW(),
+                   updated_at  = NOW()
+             WHERE status = 'running'
+               AND started_at < NOW() - make_interval(secs => :stale)
+               AND attempts >= :max_attempts
+        """),
+        {"stale": ESSAY_JOB_STALE_SEC, "max_attempts": ESSAY_JOB_MAX_ATTEMPTS},
+    )
+
+
+def claim_next_job(session: Session) -> Optional[EssayJob]:
+    """
+    Lấy 1 job sẵn sàng (pending tới hạn, hoặc running bị treo quá ESSAY_JOB_STALE_SEC
+    mà còn lượt) và đánh dấu running trong cùng 1 câu lệnh.
+    """
+    ensure_jobs_table(session)
+    _fail_exhausted_stale_jobs(session)
+    row = session.execute(
+        text("""
+            UPDATE ai.essay_scoring_jobs j
+               SET status     = 'running',
+                   attempts   = j.attempts + 1,
+                   started_at = NOW(),
+                   updated_at = NOW()
+             WHERE j.id = (
+                   SELECT id
+                     FROM ai.essay_scoring_jobs
+                    WHERE (status = 'pending' AND available_at <= NOW())
+                       OR (status = 'running'
+                           AND started_at < NOW() - make_interval(secs => :stale)
+                           AND attempts < :max_attempts)
+                    ORDER BY available_at
+                    FOR UPDATE SKIP LOCKED
+                    LIMIT 1
+             )
+         RETURNING j.id, j.user_id, j.essay_id, j.attempts
+        """),
+        {"stale": ESSAY_JOB_STALE_SEC, "max_attempts": ESSAY_JOB_MAX_ATTEMPTS},
+    ).mappings().first()
+    session.commit()
+    if not row:
+        return None
+    return EssayJob(
+        id=int(row["id"]),
+        user_id=int(row["user_id"]),
+        essay_id=int(row["essay_id"]),
+        attempts=int(row["attempts"]),
+    )
+
+
+def _mark_done(session: Session, job_id: int) -> None:
+    session.execute(
+        text("""
+            UPDATE ai.essay_scoring_jobs
+               SET status = 'done', last_error = NULL, finished_at = NOW(), updated_at = NOW()
+             WHERE id = :id
+        """),
+        {"id": job_id},
+    )
+
+
+def _mark_failed(session: Session, job: EssayJob, error: str) -> str:
+    """
+    Còn lượt → quay lại pending sau backoff tuyến tính; hết lượt → failed.
+    Trả về status mới.
+    """
+    status = "pending" if job.attempts < ESSAY_JOB_MAX_ATTEMPTS else "failed"
+    session.execute(
+        text("""
+            UPDATE ai.essay_scoring_jobs
+               SET status       = :status,
+                   last_error   = :err,
+                   available_at = NOW() + make_interval(secs => :delay),
+                   finished_at  = CASE WHEN :status = 'failed' THEN NOW() ELSE NULL END,
+                   updated_at   = NOW()
+             WHERE id = :id
+        """),
+        {
+            "id": job.id,
+            "status": status,
+            "err": error[:2000],
+            "delay": ESSAY_JOB_RETRY_SEC * job.attempts,
+        },
+    )
+    return status
+
+
+def run_essay_job(session: Session, job: EssayJob) -> str:
+    """
+    Chấm 1 essay: đọc core.essays → AI-core → ai.user_embeddings / ai.user_trait_preds
+    → fuse lại ai.user_trait_fused / core.users.
+    Job đã được claim + commit (claim_next_job). Lúc gọi AI-core không giữ transaction /
+    connection nào; traits + fused + trạng thái job ghi trong 1 transaction ngắn sau đó.
+    Trả về status cuối của job.
+    """
+    # import muộn: service.py import module này
+    from .service import fuse_user_traits, request_essay_traits, save_essay_traits
+
+    try:
+        content = session.execute(
+            text("SELECT content FROM core.essays WHERE id = :eid"),
+            {"eid": job.essay_id},
+        ).scalar()
+        # trả connection về pool trước khi chờ AI-core
+        session.commit()
+        if not (content or "").strip():
+            raise ValueError(f"essay {job.essay_id} not found or empty")
+
+        data = request_essay_traits(content)
+        save_essay_traits(
+            session,
+            user_id=job.user_id,
+            essay_id=job.essay_id,
+            embedding=data.get("embedding") or [],
+            riasec=data.get("riasec"),
+            big5=data.get("big5"),
+            model="phobert+vi-sbert",
+        )
+        fuse_user_traits(session, user_id=job.user_id, commit=False)
+        _mark_done(session, job.id)
+        session.commit()
+        rec_cache.invalidate_user(job.user_id)
+        return "done"
+    except Exception as e:
+        session.rollback()
+        print(f"[essay_jobs] job={job.id} essay_id={job.essay_id} attempt={job.attempts} error: {repr(e)}")
+        status = _mark_failed(session, job, repr(e))
+        session.commit()
+        return status
+
+
+def process_available_jobs(
+    session_factory: Callable[[], Session],
+    limit: int = 10,
+    on_finished: Optional[Callable[[EssayJob, str], Any]] = None,
+) -> int:
+    """
+    Chạy tối đa `limit` job đang chờ. Trả về số job đã xử lý (0 → hàng đợi trống).
+    on_finished(job, status) dùng để push thông báo (ws) khi job xong / failed hẳn.
+    """
+    done = 0
+    for _ in range(limit):
+        session = session_factory()
+        try:
+            job = claim_next_job(session)
+            if job is None:
+                break
+            status = run_essay_job(session, job)
+        finally:
+            session.close()
+        done += 1
+        if on_finished is not None and status in ("done", "failed"):
+            try:
+                on_finished(job, status)
+            except Exception as e:
+                print("[essay_jobs] on_finished error:", repr(e))
+    return done
+
+
+def get_essay_job_status(session: Session, essay_id: int, user_id: int) -> Optional[dict]:
+    """
+    Chỉ đọc (endpoint poll): bảng job được tạo lúc boot (lifespan ở app/main.py) hoặc
+    ở lần save_essay / claim_next_job đầu tiên.
+    """
+    row = session.execute(
+        text("""
+            SELECT id, status, attempts, last_error, created_at, finished_at
+              FROM ai.essay_scoring_jobs
+             WHERE essay_id = :eid AND user_id = :uid
+        """),
+        {"eid": int(essay_id), "uid": int(user_id)},
+    ).mappings().first()
+    return dict(row) if row else None
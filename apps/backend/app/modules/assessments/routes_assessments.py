@@ -22,6 +22,7 @@ from .service import (
     save_feedback,   # ✅ thêm
     fuse_user_traits,
 )
+from .essay_jobs import get_essay_job_status
 
 # KHÔNG thêm "/api" ở đây vì main.py đã prefix="/api/assessments"
 router = APIRouter(prefix="", tags=["assessments"])
@@ -303,7 +304,7 @@ def api_submit_essay(
     """
     print(f"[assessments] POST /essay called: user_id={user_id}, essayText_len={len(body.essayText or '')}, promptId={body.promptId}")
     try:
-        essay_id = save_essay(
+        essay_id, scoring_status = save_essay(
             db,
             user_id=user_id,
             content=body.essayText,
@@ -319,13 +320,24 @@ def api_submit_essay(
             if assess_obj is not None and assess_obj.session_id is not None:
                 assessment_session_id = int(assess_obj.session_id)
 
-        traits = fuse_user_traits(db, user_id=user_id) or {}
+        if scoring_status == "pending":
+            # job có thể đã được worker claim / chấm xong
+            job = get_essay_job_status(db, essay_id=essay_id, user_id=user_id)
+            if job:
+                scoring_status = job["status"]
+
+        # traits đã được fuse lúc chấm (worker / chấm sync) → ở đây chỉ đọc snapshot
+        traits: dict = {}
+        if scoring_status == "done":
+            traits = fuse_user_traits(db, user_id=user_id, persist=False) or {}
 
         has_essay_traits = bool(traits.get("has_essay_traits"))
         has_fused_traits = bool(traits.get("has_fused_traits"))
 
         return {
             "essayId": essay_id,
+            # pending/running → FE poll /essay/{essayId}/status hoặc chờ ws "essay_scoring"
+            "scoringStatus": scoring_status,
             "assessmentSessionId": assessment_session_id,
             "mainAssessmentId": main_assessment_id,
             "hasEssayTraits": has_essay_traits,
@@ -347,6 +359,36 @@ def api_submit_essay(
         )
 
 
+@router.get("/essay/{essay_id}/status")
+def api_essay_scoring_status(
+    essay_id: int,
+    db: Session = Depends(_db),
+    user_id: int = Depends(_current_user_id),
+):
+    """
+    Trạng thái chấm essay (pending | running | done | failed).
+    Khi done kèm traits đã fuse (worker fuse lúc chấm xong) để FE cập nhật mà không cần
+    gọi thêm. Endpoint poll → chỉ đọc, không ghi DB.
+    """
+    job = get_essay_job_status(db, essay_id=essay_id, user_id=user_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Essay scoring job not found")
+
+    out = {
+        "essayId": essay_id,
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "error": job["last_error"] if job["status"] == "failed" else None,
+        "finishedAt": job["finished_at"],
+    }
+    if job["status"] == "done":
+        traits = fuse_user_traits(db, user_id=user_id, persist=False) or {}
+        out["hasEssayTraits"] = bool(traits.get("has_essay_traits"))
+        out["hasFusedTraits"] = bool(traits.get("has_fused_traits"))
+        out["traits"] = traits
+    return out
+
+
 
 @router.get("/essay-prompt", response_model=EssayPromptOut)
 def api_get_essay_prompt(
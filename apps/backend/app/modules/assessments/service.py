@@ -5,7 +5,6 @@ import os
 import random
 from typing import Any, Literal, Optional
 
-import requests
 from sqlalchemy import select, text, func
 from sqlalchemy.orm import Session
 
@@ -22,13 +21,17 @@ from .models import (
     UserFeedback,
 )
 
-# URL AI-core (có thể override qua env)
-AI_CORE_URL = os.getenv("AI_CORE_URL", "http://localhost:9000")
+# Chấm essay qua hàng đợi ai.essay_scoring_jobs thay vì chặn request submit
+ESSAY_SCORING_ASYNC = os.getenv("ESSAY_SCORING_ASYNC", "1") != "0"
 
 
 
 from app.core.security import hash_password  # nếu cần; bỏ nếu không dùng
 from app.core.exceptions import NotFoundError
+from app.core.vector_codec import real_array_param, vector_param
+from app.modules.recommendation.rec_cache import rec_cache
+from app.services.ai_core_client import AICoreUnavailable, ai_core
+from .essay_jobs import enqueue_essay_job, ensure_jobs_table
 from .schemas import TraitSnapshot
 
 # ĐÃ CÓ: fuse_user_traits(session, user_id, test_riasec=None, test_big5=None)
@@ -49,15 +52,6 @@ def get_user_from_assessment(session: Session, assessment_id: int) -> Optional[i
 # 1) Lưu embedding + traits từ AI-core vào schema ai.*
 # -------------------------------------------------
 
-def _to_pg_real_array(values: Optional[list[float]]) -> Optional[str]:
-    """
-    Chuyển list[float] -> literal Postgres real[] dạng {0.12,0.34,...}
-    """
-    if not values:
-        return None
-    return "{" + ",".join(f"{float(x):.6f}" for x in values) + "}"
-
-
 def save_essay_traits(
     session: Session,
     user_id: int,
@@ -73,33 +67,33 @@ def save_essay_traits(
       - ai.user_trait_preds       (1 dòng / essay / model)
     """
     # 1) upsert ai.user_embeddings (giữ nguyên logic cũ)
-    if embedding:
-        emb_lit = "[" + ",".join(f"{float(x):.8f}" for x in embedding) + "]"
-        sql_emb = f"""
+    emb = vector_param(embedding)
+    if emb is not None:
+        sql_emb = """
             INSERT INTO ai.user_embeddings (user_id, emb, source, model_name, built_at)
-            VALUES ({int(user_id)}, '{emb_lit}'::vector, 'essay', :model, now())
+            VALUES (:uid, CAST(:emb AS vector), 'essay', :model, now())
             ON CONFLICT (user_id) DO UPDATE
               SET emb        = EXCLUDED.emb,
                   source     = EXCLUDED.source,
                   model_name = EXCLUDED.model_name,
                   built_at   = now();
         """
-        session.execute(text(sql_emb), {"model": model})
+        session.execute(text(sql_emb), {"uid": int(user_id), "emb": emb, "model": model})
 
     # 2) upsert ai.user_trait_preds nếu có trait đầy đủ
-    r_arr = _to_pg_real_array(riasec)
-    b_arr = _to_pg_real_array(big5)
+    r_arr = real_array_param(riasec)
+    b_arr = real_array_param(big5)
     if r_arr is None or b_arr is None:
         return
 
-    sql_traits = f"""
+    sql_traits = """
         INSERT INTO ai.user_trait_preds
             (user_id, essay_id, riasec_pred, big5_pred, source, model_name, built_at)
         VALUES (
-            {int(user_id)},
-            {int(essay_id)},
-            '{r_arr}'::real[],
-            '{b_arr}'::real[],
+            :uid,
+            :essay_id,
+            CAST(:riasec AS real[]),
+            CAST(:big5 AS real[]),
             :source,
             :model,
             now()
@@ -111,7 +105,25 @@ def save_essay_traits(
               model_name  = EXCLUDED.model_name,
               built_at    = now();
     """
-    session.execute(text(sql_traits), {"model": model, "source": "essay"})
+    session.execute(
+        text(sql_traits),
+        {
+            "uid": int(user_id),
+            "essay_id": int(essay_id),
+            "riasec": r_arr,
+            "big5": b_arr,
+            "model": model,
+            "source": "essay",
+        },
+    )
+
+
+def request_essay_traits(essay_text: str) -> dict:
+    """
+    POST AI-core /ai/infer_user_traits, trả về JSON (embedding, riasec, big5, ...).
+    Raise AICoreError nếu lỗi kết nối / timeout / HTTP != 2xx.
+    """
+    return ai_core.post_json("/ai/infer_user_traits", {"essay_text": essay_text, "lang": "auto"})
 
 
 def infer_user_traits_for_essay(
@@ -119,34 +131,23 @@ def infer_user_traits_for_essay(
     user_id: int,
     essay_id: int,
     essay_text: str,
-) -> None:
+) -> bool:
     """
     Gọi AI-core /ai/infer_user_traits và lưu vào:
       - ai.user_embeddings
       - ai.user_trait_preds (theo từng essay)
-    Không raise ra ngoài, chỉ log nếu lỗi.
+      - ai.user_trait_fused / core.users (fuse lại, cùng transaction)
+    Không raise ra ngoài, chỉ log nếu lỗi. Trả về True nếu traits đã được lưu.
     """
     essay_text = (essay_text or "").strip()
     if not essay_text:
         print(f"[assessments] infer_user_traits_for_essay: empty essay_text for user_id={user_id}, essay_id={essay_id}")
-        return
+        return False
 
     print(f"[assessments] infer_user_traits_for_essay: calling AI-core for user_id={user_id}, essay_id={essay_id}, text_len={len(essay_text)}")
     
     try:
-        url = f"{AI_CORE_URL}/ai/infer_user_traits"
-        print(f"[assessments] POST {url}")
-        
-        resp = requests.post(
-            url,
-            json={"essay_text": essay_text, "lang": "auto"},
-            timeout=60,
-        )
-        
-        print(f"[assessments] AI-core response status: {resp.status_code}")
-        
-        resp.raise_for_status()
-        data = resp.json()
+        data = request_essay_traits(essay_text)
 
         embedding = data.get("embedding") or []
         riasec = data.get("riasec")
@@ -163,19 +164,20 @@ def infer_user_traits_for_essay(
             big5=big5,
             model="phobert+vi-sbert",
         )
+        fuse_user_traits(session, user_id=user_id, commit=False)
         session.commit()
+        # embedding mới → recommendation cache của user hết hợp lệ
+        rec_cache.invalidate_user(user_id)
         print(f"[assessments] infer_user_traits_for_essay: saved traits for user_id={user_id}, essay_id={essay_id}")
-    except requests.exceptions.ConnectionError as e:
-        session.rollback()
-        print(f"[assessments] infer_user_traits_for_essay CONNECTION ERROR: AI-core not reachable at {AI_CORE_URL}")
-        print(f"[assessments] Error details: {repr(e)}")
-    except requests.exceptions.Timeout as e:
+        return True
+    except AICoreUnavailable as e:
         session.rollback()
-        print(f"[assessments] infer_user_traits_for_essay TIMEOUT: AI-core took too long")
+        print(f"[assessments] infer_user_traits_for_essay AI-core UNAVAILABLE at {ai_core.base_url}")
         print(f"[assessments] Error details: {repr(e)}")
     except Exception as e:
         session.rollback()
         print(f"[assessments] infer_user_traits_for_essay error: {repr(e)}")
+    return False
 
 
 
@@ -672,6 +674,8 @@ def fuse_user_traits(
     user_id: int,
     test_riasec: dict[str, float] | None = None,
     test_big5: dict[str, float] | None = None,
+    persist: bool = True,
+    commit: bool = True,
 ) -> dict[str, Any] | None:
     """
     Tạo / cập nhật bản fused trait cho user vào ai.user_trait_fused
@@ -680,6 +684,9 @@ def fuse_user_traits(
     - Nếu test_riasec / test_big5 không truyền vào:
         -> tự đọc từ core.assessments (a_type = 'RIASEC', 'BigFive')
     - Essay traits đọc từ ai.user_trait_preds (riasec_pred, big5_pred).
+    - persist=False: chỉ tính snapshot, không ghi gì (dùng cho GET).
+    - commit=False: ghi nhưng để caller commit (chung transaction với việc ghi traits);
+      lỗi được raise ra thay vì rollback + trả snapshot rỗng.
 
     Trả về snapshot cho FE dùng luôn.
     """
@@ -837,9 +844,9 @@ def fuse_user_traits(
         has_fused = riasec_fused_vec is not None and big5_fused_vec is not None
 
         # 4) Upsert vào ai.user_trait_fused + update core.users
-        if has_fused:
-            riasec_lit = _to_pg_real_array(riasec_fused_vec)
-            big5_lit = _to_pg_real_array(big5_fused_vec)
+        if has_fused and persist:
+            riasec_arr = real_array_param(riasec_fused_vec)
+            big5_arr = real_array_param(big5_fused_vec)
 
             sources: list[str] = []
             if has_test:
@@ -847,16 +854,12 @@ def fuse_user_traits(
             if has_essay:
                 sources.append("essay")
 
-            # JSON literal cho source_components
-            src_json = json.dumps(sources)
-            src_json_escaped = src_json.replace("'", "''")
-
             # 4.1) Upsert fused
-            sql_fused = f"""
+            sql_fused = """
                 INSERT INTO ai.user_trait_fused
                     (user_id, riasec_scores_fused, big5_scores_fused, source_components, model_name, built_at)
                 VALUES
-                    (:uid, '{riasec_lit}'::real[], '{big5_lit}'::real[], '{src_json_escaped}'::jsonb, :model, now())
+                    (:uid, CAST(:riasec AS real[]), CAST(:big5 AS real[]), CAST(:sources AS jsonb), :model, now())
                 ON CONFLICT (user_id) DO UPDATE
                    SET riasec_scores_fused = EXCLUDED.riasec_scores_fused,
                        big5_scores_fused   = EXCLUDED.big5_scores_fused,
@@ -869,6 +872,9 @@ def fuse_user_traits(
                 text(sql_fused),
                 {
                     "uid": int(user_id),
+                    "riasec": riasec_arr,
+                    "big5": big5_arr,
+                    "sources": json.dumps(sources),
                     "model": "fusion_v1",
                 },
             )
@@ -907,7 +913,8 @@ def fuse_user_traits(
             )
 
             # commit cả fused + users
-            session.commit()
+            if commit:
+                session.commit()
 
         return {
             "has_test_traits": has_test,
@@ -921,6 +928,8 @@ def fuse_user_traits(
             "big5_fused": big5_fused_vec,
         }
     except Exception as e:
+        if not commit:
+            raise
         session.rollback()
         print("[assessments] fuse_user_traits error:", repr(e))
         return {
@@ -965,9 +974,10 @@ def save_essay(
     content: str,
     prompt_id: Optional[int] = None,
     lang: Optional[str] = None,
-) -> int:
+) -> tuple[int, str]:
     """
-    Lưu essay vào core.essays.
+    Lưu essay vào core.essays. Trả về (essay_id, scoring_status):
+    "pending" (đã vào hàng đợi), "done" (chấm sync xong) hoặc "failed" (chấm sync lỗi).
 
     - Lang:
         + Không tin 100% tham số lang từ FE.
@@ -977,7 +987,9 @@ def save_essay(
         + Nếu FE không gửi prompt_id -> random 1 prompt theo lang
           (nếu không có prompt cùng lang -> random toàn bảng).
     Sau khi lưu:
-        - Gọi infer_user_traits_for_essay để nạp ai.user_embeddings / ai.user_trait_preds.
+        - ESSAY_SCORING_ASYNC=1 (mặc định): tạo job ai.essay_scoring_jobs, worker sẽ chấm
+          và nạp ai.user_embeddings / ai.user_trait_preds (xem essay_jobs.py).
+        - ESSAY_SCORING_ASYNC=0: gọi infer_user_traits_for_essay ngay trong request như cũ.
     """
 
     # 0) Chuẩn hoá nội dung
@@ -1037,6 +1049,16 @@ def save_essay(
         except Exception as e:
             print("[assessments] save_essay default prompt select error:", repr(e))
 
+    # DDL bảng job (1 lần / process, tự commit) chạy trước khi mở transaction ghi essay
+    queue_ready = ESSAY_SCORING_ASYNC
+    if queue_ready:
+        try:
+            ensure_jobs_table(session)
+        except Exception as e:
+            session.rollback()
+            queue_ready = False
+            print("[assessments] save_essay jobs table error, fallback to sync scoring:", repr(e))
+
     # 5) Tạo bản ghi essay
     essay = Essay(
         user_id=user_id,
@@ -1045,13 +1067,29 @@ def save_essay(
         prompt_id=resolved_prompt_id,  # có thể None nếu DB không có prompt nào
     )
     session.add(essay)
-    session.commit()
+    session.flush()
     essay_id = int(essay.id)
 
-    # 6) Gọi AI-core để suy luận trait cho essay này
+    # 6a) Đẩy vào hàng đợi chấm essay, cùng transaction với essay
+    job_id: Optional[int] = None
+    if queue_ready:
+        try:
+            # savepoint: enqueue lỗi chỉ rollback phần job, essay vẫn được lưu
+            with session.begin_nested():
+                job_id = enqueue_essay_job(session, user_id=user_id, essay_id=essay_id)
+        except Exception as e:
+            print("[assessments] save_essay enqueue error, fallback to sync scoring:", repr(e))
+
+    session.commit()
+    if job_id is not None:
+        print(f"[assessments] save_essay: queued scoring job={job_id} for essay_id={essay_id}")
+        return essay_id, "pending"
+
+    # 6b) Gọi AI-core để suy luận trait cho essay này
     print(f"[assessments] save_essay: calling infer_user_traits_for_essay for user_id={user_id}, essay_id={essay_id}")
+    saved = False
     try:
-        infer_user_traits_for_essay(
+        saved = infer_user_traits_for_essay(
             session=session,
             user_id=user_id,
             essay_id=essay_id,
@@ -1064,7 +1102,7 @@ def save_essay(
             repr(e),
         )
 
-    return essay_id
+    return essay_id, "done" if saved else "failed"
 
 
 def build_results(session: Session, assessment_id: int) -> dict:
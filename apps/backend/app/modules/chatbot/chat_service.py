@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from sqlalchemy import desc, func, text
+from sqlalchemy.engine import Engine
 from typing import List, Optional, Dict
 from datetime import datetime, timezone
 import logging
@@ -9,10 +10,41 @@ from .models import ChatSession, ChatMessage
 
 logger = logging.getLogger(__name__)
 
+_CHAT_INDEXES = (
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_messages_session_created
+        ON chatbot.chat_messages (session_id, created_at)
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_chat_sessions_user_updated
+        ON chatbot.chat_sessions (user_id, updated_at DESC)
+    """,
+)
+
+
+def ensure_chat_indexes(engine: Engine) -> None:
+    """
+    Best-effort migration lúc startup: index cho sidebar (session theo user, tin nhắn theo session).
+    CONCURRENTLY không khoá ghi bảng nhưng không chạy được trong transaction → connection autocommit.
+    """
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            for ddl in _CHAT_INDEXES:
+                conn.execute(text(ddl))
+    except Exception as e:
+        logger.warning(f"Skip chat index migration: {e!r}")
+
 class ChatHistoryService:
     def __init__(self, db: Session):
         self.db = db
-        self.gemini_service = GeminiChatbotService()
+        self._gemini_service: Optional[GeminiChatbotService] = None
+    
+    @property
+    def gemini_service(self) -> GeminiChatbotService:
+        # tạo khi thực sự cần: lưu / đọc lịch sử không phải khởi tạo model
+        if self._gemini_service is None:
+            self._gemini_service = GeminiChatbotService()
+        return self._gemini_service
     
     def get_or_create_active_session(self, user_id: int) -> Dict:
         """Lấy session active hiện tại hoặc tạo mới"""
@@ -165,35 +197,37 @@ class ChatHistoryService:
         }
     
     def get_user_sessions(self, user_id: int, limit: int = 20) -> List[Dict]:
-        """Lấy danh sách session của user"""
+        """Lấy danh sách session của user (1 query: đếm + tin nhắn cuối bằng LATERAL)"""
         sessions_result = self.db.execute(text("""
-            SELECT id, user_id, title, created_at, updated_at, is_active
-            FROM chatbot.chat_sessions 
-            WHERE user_id = :user_id
-            ORDER BY updated_at DESC 
-            LIMIT :limit
+            SELECT s.id, s.user_id, s.title, s.created_at, s.updated_at, s.is_active,
+                   cnt.message_count, last_msg.message
+            FROM (
+                SELECT id, user_id, title, created_at, updated_at, is_active
+                FROM chatbot.chat_sessions
+                WHERE user_id = :user_id
+                ORDER BY updated_at DESC
+                LIMIT :limit
+            ) s
+            LEFT JOIN LATERAL (
+                SELECT COUNT(*) AS message_count
+                FROM chatbot.chat_messages m
+                WHERE m.session_id = s.id
+            ) cnt ON TRUE
+            LEFT JOIN LATERAL (
+                -- chỉ cần 101 ký tự để biết có phải cắt "..." hay không
+                SELECT LEFT(m.message, 101) AS message
+                FROM chatbot.chat_messages m
+                WHERE m.session_id = s.id
+                ORDER BY m.created_at DESC
+                LIMIT 1
+            ) last_msg ON TRUE
+            ORDER BY s.updated_at DESC
         """), {"user_id": user_id, "limit": limit})
         
         result = []
         for session_row in sessions_result:
-            session_id = session_row[0]
-            
-            # Đếm số tin nhắn
-            count_result = self.db.execute(text("""
-                SELECT COUNT(*) FROM chatbot.chat_messages 
-                WHERE session_id = :session_id
-            """), {"session_id": session_id})
-            message_count = count_result.scalar()
-            
-            # Lấy tin nhắn cuối
-            last_msg_result = self.db.execute(text("""
-                SELECT message FROM chatbot.chat_messages 
-                WHERE session_id = :session_id
-                ORDER BY created_at DESC 
-                LIMIT 1
-            """), {"session_id": session_id})
-            last_msg_row = last_msg_result.fetchone()
-            last_message = last_msg_row[0] if last_msg_row else None
+            message_count = session_row[6]
+            last_message = session_row[7]
             
             # Xử lý null safety cho dates
             created_at = session_row[3]
@@ -1,11 +1,24 @@
 import google.generativeai as genai
-from typing import List, Dict, Optional
+from typing import Callable, Iterator, List, Dict, Optional
 import os
 from datetime import datetime
 import logging
 
+from ...services.llm_registry import get_llm_registry
+from .response_cache import get_response_cache, normalize_list, normalize_location, normalize_text
+
 logger = logging.getLogger(__name__)
 
+# Thứ tự fallback khi model chính (GEMINI_MODEL) lỗi
+FALLBACK_MODELS = [
+    "models/gemma-3-4b-it",
+    "models/gemma-3-1b-it",
+    "models/gemini-2.0-flash-lite",
+    "models/gemini-flash-lite-latest",
+    "models/gemini-2.5-flash-lite",
+    "models/gemini-flash-latest"
+]
+
 class GeminiChatbotService:
     def __init__(self):
         self.api_key = os.getenv("GEMINI_API_KEY")
@@ -16,58 +29,13 @@ class GeminiChatbotService:
         if not self.api_key:
             raise ValueError("GEMINI_API_KEY not found in environment variables")
         
-        genai.configure(api_key=self.api_key)
-        
-        # Try to initialize model with fallback
-        self.model = self._initialize_model()
+        # Registry dùng chung cả process: không gọi API lúc khởi tạo,
+        # model được chọn / failover theo lỗi của call thật
+        self.llm = get_llm_registry("chatbot", [self.model_name, *FALLBACK_MODELS])
     
-    def _initialize_model(self):
-        """Initialize model with fallback options"""
-        fallback_models = [
-            self.model_name,
-            "models/gemma-3-4b-it",
-            "models/gemma-3-1b-it",
-            "models/gemini-2.0-flash-lite",
-            "models/gemini-flash-lite-latest",
-            "models/gemini-2.5-flash-lite",
-            "models/gemini-flash-latest"
-        ]
-        
-        for model_name in fallback_models:
-            try:
-                logger.info(f"Trying to initialize model: {model_name}")
-                model = genai.GenerativeModel(model_name)
-                
-                # Test the model with a simple request
-                test_response = model.generate_content(
-                    "Test",
-                    generation_config=genai.types.GenerationConfig(
-                        max_output_tokens=10,
-                        temperature=0.1,
-                    )
-                )
-                
-                logger.info(f"Successfully initialized model: {model_name}")
-                self.model_name = model_name  # Update the working model name
-                return model
-                
-            except Exception as e:
-                logger.warning(f"Failed to initialize model {model_name}: {e}")
-                continue
-        
-        # If all models fail, raise error - API is required
-        raise ValueError("Gemini API is required but no working model found. Please check API key and model names.")
-        
-    def generate_response(self, message: str, context: Optional[str] = None) -> str:
-        """Generate response from Gemini API or fallback"""
-        
-        # API is required - no fallback allowed
-        if self.model is None:
-            raise ValueError("Gemini API model is required but not available")
-        
-        try:
-            # Create prompt with career counseling context - ALWAYS respond in English
-            system_prompt = """
+    def _build_prompt(self, message: str, context: Optional[str] = None) -> str:
+        # Create prompt with career counseling context - ALWAYS respond in English
+        system_prompt = """
             You are an intelligent career counseling chatbot for the AI-Based Career Recommendation System.
             Your responsibilities are:
             1. Provide career guidance and help users choose suitable careers
@@ -80,29 +48,34 @@ class GeminiChatbotService:
             Be friendly, professional, and helpful.
             Provide specific and practical advice.
             """
-            
-            full_prompt = f"{system_prompt}\n\nUser asks: {message}"
-            if context:
-                full_prompt += f"\n\nAdditional context: {context}"
-            
-            # Sử dụng max_tokens nếu > 0, nếu không thì không giới hạn
-            if self.max_tokens > 0:
-                response = self.model.generate_content(
-                    full_prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        max_output_tokens=self.max_tokens,
-                        temperature=self.temperature,
-                    )
-                )
-            else:
-                response = self.model.generate_content(
-                    full_prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=self.temperature,
-                    )
-                )
-            
-            return response.text
+        
+        full_prompt = f"{system_prompt}\n\nUser asks: {message}"
+        if context:
+            full_prompt += f"\n\nAdditional context: {context}"
+        return full_prompt
+    
+    def _generation_config(self):
+        # Sử dụng max_tokens nếu > 0, nếu không thì không giới hạn
+        if self.max_tokens > 0:
+            return genai.types.GenerationConfig(
+                max_output_tokens=self.max_tokens,
+                temperature=self.temperature,
+            )
+        return genai.types.GenerationConfig(
+            temperature=self.temperature,
+        )
+    
+    def _generate_text(self, message: str, context: Optional[str] = None) -> str:
+        """Gọi LLM (qua registry), raise nếu mọi model đều lỗi"""
+        return self.llm.generate_text(
+            self._build_prompt(message, context),
+            generation_config=self._generation_config(),
+        )
+    
+    def generate_response(self, message: str, context: Optional[str] = None) -> str:
+        """Generate response from Gemini API or fallback"""
+        try:
+            return self._generate_text(message, context)
             
         except Exception as e:
             error_msg = str(e)
@@ -111,14 +84,105 @@ class GeminiChatbotService:
             # Always use fallback on any error
             return self._get_fallback_response(message)
     
-    def get_career_advice(self, user_profile: Dict) -> str:
-        """Generate personalized career advice based on user profile"""
+    def stream_response(
+        self,
+        message: str,
+        context: Optional[str] = None,
+        on_complete: Optional[Callable[[str], None]] = None,
+    ) -> Iterator[str]:
+        """
+        Stream response từ Gemini: yield từng đoạn text ngay khi model trả về.
+        Lỗi trước chunk đầu tiên → yield fallback response (giống generate_response);
+        lỗi giữa chừng → raise lại để stream_sse gửi event "error" và không lưu câu trả lời
+        bị cụt.
+        on_complete(full_text) chỉ được gọi khi LLM trả lời trọn vẹn.
+        """
+        parts: List[str] = []
+        try:
+            for text in self.llm.stream_text(
+                self._build_prompt(message, context),
+                generation_config=self._generation_config(),
+            ):
+                parts.append(text)
+                yield text
+        except Exception as e:
+            logger.error(f"Error streaming Gemini response: {str(e)}")
+            if parts:
+                raise
+            yield self._get_fallback_response(message)
+            return
+        if on_complete is not None and parts:
+            on_complete("".join(parts))
+    
+    # === Prompt template có cache (response_cache) ===
+    
+    def _cached_response(self, kind: str, params: Dict, prompt: str) -> str:
+        cache = get_response_cache()
+        cached = cache.get(kind, params)
+        if cached is not None:
+            logger.info(f"Chatbot cache hit: {kind}")
+            return cached
+        try:
+            response = self._generate_text(prompt)
+        except Exception as e:
+            logger.error(f"Error generating Gemini response: {str(e)}")
+            return self._get_fallback_response(prompt)
+        cache.put(kind, params, response)
+        return response
+    
+    def _stream_cached(self, kind: str, params: Dict, prompt: str) -> Iterator[str]:
+        cache = get_response_cache()
+        cached = cache.get(kind, params)
+        if cached is not None:
+            logger.info(f"Chatbot cache hit: {kind}")
+            yield cached
+            return
+        yield from self.stream_response(
+            prompt,
+            on_complete=lambda response: cache.put(kind, params, response),
+        )
+    
+    @staticmethod
+    def _career_advice_params(user_profile: Dict) -> Dict:
+        return {
+            "skills": normalize_list(user_profile.get('skills')),
+            "interests": normalize_list(user_profile.get('interests')),
+            "experience": normalize_text(user_profile.get('experience')),
+            "education": normalize_text(user_profile.get('education')),
+        }
+    
+    @staticmethod
+    def _skill_plan_params(current_skills: List[str], target_job: str) -> Dict:
+        return {"current_skills": normalize_list(current_skills), "target_job": normalize_text(target_job)}
+    
+    @staticmethod
+    def _job_market_params(job_title: str, location: str) -> Dict:
+        return {"job_title": normalize_text(job_title), "location": normalize_location(location)}
+    
+    def stream_career_advice(self, user_profile: Dict) -> Iterator[str]:
+        return self._stream_cached(
+            "career_advice", self._career_advice_params(user_profile), self.career_advice_prompt(user_profile)
+        )
+    
+    def stream_skill_development_plan(self, current_skills: List[str], target_job: str) -> Iterator[str]:
+        return self._stream_cached(
+            "skill_plan",
+            self._skill_plan_params(current_skills, target_job),
+            self.skill_development_prompt(current_skills, target_job),
+        )
+    
+    def stream_job_market_analysis(self, job_title: str, location: str = "Vietnam") -> Iterator[str]:
+        return self._stream_cached(
+            "job_market", self._job_market_params(job_title, location), self.job_market_prompt(job_title, location)
+        )
+    
+    def career_advice_prompt(self, user_profile: Dict) -> str:
         skills = user_profile.get('skills', [])
         interests = user_profile.get('interests', [])
         experience = user_profile.get('experience', '')
         education = user_profile.get('education', '')
         
-        prompt = f"""
+        return f"""
         Based on the following user information, provide specific and detailed career advice in English:
         
         Current skills: {', '.join(skills) if skills else 'Not provided'}
@@ -135,12 +199,15 @@ class GeminiChatbotService:
         
         IMPORTANT: Respond in English only.
         """
-        
-        return self.generate_response(prompt)
     
-    def get_skill_development_plan(self, current_skills: List[str], target_job: str) -> str:
-        """Generate skill development plan for target job"""
-        prompt = f"""
+    def get_career_advice(self, user_profile: Dict) -> str:
+        """Generate personalized career advice based on user profile"""
+        return self._cached_response(
+            "career_advice", self._career_advice_params(user_profile), self.career_advice_prompt(user_profile)
+        )
+    
+    def skill_development_prompt(self, current_skills: List[str], target_job: str) -> str:
+        return f"""
         User currently has these skills: {', '.join(current_skills)}
         Career goal: {target_job}
         
@@ -154,12 +221,17 @@ class GeminiChatbotService:
         
         IMPORTANT: Respond in English only. Be specific and actionable.
         """
-        
-        return self.generate_response(prompt)
     
-    def analyze_job_market(self, job_title: str, location: str = "Vietnam") -> str:
-        """Analyze job market for specific position"""
-        prompt = f"""
+    def get_skill_development_plan(self, current_skills: List[str], target_job: str) -> str:
+        """Generate skill development plan for target job"""
+        return self._cached_response(
+            "skill_plan",
+            self._skill_plan_params(current_skills, target_job),
+            self.skill_development_prompt(current_skills, target_job),
+        )
+    
+    def job_market_prompt(self, job_title: str, location: str = "Vietnam") -> str:
+        return f"""
         Analyze the job market for position: {job_title} in {location}
         
         Please provide information about:
@@ -172,8 +244,12 @@ class GeminiChatbotService:
         
         IMPORTANT: Respond in English only. Base on 2024-2025 market data.
         """
-        
-        return self.generate_response(prompt)
+    
+    def analyze_job_market(self, job_title: str, location: str = "Vietnam") -> str:
+        """Analyze job market for specific position"""
+        return self._cached_response(
+            "job_market", self._job_market_params(job_title, location), self.job_market_prompt(job_title, location)
+        )
     
     def _get_fallback_response(self, message: str) -> str:
         """Provide comprehensive fallback responses when API is unavailable"""
@@ -414,30 +490,12 @@ class GeminiChatbotService:
             """    
 
     def check_quota_status(self) -> Dict:
-        """Check current API quota status"""
-        try:
-            # Simple test call to check if API is working
-            test_response = self.model.generate_content(
-                "Test",
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=10,
-                    temperature=0.1,
-                )
-            )
-            return {
-                "status": "available",
-                "message": "API quota available"
-            }
-        except Exception as e:
-            error_msg = str(e)
-            if "429" in error_msg or "quota" in error_msg.lower():
-                return {
-                    "status": "quota_exceeded", 
-                    "message": "API quota exceeded",
-                    "error": error_msg
-                }
-            return {
-                "status": "error",
-                "message": "API error",
-                "error": error_msg
-            }
\ No newline at end of file
+        """Trạng thái API theo health đã cache từ các call thật (không gọi thử generate_content)"""
+        status = self.llm.status()
+        if status["status"] == "quota_exceeded":
+            status["message"] = "API quota exceeded"
+        elif status["status"] == "error":
+            status["message"] = "API error"
+        else:
+            status["message"] = "API quota available"
+        return status
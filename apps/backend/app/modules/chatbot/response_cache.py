@@ -0,0 +1,233 @@
+"""
+Cache câu trả lời LLM cho các prompt dạng template của chatbot
+(career advice, skill development plan, job market analysis).
+
+key = sha256(kind, CHATBOT_PROMPT_VERSION, GEMINI_MODEL, tham số đã chuẩn hoá)
+- chuẩn hoá: NFC + lowercase + gộp khoảng trắng; list (skills, interests) bỏ trùng + sort;
+  location "Việt Nam" / "Viet Nam" / "VN" → "vietnam".
+  "Data  Analyst" @ "Việt Nam" và "data analyst" @ "Vietnam" dùng chung 1 entry.
+- đổi prompt template → tăng CHATBOT_PROMPT_VERSION, key đổi theo.
+
+2 tầng:
+1) LRU trong process (CHATBOT_CACHE_MEM_SIZE phần tử, cùng TTL)
+2) Postgres chatbot.llm_response_cache, dùng chung giữa các worker; TTL CHATBOT_CACHE_TTL_SEC,
+   giữ tối đa CHATBOT_CACHE_MAX dòng (prune định kỳ theo last_hit_at).
+Chỉ cache câu trả lời thật của LLM (không cache fallback). Lỗi DB chỉ log, không chặn chat.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import text
+
+from ...core.db import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+CHATBOT_CACHE_ENABLED = os.getenv("CHATBOT_CACHE_ENABLED", "1") != "0"
+CHATBOT_CACHE_TTL_SEC = int(os.getenv("CHATBOT_CACHE_TTL_SEC", str(3 * 24 * 3600)))
+CHATBOT_CACHE_MAX = int(os.getenv("CHATBOT_CACHE_MAX", "5000"))
+CHATBOT_CACHE_MEM_SIZE = int(os.getenv("CHATBOT_CACHE_MEM_SIZE", "500"))
+CHATBOT_CACHE_PG = os.getenv("CHATBOT_CACHE_PG", "1") != "0"
+CHATBOT_PROMPT_VERSION = os.getenv("CHATBOT_PROMPT_VERSION", "v1")
+
+# prune bảng Postgres sau mỗi N lần ghi (trong process)
+_PRUNE_EVERY = 100
+
+_LOCATION_ALIASES = {
+    "việt nam": "vietnam",
+    "viet nam": "vietnam",
+    "vn": "vietnam",
+}
+
+
+def normalize_text(value: Any) -> str:
+    return " ".join(unicodedata.normalize("NFC", str(value or "")).lower().split())
+
+
+def normalize_list(values) -> list:
+    return sorted({normalize_text(v) for v in (values or []) if normalize_text(v)})
+
+
+def normalize_location(value: Any) -> str:
+    loc = normalize_text(value)
+    return _LOCATION_ALIASES.get(loc, loc)
+
+
+def cache_key(kind: str, params: Dict[str, Any]) -> str:
+    payload = json.dumps(
+        {
+            "kind": kind,
+            "v": CHATBOT_PROMPT_VERSION,
+            "model": os.getenv("GEMINI_MODEL", "gemini-pro"),
+            "params": params,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PromptResponseCache:
+    def __init__(self) -> None:
+        self._mem: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._pg_enabled = CHATBOT_CACHE_PG
+        self._table_ready = False
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ---- memory tier ----
+
+    def _mem_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._mem.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._mem.pop(key, None)
+                return None
+            self._mem.move_to_end(key)
+            return entry[1]
+
+    def _mem_put(self, key: str, response: str, expires_at: float) -> None:
+        if CHATBOT_CACHE_MEM_SIZE <= 0:
+            return
+        with self._lock:
+            self._mem[key] = (expires_at, response)
+            self._mem.move_to_end(key)
+            while len(self._mem) > CHATBOT_CACHE_MEM_SIZE:
+                self._mem.popitem(last=False)
+
+    # ---- postgres tier ----
+
+    def _ensure_table(self, db) -> None:
+        if self._table_ready:
+            return
+        db.execute(text("""
+            CREATE TABLE IF NOT EXISTS chatbot.llm_response_cache (
+                cache_key    TEXT PRIMARY KEY,
+                kind         TEXT NOT NULL,
+                params       JSONB NOT NULL,
+                response     TEXT NOT NULL,
+                created_at   TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                expires_at   TIMESTAMPTZ NOT NULL,
+                last_hit_at  TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+                hits         INT NOT NULL DEFAULT 0
+            )
+        """))
+        db.execute(text("""
+            CREATE INDEX IF NOT EXISTS ix_llm_response_cache_last_hit
+                ON chatbot.llm_response_cache (last_hit_at)
+        """))
+        db.commit()
+        self._table_ready = True
+
+    def _pg_get(self, key: str) -> Optional[Tuple[str, float]]:
+        db = SessionLocal()
+        try:
+            self._ensure_table(db)
+            row = db.execute(text("""
+                UPDATE chatbot.llm_response_cache
+                   SET hits = hits + 1, last_hit_at = NOW()
+                 WHERE cache_key = :key AND expires_at > NOW()
+             RETURNING response, EXTRACT(EPOCH FROM expires_at)
+            """), {"key": key}).fetchone()
+            db.commit()
+            return (row[0], float(row[1])) if row else None
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"[chatbot_cache] postgres get failed: {e!r}")
+            return None
+        finally:
+            db.close()
+
+    def _pg_put(self, key: str, kind: str, params: Dict[str, Any], response: str) -> None:
+        db = SessionLocal()
+        try:
+            self._ensure_table(db)
+            db.execute(text("""
+                INSERT INTO chatbot.llm_response_cache (cache_key, kind, params, response, expires_at)
+                VALUES (:key, :kind, CAST(:params AS JSONB), :response,
+                        NOW() + make_interval(secs => :ttl))
+                ON CONFLICT (cache_key) DO UPDATE
+                   SET response    = EXCLUDED.response,
+                       created_at  = NOW(),
+                       expires_at  = EXCLUDED.expires_at,
+                       last_hit_at = NOW()
+            """), {
+                "key": key,
+                "kind": kind,
+                "params": json.dumps(params, ensure_ascii=False),
+                "response": response,
+                "ttl": CHATBOT_CACHE_TTL_SEC,
+            })
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune(db)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"[chatbot_cache] postgres put failed: {e!r}")
+        finally:
+            db.close()
+
+    def _prune(self, db) -> None:
+        db.execute(text("DELETE FROM chatbot.llm_response_cache WHERE expires_at <= NOW()"))
+        db.execute(text("""
+            DELETE FROM chatbot.llm_response_cache
+             WHERE cache_key IN (
+                SELECT cache_key FROM chatbot.llm_response_cache
+                 ORDER BY last_hit_at DESC
+                OFFSET :max
+             )
+        """), {"max": CHATBOT_CACHE_MAX})
+
+    # ---- public API ----
+
+    def get(self, kind: str, params: Dict[str, Any]) -> Optional[str]:
+        if not CHATBOT_CACHE_ENABLED:
+            return None
+        key = cache_key(kind, params)
+        response = self._mem_get(key)
+        if response is None and self._pg_enabled:
+            found = self._pg_get(key)
+            if found is not None:
+                response, expires_at = found
+                self._mem_put(key, response, expires_at)
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def put(self, kind: str, params: Dict[str, Any], response: str) -> None:
+        if not CHATBOT_CACHE_ENABLED or not response:
+            return
+        key = cache_key(kind, params)
+        self._mem_put(key, response, time.time() + CHATBOT_CACHE_TTL_SEC)
+        if self._pg_enabled:
+            self._pg_put(key, kind, params, response)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._mem)
+        return {"hits": self.hits, "misses": self.misses, "memory_entries": size, "postgres": self._pg_enabled}
+
+
+_cache: Optional[PromptResponseCache] = None
+
+
+def get_response_cache() -> PromptResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = PromptResponseCache()
+    return _cache
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from datetime import datetime
@@ -8,6 +9,9 @@ from sqlalchemy.orm import Session
 
 from .gemini_service import GeminiChatbotService
 from .chat_service import ChatHistoryService
+from .response_cache import get_response_cache
+from .streaming import SSE_HEADERS, stream_sse
+from ...core.db import SessionLocal
 from ...core.jwt import require_user
 
 logger = logging.getLogger(__name__)
@@ -210,6 +214,105 @@ def analyze_job_market(
         logger.error(f"Error in job market analysis endpoint: {str(e)}")
         raise HTTPException(status_code=500, detail="Lỗi hệ thống, vui lòng thử lại sau")
 
+# === STREAMING (SSE) ENDPOINTS ===
+
+def _require_user_or_401(request: Request) -> int:
+    try:
+        return require_user(request)
+    except Exception as auth_error:
+        logger.error(f"Authentication failed: {str(auth_error)}")
+        raise HTTPException(status_code=401, detail="Authentication required") from auth_error
+
+def get_chatbot_service(_user_id: int = Depends(_require_user_or_401)) -> GeminiChatbotService:
+    """
+    Dependency tạo LLM service (override bằng app.dependency_overrides khi test).
+    Phụ thuộc auth → caller chưa đăng nhập nhận 401, service không được tạo trước khi xác thực.
+    """
+    try:
+        return GeminiChatbotService()
+    except Exception as service_error:
+        logger.error(f"Service creation failed: {str(service_error)}")
+        raise HTTPException(status_code=500, detail="Service initialization error") from service_error
+
+def _sse_response(events) -> StreamingResponse:
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.post("/chat/stream")
+def chat_with_bot_stream(
+    chat_message: ChatMessage,
+    user_id: int = Depends(_require_user_or_401),
+    gemini_service: GeminiChatbotService = Depends(get_chatbot_service),
+):
+    """
+    Như /chat nhưng trả SSE: token được relay ngay khi Gemini sinh ra,
+    lưu lịch sử 1 lần khi stream xong (session DB riêng, không giữ session của request).
+    """
+    logger.info(f"Chat stream called by user {user_id} with message: {chat_message.message[:50]}...")
+
+    def _persist(response: str, response_time_ms: int) -> Dict:
+        db = SessionLocal()
+        try:
+            saved_message = ChatHistoryService(db).save_message_and_response(
+                user_id=user_id,
+                message=chat_message.message,
+                response=response,
+                message_type="text",
+                response_time_ms=response_time_ms,
+                session_id=chat_message.session_id
+            )
+            return {"session_id": saved_message["session_id"], "message_id": saved_message["id"]}
+        except Exception as save_error:
+            db.rollback()
+            logger.error(f"Database save failed: {str(save_error)}")
+            return {"session_id": None, "message_id": None}
+        finally:
+            db.close()
+
+    return _sse_response(
+        stream_sse(
+            gemini_service.stream_response(chat_message.message, chat_message.context),
+            on_complete=_persist,
+        )
+    )
+
+@router.post("/career-advice/stream")
+def get_career_advice_stream(
+    advice_request: CareerAdviceRequest,
+    user_id: int = Depends(_require_user_or_401),
+    gemini_service: GeminiChatbotService = Depends(get_chatbot_service),
+):
+    """Lời khuyên nghề nghiệp dạng SSE"""
+    logger.info(f"User {user_id} requested career advice (stream)")
+    chunks = gemini_service.stream_career_advice({
+        'skills': advice_request.skills,
+        'interests': advice_request.interests,
+        'experience': advice_request.experience,
+        'education': advice_request.education
+    })
+    return _sse_response(stream_sse(chunks))
+
+@router.post("/skill-development/stream")
+def get_skill_development_plan_stream(
+    skill_request: SkillDevelopmentRequest,
+    user_id: int = Depends(_require_user_or_401),
+    gemini_service: GeminiChatbotService = Depends(get_chatbot_service),
+):
+    """Kế hoạch phát triển kỹ năng dạng SSE"""
+    logger.info(f"User {user_id} requested skill development plan for {skill_request.target_job} (stream)")
+    chunks = gemini_service.stream_skill_development_plan(skill_request.current_skills, skill_request.target_job)
+    return _sse_response(stream_sse(chunks))
+
+@router.post("/job-market-analysis/stream")
+def analyze_job_market_stream(
+    market_request: JobMarketAnalysisRequest,
+    user_id: int = Depends(_require_user_or_401),
+    gemini_service: GeminiChatbotService = Depends(get_chatbot_service),
+):
+    """Phân tích thị trường việc làm dạng SSE"""
+    logger.info(f"User {user_id} requested job market analysis for {market_request.job_title} (stream)")
+    chunks = gemini_service.stream_job_market_analysis(market_request.job_title, market_request.location)
+    return _sse_response(stream_sse(chunks))
+
 @router.post("/test-chat")
 def test_chat_no_auth(chat_message: ChatMessage):
     """Test chat endpoint without authentication for debugging"""
@@ -333,13 +436,15 @@ def delete_session(request: Request, session_id: int):
 def chatbot_health_check():
     """Health check cho chatbot service"""
     try:
-        # Test Gemini service
+        # Health lấy từ kết quả các call thật gần đây, không gọi thử Gemini
         gemini_service = GeminiChatbotService()
-        test_response = gemini_service.generate_response("Hello")
+        quota = gemini_service.check_quota_status()
         
         return {
-            "status": "healthy",
-            "gemini_api": "connected",
+            "status": "healthy" if quota["status"] == "available" else "degraded",
+            "gemini_api": quota["status"],
+            "active_model": quota.get("active_model"),
+            "response_cache": get_response_cache().stats(),
             "timestamp": datetime.now().isoformat()
         }
     except Exception as e:
@@ -0,0 +1,64 @@
+"""
+Server-Sent Events cho chatbot: relay từng chunk từ LLM tới client ngay khi có.
+
+Format mỗi event: `data: <json>\n\n`
+    {"type": "chunk", "text": "..."}                       # lặp lại
+    {"type": "done", "response_time_ms": ..., "ttft_ms": ..., ...on_complete}
+    {"type": "error", "message": "..."}                    # generator lỗi giữa chừng
+
+stream_sse() nhận bất kỳ iterator str nào (GeminiChatbotService.stream_response
+hoặc generator giả khi test), không phụ thuộc google.generativeai.
+"""
+
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # nginx: không buffer response, client nhận token ngay
+    "X-Accel-Buffering": "no",
+}
+
+
+def sse_event(data: Dict[str, Any]) -> str:
+    return f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def stream_sse(
+    chunks: Iterable[str],
+    on_complete: Optional[Callable[[str, int], Optional[Dict[str, Any]]]] = None,
+) -> Iterator[str]:
+    """
+    chunks: iterator text từ LLM.
+    on_complete(full_text, response_time_ms): gọi 1 lần sau chunk cuối (vd. lưu DB),
+    dict trả về được gộp vào event "done".
+    """
+    start_time = time.time()
+    ttft_ms: Optional[int] = None
+    parts = []
+
+    try:
+        for text in chunks:
+            if not text:
+                continue
+            if ttft_ms is None:
+                ttft_ms = int((time.time() - start_time) * 1000)
+            parts.append(text)
+            yield sse_event({"type": "chunk", "text": text})
+    except Exception as e:
+        logger.error(f"Streaming generator failed: {str(e)}")
+        yield sse_event({"type": "error", "message": "Xin lỗi, tôi gặp sự cố khi xử lý yêu cầu. Vui lòng thử lại sau."})
+        return
+
+    response_time_ms = int((time.time() - start_time) * 1000)
+    done: Dict[str, Any] = {"type": "done", "response_time_ms": response_time_ms, "ttft_ms": ttft_ms}
+    if on_complete is not None:
+        try:
+            done.update(on_complete("".join(parts), response_time_ms) or {})
+        except Exception as e:
+            logger.error(f"Streaming on_complete failed: {str(e)}")
+    yield sse_event(done)
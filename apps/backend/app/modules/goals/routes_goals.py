@@ -16,6 +16,7 @@ import google.generativeai as genai
 
 from ...core.jwt import require_user
 from ...core.subscription import SubscriptionService
+from ...services.llm_registry import LLMRegistry, get_llm_registry
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -386,49 +387,34 @@ class GenerateMilestonesRequest(BaseModel):
     target_months: int = 12  # User's desired timeline in months
     
 
-def _get_gemini_models():
-    """Get list of Gemini models to try"""
-    api_key = os.getenv("GEMINI_API_KEY")
-    if not api_key:
+# Prioritize fast models - same as chatbot
+GOALS_MODELS = [
+    "models/gemma-3-4b-it",  # Free model, no rate limit
+    "models/gemma-3-1b-it",
+    "gemini-2.0-flash",
+    "models/gemini-2.0-flash-lite",
+    "gemini-1.5-flash-latest",
+    "gemini-pro",
+]
+
+
+def _get_gemini_models() -> LLMRegistry:
+    """Registry Gemini dùng chung trong process (lazy, không gọi thử model)"""
+    if not os.getenv("GEMINI_API_KEY"):
         raise HTTPException(status_code=500, detail="AI service not configured")
-    
-    genai.configure(api_key=api_key)
-    
-    # Prioritize fast models - same as chatbot
-    return [
-        "models/gemma-3-4b-it",  # Free model, no rate limit
-        "models/gemma-3-1b-it",
-        "gemini-2.0-flash",
-        "models/gemini-2.0-flash-lite",
-        "gemini-1.5-flash-latest",
-        "gemini-pro",
-    ]
+    return get_llm_registry("goals", GOALS_MODELS)
 
 
 def _generate_with_fallback(prompt: str, max_tokens: int = 1000):
-    """Generate content with fallback to multiple models"""
-    models = _get_gemini_models()
-    last_error = None
-    
-    for model_name in models:
-        try:
-            logger.info(f"Trying model: {model_name}")
-            model = genai.GenerativeModel(model_name)
-            response = model.generate_content(
-                prompt,
-                generation_config=genai.types.GenerationConfig(
-                    max_output_tokens=max_tokens,
-                    temperature=0.5,
-                )
-            )
-            logger.info(f"Success with model: {model_name}")
-            return response.text.strip()
-        except Exception as e:
-            logger.warning(f"Model {model_name} failed: {e}")
-            last_error = e
-            continue
-    
-    raise last_error or Exception("All models failed")
+    """Generate content, failover giữa các model theo lỗi thật (xem LLMRegistry)"""
+    text = _get_gemini_models().generate_text(
+        prompt,
+        generation_config=genai.types.GenerationConfig(
+            max_output_tokens=max_tokens,
+            temperature=0.5,
+        )
+    )
+    return text.strip()
 
 
 def _get_roadmap_data(session: Session, career_id: str) -> dict:
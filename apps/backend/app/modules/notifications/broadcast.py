@@ -0,0 +1,197 @@
+# app/modules/notifications/broadcast.py
+"""
+Broadcast thông báo tới toàn bộ user.
+
+1) Ghi DB set-based: 1 câu INSERT ... SELECT id FROM core.users (không loop Python),
+   đồng thời lấy lại (id, user_id, created_at) của các user đang online trên process này.
+2) Fan-out job (asyncio task trên event loop của app): push qua ConnectionManager theo
+   lô BROADCAST_WS_CONCURRENCY socket, mỗi lần gửi timeout BROADCAST_WS_TIMEOUT_SEC.
+   sent / failed đếm theo socket (1 user có thể mở nhiều tab), progress theo user.
+   Tiến độ lưu trong process, admin xem qua GET /api/admin/notifications/broadcast/{job_id}.
+
+Lưu ý: ConnectionManager là theo process, nên fan-out chỉ tới client nối vào worker này;
+client ở worker khác vẫn thấy thông báo khi tải lại danh sách (đã có trong DB).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..realtime.ws_notifications import manager
+
+BROADCAST_WS_CONCURRENCY = int(os.getenv("BROADCAST_WS_CONCURRENCY", "100"))
+BROADCAST_WS_TIMEOUT_SEC = float(os.getenv("BROADCAST_WS_TIMEOUT_SEC", "5"))
+# số job giữ lại để admin xem tiến độ
+BROADCAST_JOBS_KEEP = 50
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BroadcastJob:
+    id: str
+    title: str
+    total_recipients: int
+    online_recipients: int
+    status: str = "pending"  # pending | running | completed | failed
+    processed: int = 0  # số user online đã xử lý
+    sent: int = 0  # số socket nhận được
+    failed: int = 0  # số socket lỗi / timeout
+    error: Optional[str] = None
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    finished_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["progress"] = round(self.processed / self.online_recipients, 3) if self.online_recipients else 1.0
+        return data
+
+
+_jobs: Dict[str, BroadcastJob] = {}
+_tasks: Dict[str, "asyncio.Task"] = {}
+_lock = threading.Lock()
+
+
+def insert_broadcast(
+    session: Session,
+    *,
+    notification_type: str,
+    title: str,
+    message: str,
+    link: Optional[str],
+    online_user_ids: List[int],
+) -> Dict[str, Any]:
+    """
+    INSERT ... SELECT cho mọi user. Trả về tổng số dòng và notification của user online.
+    Caller tự commit.
+    """
+    row = session.execute(text("""
+        WITH ins AS (
+            INSERT INTO core.notifications (user_id, type, title, message, link, is_read)
+            SELECT u.id, :type, :title, :message, :link, FALSE
+            FROM core.users u
+            RETURNING id, user_id, created_at
+        )
+        SELECT COUNT(*) AS total,
+               COALESCE(
+                   json_agg(json_build_object('id', id, 'user_id', user_id, 'created_at', created_at))
+                       FILTER (WHERE user_id = ANY(CAST(:online AS bigint[]))),
+                   '[]'::json
+               ) AS online
+        FROM ins
+    """), {
+        "type": notification_type,
+        "title": title,
+        "message": message,
+        "link": link,
+        "online": [int(u) for u in online_user_ids],
+    }).mappings().first()
+
+    online = row["online"] if row else []
+    if isinstance(online, str):
+        online = json.loads(online)
+    return {"total": int(row["total"]) if row else 0, "online": online}
+
+
+def start_fanout(
+    loop: asyncio.AbstractEventLoop,
+    *,
+    total_recipients: int,
+    online: List[Dict[str, Any]],
+    notification_type: str,
+    title: str,
+    message: str,
+    link: Optional[str],
+) -> BroadcastJob:
+    """Tạo job + schedule task push ws trên event loop (gọi được từ thread của route sync)."""
+    job = BroadcastJob(
+        id=uuid.uuid4().hex,
+        title=title,
+        total_recipients=total_recipients,
+        online_recipients=len(online),
+    )
+    payloads = [
+        (
+            int(n["user_id"]),
+            {
+                "id": str(n["id"]),
+                "user_id": str(n["user_id"]),
+                "type": notification_type,
+                "title": title,
+                "message": message,
+                "link": link,
+                "is_read": False,
+                "created_at": n.get("created_at"),
+            },
+        )
+        for n in online
+    ]
+    with _lock:
+        _jobs[job.id] = job
+        for old_id in list(_jobs)[:-BROADCAST_JOBS_KEEP]:
+            _jobs.pop(old_id, None)
+
+    def _schedule() -> None:
+        _tasks[job.id] = loop.create_task(_run_fanout(job, payloads))
+
+    loop.call_soon_threadsafe(_schedule)
+    return job
+
+
+async def _send_one(user_id: int, payload: Dict[str, Any]) -> Tuple[int, int]:
+    """(delivered, failed) theo socket; timeout / lỗi → mọi socket của user tính là failed."""
+    sockets = manager.connection_count(user_id)
+    try:
+        return await asyncio.wait_for(manager.send(user_id, payload), timeout=BROADCAST_WS_TIMEOUT_SEC)
+    except Exception:
+        return 0, max(1, sockets)
+
+
+async def _run_fanout(job: BroadcastJob, payloads: List[tuple]) -> None:
+    job.status = "running"
+    started = time.monotonic()
+    try:
+        for i in range(0, len(payloads), max(1, BROADCAST_WS_CONCURRENCY)):
+            chunk = payloads[i:i + BROADCAST_WS_CONCURRENCY]
+            results = await asyncio.gather(*(_send_one(uid, p) for uid, p in chunk))
+            for delivered, failed in results:
+                job.sent += delivered
+                job.failed += failed
+            job.processed += len(results)
+        job.status = "completed"
+    except Exception as e:
+        job.status = "failed"
+        job.error = repr(e)
+    finally:
+        job.finished_at = datetime.now(timezone.utc).isoformat()
+        _tasks.pop(job.id, None)
+        logger.info(
+            "[broadcast] job=%s %s: sent=%d failed=%d (sockets) online=%d total=%d in %.2fs",
+            job.id,
+            job.status,
+            job.sent,
+            job.failed,
+            job.online_recipients,
+            job.total_recipients,
+            time.monotonic() - started,
+        )
+
+
+def get_job(job_id: str) -> Optional[BroadcastJob]:
+    return _jobs.get(job_id)
+
+
+def list_jobs() -> List[BroadcastJob]:
+    return list(reversed(list(_jobs.values())))
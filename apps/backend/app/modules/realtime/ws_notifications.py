@@ -1,4 +1,4 @@
-from typing import Dict, Set
+from typing import Dict, List, Set, Tuple
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
 
@@ -20,12 +20,23 @@ class ConnectionManager:
         if conns and websocket in conns:
             conns.remove(websocket)
 
-    async def send(self, user_id: int, message: dict):
+    async def send(self, user_id: int, message: dict) -> Tuple[int, int]:
+        """Gửi tới mọi socket của user; trả về (số socket nhận được, số socket lỗi)."""
+        delivered = failed = 0
         for ws in list(self.active.get(user_id, [])):
             try:
                 await ws.send_json(message)
+                delivered += 1
             except Exception:
+                failed += 1
                 self.disconnect(user_id, ws)
+        return delivered, failed
+
+    def connection_count(self, user_id: int) -> int:
+        return len(self.active.get(user_id, ()))
+
+    def online_user_ids(self) -> List[int]:
+        return [uid for uid, conns in self.active.items() if conns]
 
 
 manager = ConnectionManager()
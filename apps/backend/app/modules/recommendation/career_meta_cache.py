@@ -0,0 +1,82 @@
+# app/modules/recommendation/career_meta_cache.py
+"""
+Cache metadata nghề (core.careers + nhãn RIASEC) trong process cho RecService.
+
+- Key: onet_code. Value: dict meta ({} = không có trong core.careers, cũng được cache
+  để khỏi query lại các mã AI-core trả về nhưng chưa enrich).
+- TTL (CAREER_META_CACHE_TTL_SEC) giới hạn độ cũ khi chạy nhiều worker;
+  admin sửa / xoá nghề gọi invalidate() để process hiện tại thấy ngay.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+CAREER_META_CACHE_TTL_SEC = float(os.getenv("CAREER_META_CACHE_TTL_SEC", "600"))
+CAREER_META_CACHE_MAX = int(os.getenv("CAREER_META_CACHE_MAX", "5000"))
+
+
+class CareerMetaCache:
+    def __init__(self, ttl_sec: float = CAREER_META_CACHE_TTL_SEC, max_size: int = CAREER_META_CACHE_MAX) -> None:
+        self.ttl_sec = ttl_sec
+        self.max_size = max_size
+        self._data: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, codes: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        Trả về (meta theo code còn hạn, danh sách code cần load từ DB).
+        """
+        now = time.monotonic()
+        found: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+        with self._lock:
+            for code in codes:
+                entry = self._data.get(code)
+                if entry is not None and entry[0] > now:
+                    found[code] = entry[1]
+                else:
+                    missing.append(code)
+        return found, missing
+
+    def put_many(self, metas: Dict[str, Dict[str, Any]]) -> None:
+        if self.ttl_sec <= 0:
+            return
+        expires = time.monotonic() + self.ttl_sec
+        with self._lock:
+            if len(self._data) + len(metas) > self.max_size:
+                self._evict_expired()
+            if len(self._data) + len(metas) > self.max_size:
+                self._data.clear()
+            for code, meta in metas.items():
+                self._data[code] = (expires, meta)
+
+    def invalidate(self, codes: Optional[Iterable[str]] = None) -> None:
+        """
+        codes=None → xoá toàn bộ (vd. admin tạo / xoá nghề, sync O*NET).
+        """
+        with self._lock:
+            if codes is None:
+                self._data.clear()
+                return
+            for code in codes:
+                self._data.pop(code, None)
+
+    def _evict_expired(self) -> None:
+        now = time.monotonic()
+        for code in [c for c, (exp, _) in self._data.items() if exp <= now]:
+            del self._data[code]
+
+
+career_meta_cache = CareerMetaCache()
+
+
+def invalidate_career_meta(onet_codes: Optional[Iterable[str]] = None) -> None:
+    career_meta_cache.invalidate(onet_codes)
+    # recommendation đã cache chứa title/tags cũ
+    from .rec_cache import rec_cache
+
+    rec_cache.invalidate_all()
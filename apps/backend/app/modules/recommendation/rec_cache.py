@@ -0,0 +1,168 @@
+# app/modules/recommendation/rec_cache.py
+"""
+Cache kết quả recommendation theo assessment (RecService.get_main_recommendations).
+
+Kết quả cho 1 assessment là deterministic (snapshot traits + sort có tie-breaker), nên
+cache danh sách đã join meta + lọc RIASEC (trước display_match / position):
+
+- key = (REC_MODEL_VERSION, generation, assessment_id, top_k bucket)
+  + bucket: top_k ≤ 10 dùng chung 1 entry 10 (internal_top_k = max(top_k*10, 100) = 100
+    cho mọi top_k ≤ 10 → cùng tập ứng viên, bộ lọc L1/L2 lấy lần lượt nên kết quả top_k
+    nhỏ hơn đúng bằng prefix), request cắt prefix top_k rồi mới tính display_match.
+    top_k > 10 → key chính xác = top_k (internal_top_k khác nhau → kết quả không phải prefix).
+  + đổi model: set REC_MODEL_VERSION mới khi deploy → key mới.
+  + generation: tăng khi metadata nghề thay đổi (invalidate_all).
+- Tầng 1: dict trong process, TTL REC_CACHE_TTL_SEC.
+- Tầng 2 (tuỳ chọn, REC_CACHE_REDIS=1): Redis dùng chung giữa các worker; lỗi Redis → bỏ qua.
+- invalidate_user(user_id): gọi khi essay của user được chấm lại (embedding/traits mới).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.core.logging import logger
+
+REC_MODEL_VERSION = os.getenv("REC_MODEL_VERSION", "v1")
+REC_CACHE_ENABLED = os.getenv("REC_CACHE_ENABLED", "1") != "0"
+REC_CACHE_TTL_SEC = float(os.getenv("REC_CACHE_TTL_SEC", "600"))
+REC_CACHE_MAX = int(os.getenv("REC_CACHE_MAX", "2000"))
+REC_CACHE_REDIS = os.getenv("REC_CACHE_REDIS", "0") == "1"
+REC_CACHE_REDIS_TTL_SEC = int(os.getenv("REC_CACHE_REDIS_TTL_SEC", "86400"))
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# top_k ≤ SHARED_TOP_K dùng chung 1 entry (xem docstring module)
+SHARED_TOP_K = 10
+
+Items = List[Dict[str, Any]]
+
+
+def bucket_for(top_k: int) -> int:
+    return SHARED_TOP_K if top_k <= SHARED_TOP_K else top_k
+
+
+class RecommendationCache:
+    def __init__(self) -> None:
+        self._data: Dict[Tuple[str, int, int, int], Tuple[float, int, Items]] = {}
+        self._by_user: Dict[int, Set[Tuple[str, int, int, int]]] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._redis = None
+        self._redis_available = REC_CACHE_REDIS
+
+    # ---- redis (optional) ----
+
+    def _get_redis(self):
+        if not self._redis_available:
+            return None
+        if self._redis is None:
+            try:
+                import redis
+
+                self._redis = redis.Redis.from_url(REDIS_URL, decode_responses=True)
+                self._redis.ping()
+            except Exception as e:
+                print(f"⚠️ Redis not available, recommendation cache is in-process only: {e}")
+                self._redis_available = False
+                self._redis = None
+        return self._redis
+
+    def _redis_key(self, generation: int, assessment_id: int, bucket: int) -> str:
+        return f"recs:{REC_MODEL_VERSION}:{generation}:{assessment_id}:{bucket}"
+
+    def _redis_generation(self, r) -> int:
+        return int(r.get("recs:gen") or 0)
+
+    # ---- public API ----
+
+    def get(self, assessment_id: int, bucket: int) -> Optional[Items]:
+        if not REC_CACHE_ENABLED:
+            return None
+
+        key = (REC_MODEL_VERSION, self._generation, assessment_id, bucket)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    return entry[2]
+                self._data.pop(key, None)
+
+        r = self._get_redis()
+        if r is None:
+            return None
+        try:
+            raw = r.get(self._redis_key(self._redis_generation(r), assessment_id, bucket))
+        except Exception as e:
+            logger.warning(f"[rec_cache] redis get failed: {e}")
+            return None
+        if not raw:
+            return None
+        payload = json.loads(raw)
+        self._put_local(assessment_id, int(payload["user_id"]), bucket, payload["items"])
+        return payload["items"]
+
+    def put(self, assessment_id: int, user_id: int, bucket: int, items: Items) -> None:
+        if not REC_CACHE_ENABLED or not items:
+            return
+        self._put_local(assessment_id, user_id, bucket, items)
+
+        r = self._get_redis()
+        if r is None:
+            return
+        try:
+            key = self._redis_key(self._redis_generation(r), assessment_id, bucket)
+            pipe = r.pipeline()
+            pipe.set(key, json.dumps({"user_id": user_id, "items": items}), ex=REC_CACHE_REDIS_TTL_SEC)
+            pipe.sadd(f"recs:user:{user_id}", key)
+            pipe.expire(f"recs:user:{user_id}", REC_CACHE_REDIS_TTL_SEC)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"[rec_cache] redis put failed: {e}")
+
+    def _put_local(self, assessment_id: int, user_id: int, bucket: int, items: Items) -> None:
+        key = (REC_MODEL_VERSION, self._generation, assessment_id, bucket)
+        with self._lock:
+            if len(self._data) >= REC_CACHE_MAX:
+                self._data.clear()
+                self._by_user.clear()
+            self._data[key] = (time.monotonic() + REC_CACHE_TTL_SEC, user_id, items)
+            self._by_user.setdefault(user_id, set()).add(key)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for key in self._by_user.pop(user_id, set()):
+                self._data.pop(key, None)
+
+        r = self._get_redis()
+        if r is None:
+            return
+        try:
+            keys = r.smembers(f"recs:user:{user_id}")
+            if keys:
+                r.delete(*keys)
+            r.delete(f"recs:user:{user_id}")
+        except Exception as e:
+            logger.warning(f"[rec_cache] redis invalidate_user failed: {e}")
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+            self._by_user.clear()
+
+        r = self._get_redis()
+        if r is None:
+            return
+        try:
+            # entry cũ hết hạn theo TTL, không cần SCAN xoá
+            r.incr("recs:gen")
+        except Exception as e:
+            logger.warning(f"[rec_cache] redis invalidate_all failed: {e}")
+
+
+rec_cache = RecommendationCache()
@@ -1,17 +1,19 @@
 # app/modules/recommendation/service.py
 from __future__ import annotations
 
-import os
+import copy
 import uuid
 from typing import Any, Dict, List, Optional
 
-import httpx
 from sqlalchemy import text
 from sqlalchemy.orm import Session
 
 from app.core.logging import logger
+from app.modules.analytics.event_buffer import career_event_buffer
+from app.services.ai_core_client import AICoreError, ai_core
 
-AI_CORE_BASE_URL = os.getenv("AI_CORE_BASE_URL", "http://localhost:9000").rstrip("/")
+from .career_meta_cache import career_meta_cache
+from .rec_cache import bucket_for, rec_cache
 
 
 class RecService:
@@ -71,16 +73,18 @@ class RecService:
         """
         dto_list: List[Dict[str, Any]] = []
 
+        def _code(raw: Dict[str, Any]) -> Optional[str]:
+            return raw.get("job_onet") or raw.get("career_id") or raw.get("job_id")
+
+        # 1 query cho cả trang (thay vì 1 query / candidate), có cache in-process
+        metas = self._load_career_meta_many(db, [c for c in map(_code, items) if c])
+
         for raw in items:
-            onet_code = (
-                raw.get("job_onet")
-                or raw.get("career_id")
-                or raw.get("job_id")
-            )
+            onet_code = _code(raw)
             if not onet_code:
                 continue
 
-            meta = self._load_career_meta(db, onet_code)
+            meta = metas.get(onet_code)
             if not meta:
                 # chưa enrich metadata thì bỏ qua nghề này
                 continue
@@ -324,15 +328,67 @@ class RecService:
         assessment_id: int,
         top_k: int = 20,
     ) -> Dict[str, Any]:
-        # Lấy nhiều hơn để còn room cho join + filter
-        # Tăng từ 4x lên 10x để đảm bảo đủ nghề khớp nhãn RIASEC
-        internal_top_k = max(top_k * 10, 100)
-
         # 1) Map assessment -> user_id
         user_id = self._get_user_from_assessment(db, assessment_id)
         if user_id is None:
             raise RuntimeError(f"Assessment {assessment_id} not found or invalid")
 
+        # 2-5) Danh sách đã lọc theo bucket top_k: cache trước, miss mới gọi AI-core + join + filter.
+        # bucket = 10 cho mọi top_k ≤ 10 (cùng internal_top_k=100 → kết quả top_k là prefix
+        # của kết quả 10), còn lại bucket = top_k (xem rec_cache.bucket_for).
+        bucket = bucket_for(top_k)
+        ranked = rec_cache.get(assessment_id, bucket)
+        if ranked is not None:
+            logger.info(f"[get_main_recommendations] cache hit assessment={assessment_id} bucket={bucket}")
+        else:
+            ranked = self._rank_for_assessment(db, assessment_id, user_id, bucket)
+            if ranked is None:
+                # 2.1) AI-core không trả về kết quả → saved recommendations (không cache)
+                saved_items = self._get_saved_recommendations_from_db(db, assessment_id, top_k)
+                if saved_items:
+                    logger.info(f"Returning {len(saved_items)} saved recommendations")
+                    return {"request_id": None, "items": saved_items}
+                logger.warning(f"No saved recommendations found for assessment {assessment_id}")
+                return {"request_id": None, "items": []}
+            rec_cache.put(assessment_id, user_id, bucket, ranked)
+
+        items_filtered = copy.deepcopy(ranked[:top_k])
+
+        # 6) Chuẩn hoá display_match
+        self._apply_display_match(items_filtered)
+
+        # 7) Generate request_id + đánh position
+        # NOTE: Impression logging đã chuyển sang FE để tránh double-count
+        # FE sẽ gọi /api/analytics/career-event khi user mở tab Career Matches
+        request_id = str(uuid.uuid4())
+
+        for idx, it in enumerate(items_filtered, start=1):
+            it["position"] = idx
+
+        # 8) Save top 5 recommendations to core.career_recommendations table
+        # Only save when fetching full recommendations (top_k >= 5), not for dashboard preview (top_k=3)
+        if top_k >= 5:
+            self._save_career_recommendations(db, user_id, assessment_id, items_filtered[:5])
+
+        return {
+            "request_id": request_id,
+            "items": items_filtered,
+        }
+
+    def _rank_for_assessment(
+        self,
+        db: Session,
+        assessment_id: int,
+        user_id: int,
+        top_k: int,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        AI-core → join meta → lọc RIASEC L1/L2. None nếu AI-core không trả về gì.
+        """
+        # Lấy nhiều hơn để còn room cho join + filter
+        # Tăng từ 4x lên 10x để đảm bảo đủ nghề khớp nhãn RIASEC
+        internal_top_k = max(top_k * 10, 100)
+
         # 2) Gọi AI-core
         logger.info(f"[get_main_recommendations] Calling AI-core for assessment {assessment_id}")
         scored = self._call_ai_core_top_careers(assessment_id, internal_top_k)
@@ -341,12 +397,7 @@ class RecService:
         # 2.1) Nếu AI-core không trả về kết quả, thử lấy từ saved recommendations
         if not scored:
             logger.warning(f"AI-core returned no results, trying saved recommendations for assessment {assessment_id}")
-            saved_items = self._get_saved_recommendations_from_db(db, assessment_id, top_k)
-            if saved_items:
-                logger.info(f"Returning {len(saved_items)} saved recommendations")
-                return {"request_id": None, "items": saved_items}
-            logger.warning(f"No saved recommendations found for assessment {assessment_id}")
-            return {"request_id": None, "items": []}
+            return None
 
         # 3) Snapshot traits của **chính assessment này**
         traits = self._load_traits_snapshot(db, assessment_id)
@@ -391,27 +442,7 @@ class RecService:
         logger.info(
             f"Assessment {assessment_id}: {len(items_filtered)} careers after L1/L2 filter"
         )
-
-        # 6) Chuẩn hoá display_match
-        self._apply_display_match(items_filtered)
-
-        # 7) Generate request_id + đánh position
-        # NOTE: Impression logging đã chuyển sang FE để tránh double-count
-        # FE sẽ gọi /api/analytics/career-event khi user mở tab Career Matches
-        request_id = str(uuid.uuid4())
-
-        for idx, it in enumerate(items_filtered, start=1):
-            it["position"] = idx
-
-        # 8) Save top 5 recommendations to core.career_recommendations table
-        # Only save when fetching full recommendations (top_k >= 5), not for dashboard preview (top_k=3)
-        if top_k >= 5:
-            self._save_career_recommendations(db, user_id, assessment_id, items_filtered[:5])
-
-        return {
-            "request_id": request_id,
-            "items": items_filtered,
-        }
+        return items_filtered
 
     def _save_career_recommendations(
         self,
@@ -438,44 +469,42 @@ class RecService:
                 ),
                 {"assessment_id": assessment_id}
             )
-            
-            # Insert new recommendations
-            for item in items:
-                # Get career_id from core.careers table using slug or onet_code
-                career_id_result = db.execute(
-                    text(
-                        """
+
+            # Insert new recommendations: 1 câu INSERT ... SELECT cho cả list,
+            # career_id resolve theo slug hoặc onet_code ngay trong SQL
+            db.execute(
+                text(
+                    """
+                    INSERT INTO core.career_recommendations
+                        (user_id, assessment_id, career_id, score, rank)
+                    SELECT :user_id, :assessment_id, c.id, i.score, i.rank
+                    FROM unnest(
+                        CAST(:slugs  AS text[]),
+                        CAST(:codes  AS text[]),
+                        CAST(:scores AS float8[]),
+                        CAST(:ranks  AS int[])
+                    ) AS i(slug, onet_code, score, rank)
+                    JOIN LATERAL (
                         SELECT id FROM core.careers
-                        WHERE slug = :slug OR onet_code = :onet_code
+                        WHERE slug = i.slug OR onet_code = i.onet_code
                         LIMIT 1
-                        """
-                    ),
-                    {
-                        "slug": item.get("slug"),
-                        "onet_code": item.get("job_onet") or item.get("career_id")
-                    }
-                ).fetchone()
-                
-                if career_id_result:
-                    career_id = career_id_result[0]
-                    db.execute(
-                        text(
-                            """
-                            INSERT INTO core.career_recommendations
-                                (user_id, assessment_id, career_id, score, rank)
-                            VALUES
-                                (:user_id, :assessment_id, :career_id, :score, :rank)
-                            """
-                        ),
-                        {
-                            "user_id": user_id,
-                            "assessment_id": assessment_id,
-                            "career_id": career_id,
-                            "score": item.get("display_match") or item.get("match_score", 0.0),
-                            "rank": item.get("position", 0)
-                        }
-                    )
-            
+                    ) c ON TRUE
+                    ORDER BY i.rank
+                    """
+                ),
+                {
+                    "user_id": user_id,
+                    "assessment_id": assessment_id,
+                    "slugs": [item.get("slug") for item in items],
+                    "codes": [item.get("job_onet") or item.get("career_id") for item in items],
+                    "scores": [
+                        float(item.get("display_match") or item.get("match_score", 0.0))
+                        for item in items
+                    ],
+                    "ranks": [int(item.get("position", 0)) for item in items],
+                }
+            )
+
             db.commit()
             logger.info(f"Saved {len(items)} career recommendations for assessment {assessment_id}")
             
@@ -559,27 +588,19 @@ class RecService:
         assessment_id: int,
         top_k: int,
     ) -> List[Dict[str, Any]]:
-        url = f"{AI_CORE_BASE_URL}/recs/top_careers"
         payload = {"assessment_id": assessment_id, "top_k": top_k}
 
         try:
-            with httpx.Client(timeout=5.0) as client:
-                resp = client.post(url, json=payload)
-                
-            if resp.status_code != 200:
-                print(f"AI-core error {resp.status_code}: {resp.text}")
-                return []  # Return empty to trigger saved recommendations fallback
-
-            data = resp.json()
-            items = data.get("items", [])
-            if not isinstance(items, list):
-                print("AI-core returned invalid format")
-                return []  # Return empty to trigger saved recommendations fallback
-
-        except Exception as e:
+            data = ai_core.post_json("/recs/top_careers", payload)
+        except AICoreError as e:
             print(f"AI-core not reachable: {e}")
             return []  # Return empty to trigger saved recommendations fallback
 
+        items = data.get("items", []) if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            print("AI-core returned invalid format")
+            return []  # Return empty to trigger saved recommendations fallback
+
         out: List[Dict[str, Any]] = []
         for it in items:
             cid = it.get("career_id")
@@ -730,6 +751,22 @@ class RecService:
         }
 
     def _load_career_meta(self, db: Session, onet_code: str) -> Dict[str, Any]:
+        return self._load_career_meta_many(db, [onet_code]).get(onet_code, {})
+
+    def _load_career_meta_many(self, db: Session, onet_codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        onet_code -> meta (slug, title, desc, riasec_codes, ...) cho nhiều nghề.
+        Đọc cache trước, phần còn thiếu load bằng 1 query `onet_code = ANY(:codes)`.
+        Mã không có trong core.careers -> {} (cũng được cache).
+        """
+        codes = list(dict.fromkeys(str(c) for c in onet_codes if c))
+        if not codes:
+            return {}
+
+        metas, missing = career_meta_cache.get_many(codes)
+        if not missing:
+            return metas
+
         sql = text(
             """
             SELECT
@@ -750,24 +787,25 @@ class RecService:
                 ON m.career_id = c.id
             LEFT JOIN core.riasec_labels AS rl
                 ON rl.id = m.label_id
-            WHERE c.onet_code = :cid
+            WHERE c.onet_code = ANY(CAST(:codes AS text[]))
             GROUP BY
                 c.id, c.slug, c.onet_code,
                 c.title_vi, c.title_en,
                 c.short_desc_vn, c.short_desc_en
-            LIMIT 1
             """
         )
-        row = db.execute(sql, {"cid": onet_code}).mappings().first()
-        if not row:
-            return {}
+        loaded: Dict[str, Dict[str, Any]] = {code: {} for code in missing}
+        for row in db.execute(sql, {"codes": missing}).mappings():
+            d = dict(row)
+            if isinstance(d.get("riasec_codes"), (list, tuple)):
+                d["riasec_codes"] = [str(x) for x in d["riasec_codes"] if x is not None]
+            else:
+                d["riasec_codes"] = []
+            loaded[str(d["onet_code"])] = d
 
-        d = dict(row)
-        if isinstance(d.get("riasec_codes"), (list, tuple)):
-            d["riasec_codes"] = [str(x) for x in d["riasec_codes"] if x is not None]
-        else:
-            d["riasec_codes"] = []
-        return d
+        career_meta_cache.put_many(loaded)
+        metas.update(loaded)
+        return metas
 
     def _get_fallback_recommendations(self, top_k: int) -> List[Dict[str, Any]]:
         """
@@ -824,31 +862,20 @@ class RecService:
         if not items:
             return
 
-        sql = text(
-            """
-            INSERT INTO analytics.career_events
-                (user_id, job_id, event_type, rank_pos, score_shown, source, ref)
-            VALUES
-                (:user_id, :job_id, :event_type, :rank_pos, :score_shown, :source, :ref)
-            """
+        # Không ghi trong transaction của request: đẩy vào buffer, thread nền flush theo batch
+        career_event_buffer.add_many(
+            {
+                "user_id": user_id,
+                "job_id": it.get("job_onet") or it.get("career_id"),
+                "event_type": "impression",
+                "rank_pos": it.get("position", 0),
+                "score_shown": float(it.get("match_score", 0.0)),
+                "source": "neumf",
+                "ref": request_id,
+            }
+            for it in items
         )
 
-        for it in items:
-            job_onet = it.get("job_onet") or it.get("career_id")
-            db.execute(
-                sql,
-                {
-                    "user_id": user_id,
-                    "job_id": job_onet,
-                    "event_type": "impression",
-                    "rank_pos": it.get("position", 0),
-                    "score_shown": float(it.get("match_score", 0.0)),
-                    "source": "neumf",
-                    "ref": request_id,
-                },
-            )
-        db.commit()
-
     # ====================================================================== #
     # 7. Click logging
     # ====================================================================== #
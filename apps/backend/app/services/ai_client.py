@@ -1,10 +1,10 @@
 # apps/backend/app/services/ai_client.py
 
-from fastapi import requests
-import httpx
-from pydantic import BaseModel
 from typing import Optional
-from app.core.config import settings
+
+from pydantic import BaseModel
+
+from app.services.ai_core_client import ai_core
 
 
 class InferTraitsPayload(BaseModel):
@@ -15,19 +15,16 @@ class InferTraitsPayload(BaseModel):
 
 
 class AIClient:
-    BASE = settings.AI_SERVICE_URL or "http://localhost:9000"
+    """
+    Facade cũ, giờ dùng chung pool / retry / circuit breaker của ai_core_client.
+    """
+
+    BASE = ai_core.base_url
 
     @staticmethod
     async def infer_user_traits(payload: InferTraitsPayload) -> dict:
-        url = f"{AIClient.BASE}/ai/infer_user_traits"
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            resp = await client.post(url, json=payload.model_dump())
-            resp.raise_for_status()
-            return resp.json()
+        return await ai_core.apost_json("/ai/infer_user_traits", payload.model_dump())
 
     @staticmethod
     def recommend_top_careers_sync(user_id: int, top_k: int = 20) -> dict:
-        url = f"{AIClient.BASE}/recs/top_careers"
-        resp = requests.post(url, json={"user_id": user_id, "top_k": top_k}, timeout=30)
-        resp.raise_for_status()
-        return resp.json()
\ No newline at end of file
+        return ai_core.post_json("/recs/top_careers", {"user_id": user_id, "top_k": top_k})
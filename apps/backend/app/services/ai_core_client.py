@@ -0,0 +1,321 @@
+# apps/backend/app/services/ai_core_client.py
+"""
+Client HTTP dùng chung giữa backend (BFF) và AI-core.
+
+- 1 connection pool / process (httpx.Client + httpx.AsyncClient), keep-alive,
+  giới hạn số connection đồng thời (AI_CORE_MAX_CONNECTIONS) → bounded concurrency.
+- Timeout theo endpoint (recs ngắn, infer essay dài).
+- Retry với exponential backoff + full jitter, chỉ khi chắc request chưa được xử lý:
+  lỗi connect / hết connection trong pool, hoặc 502-503.
+  ReadTimeout / mất kết nối giữa chừng (AI-core có thể đã chạy xong model) chỉ retry với
+  endpoint idempotent đăng ký trong RETRY_READ_ENDPOINTS (hoặc retry_read=True).
+- Circuit breaker: AI_CORE_CB_FAILURES lỗi liên tiếp → mở mạch AI_CORE_CB_RESET_SEC giây,
+  các call trong lúc đó fail ngay (AICoreUnavailable) thay vì chờ timeout.
+
+    from app.services.ai_core_client import ai_core, AICoreError
+
+    data = ai_core.post_json("/recs/top_careers", {"assessment_id": 1, "top_k": 20})
+    data = await ai_core.apost_json("/ai/infer_user_traits", {...})
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+AI_CORE_BASE_URL = (
+    os.getenv("AI_CORE_BASE_URL")
+    or os.getenv("AI_CORE_URL")
+    or os.getenv("AI_SERVICE_URL")
+    or "http://localhost:9000"
+).rstrip("/")
+
+AI_CORE_MAX_CONNECTIONS = int(os.getenv("AI_CORE_MAX_CONNECTIONS", "20"))
+AI_CORE_MAX_KEEPALIVE = int(os.getenv("AI_CORE_MAX_KEEPALIVE", "10"))
+AI_CORE_CONNECT_TIMEOUT = float(os.getenv("AI_CORE_CONNECT_TIMEOUT", "2.0"))
+# thời gian tối đa chờ 1 connection rảnh trong pool (khi đã chạm AI_CORE_MAX_CONNECTIONS)
+AI_CORE_POOL_TIMEOUT = float(os.getenv("AI_CORE_POOL_TIMEOUT", "5.0"))
+AI_CORE_RETRIES = int(os.getenv("AI_CORE_RETRIES", "2"))
+AI_CORE_BACKOFF_SEC = float(os.getenv("AI_CORE_BACKOFF_SEC", "0.2"))
+AI_CORE_BACKOFF_MAX_SEC = float(os.getenv("AI_CORE_BACKOFF_MAX_SEC", "2.0"))
+AI_CORE_CB_FAILURES = int(os.getenv("AI_CORE_CB_FAILURES", "5"))
+AI_CORE_CB_RESET_SEC = float(os.getenv("AI_CORE_CB_RESET_SEC", "30"))
+
+# read timeout (giây) theo endpoint
+ENDPOINT_TIMEOUTS: Dict[str, float] = {
+    "/recs/top_careers": float(os.getenv("AI_CORE_TIMEOUT_RECS", "5.0")),
+    "/ai/infer_user_traits": float(os.getenv("AI_CORE_TIMEOUT_TRAITS", "60.0")),
+}
+DEFAULT_TIMEOUT = float(os.getenv("AI_CORE_TIMEOUT_DEFAULT", "10.0"))
+
+RETRY_STATUS = {502, 503}
+# lỗi xảy ra trước khi request tới được AI-core → retry an toàn với mọi endpoint
+RETRY_TRANSPORT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# endpoint idempotent: được retry cả khi ReadTimeout / đứt kết nối sau khi đã gửi request
+RETRY_READ_ENDPOINTS = {"/recs/top_careers"}
+
+
+class AICoreError(Exception):
+    """Lỗi khi gọi AI-core (HTTP != 2xx, mạng, JSON hỏng)."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class AICoreUnavailable(AICoreError):
+    """Mạch đang mở hoặc hết lượt retry vì lỗi mạng / 5xx."""
+
+
+class CircuitBreaker:
+    """
+    closed → (failure_threshold lỗi liên tiếp) → open → (sau reset_sec) → half-open:
+    cho 1 call thử; thành công thì đóng mạch, lỗi thì mở lại.
+    """
+
+    def __init__(self, failure_threshold: int, reset_sec: float) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_sec = reset_sec
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_sec:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_sec:
+                return False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Call thử kết thúc mà không rõ kết quả (bị hủy, lỗi lạ) → trả slot half-open."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+def _backoff(attempt: int) -> float:
+    # full jitter: U(0, min(max, base * 2^attempt))
+    return random.uniform(0, min(AI_CORE_BACKOFF_MAX_SEC, AI_CORE_BACKOFF_SEC * (2 ** attempt)))
+
+
+def _timeout_for(path: str, timeout: Optional[float]) -> httpx.Timeout:
+    read = timeout if timeout is not None else ENDPOINT_TIMEOUTS.get(path, DEFAULT_TIMEOUT)
+    return httpx.Timeout(read, connect=AI_CORE_CONNECT_TIMEOUT, pool=AI_CORE_POOL_TIMEOUT)
+
+
+def _retry_read(path: str, retry_read: Optional[bool]) -> bool:
+    return retry_read if retry_read is not None else path in RETRY_READ_ENDPOINTS
+
+
+def _parse(resp: httpx.Response, path: str) -> Any:
+    if resp.status_code >= 400:
+        raise AICoreError(
+            f"AI-core {path} returned {resp.status_code}: {resp.text[:500]}",
+            status_code=resp.status_code,
+        )
+    try:
+        return resp.json()
+    except ValueError as e:
+        raise AICoreError(f"AI-core {path} returned invalid JSON: {e}", status_code=resp.status_code)
+
+
+class AICoreClient:
+    def __init__(self, base_url: str = AI_CORE_BASE_URL) -> None:
+        self.base_url = base_url
+        self.breaker = CircuitBreaker(AI_CORE_CB_FAILURES, AI_CORE_CB_RESET_SEC)
+        self._limits = httpx.Limits(
+            max_connections=AI_CORE_MAX_CONNECTIONS,
+            max_keepalive_connections=AI_CORE_MAX_KEEPALIVE,
+        )
+        self._client: Optional[httpx.Client] = None
+        self._aclient: Optional[httpx.AsyncClient] = None
+        self._lock = threading.Lock()
+
+    # ---- pooled clients (lazy) ----
+
+    def _sync_client(self) -> httpx.Client:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = httpx.Client(
+                        base_url=self.base_url,
+                        limits=self._limits,
+                        timeout=DEFAULT_TIMEOUT,
+                    )
+        return self._client
+
+    def _async_client(self) -> httpx.AsyncClient:
+        if self._aclient is None:
+            self._aclient = httpx.AsyncClient(
+                base_url=self.base_url,
+                limits=self._limits,
+                timeout=DEFAULT_TIMEOUT,
+            )
+        return self._aclient
+
+    # ---- sync ----
+
+    def post_json(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        timeout: Optional[float] = None,
+        retry_read: Optional[bool] = None,
+    ) -> Any:
+        return self._request_sync("POST", path, json=payload, timeout=timeout, retry_read=retry_read)
+
+    def get_json(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        retry_read: Optional[bool] = None,
+    ) -> Any:
+        return self._request_sync("GET", path, params=params, timeout=timeout, retry_read=retry_read)
+
+    def _request_sync(
+        self,
+        method: str,
+        path: str,
+        timeout: Optional[float] = None,
+        retry_read: Optional[bool] = None,
+        **kwargs,
+    ) -> Any:
+        retry_read = _retry_read(path, retry_read)
+        last_error: Optional[Exception] = None
+        for attempt in range(AI_CORE_RETRIES + 1):
+            if not self.breaker.allow():
+                raise AICoreUnavailable(f"AI-core circuit open ({path})")
+            try:
+                resp = self._sync_client().request(method, path, timeout=_timeout_for(path, timeout), **kwargs)
+            except RETRY_TRANSPORT_ERRORS as e:
+                last_error = e
+            except httpx.TransportError as e:
+                last_error = e
+                if not retry_read:
+                    self.breaker.record_failure()
+                    raise AICoreUnavailable(f"AI-core {path} failed: {e!r}") from e
+            except BaseException:
+                # CancelledError (client ngắt / timeout ngoài), DecodingError...
+                self.breaker.release_trial()
+                raise
+            else:
+                if resp.status_code not in RETRY_STATUS:
+                    self.breaker.record_success()
+                    return _parse(resp, path)
+                last_error = AICoreError(f"AI-core {path} returned {resp.status_code}", resp.status_code)
+
+            self.breaker.record_failure()
+            if attempt < AI_CORE_RETRIES:
+                time.sleep(_backoff(attempt))
+
+        raise AICoreUnavailable(f"AI-core {path} failed after {AI_CORE_RETRIES + 1} attempt(s): {last_error!r}")
+
+    # ---- async ----
+
+    async def apost_json(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        timeout: Optional[float] = None,
+        retry_read: Optional[bool] = None,
+    ) -> Any:
+        return await self._request_async("POST", path, json=payload, timeout=timeout, retry_read=retry_read)
+
+    async def aget_json(
+        self,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        retry_read: Optional[bool] = None,
+    ) -> Any:
+        return await self._request_async("GET", path, params=params, timeout=timeout, retry_read=retry_read)
+
+    async def _request_async(
+        self,
+        method: str,
+        path: str,
+        timeout: Optional[float] = None,
+        retry_read: Optional[bool] = None,
+        **kwargs,
+    ) -> Any:
+        retry_read = _retry_read(path, retry_read)
+        last_error: Optional[Exception] = None
+        for attempt in range(AI_CORE_RETRIES + 1):
+            if not self.breaker.allow():
+                raise AICoreUnavailable(f"AI-core circuit open ({path})")
+            try:
+                resp = await self._async_client().request(
+                    method, path, timeout=_timeout_for(path, timeout), **kwargs
+                )
+            except RETRY_TRANSPORT_ERRORS as e:
+                last_error = e
+            except httpx.TransportError as e:
+                last_error = e
+                if not retry_read:
+                    self.breaker.record_failure()
+                    raise AICoreUnavailable(f"AI-core {path} failed: {e!r}") from e
+            except BaseException:
+                # CancelledError (client ngắt / timeout ngoài), DecodingError...
+                self.breaker.release_trial()
+                raise
+            else:
+                if resp.status_code not in RETRY_STATUS:
+                    self.breaker.record_success()
+                    return _parse(resp, path)
+                last_error = AICoreError(f"AI-core {path} returned {resp.status_code}", resp.status_code)
+
+            self.breaker.record_failure()
+            if attempt < AI_CORE_RETRIES:
+                await asyncio.sleep(_backoff(attempt))
+
+        raise AICoreUnavailable(f"AI-core {path} failed after {AI_CORE_RETRIES + 1} attempt(s): {last_error!r}")
+
+    # ---- lifecycle ----
+
+    def close(self) -> None:
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+
+    async def aclose(self) -> None:
+        if self._aclient is not None:
+            await self._aclient.aclose()
+            self._aclient = None
+        self.close()
+
+
+ai_core = AICoreClient()
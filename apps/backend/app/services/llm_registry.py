@@ -0,0 +1,196 @@
+# apps/backend/app/services/llm_registry.py
+"""
+Registry LLM (Gemini) dùng chung trong process.
+
+- Lazy: genai.configure + GenerativeModel chỉ tạo khi có call đầu tiên, 1 lần / process.
+  Không gọi generate_content "Test" để dò model lúc khởi tạo.
+- Chọn model theo thứ tự ưu tiên; model lỗi khi gọi thật bị đánh dấu unhealthy trong
+  LLM_HEALTH_TTL_SEC giây và bị xếp cuối cho tới khi hết hạn → failover dựa trên lỗi thật.
+- status() trả trạng thái health đã cache (cho /health, check_quota_status), không gọi API.
+
+    from app.services.llm_registry import get_llm_registry
+
+    llm = get_llm_registry("chatbot", ["gemini-2.0-flash", "models/gemma-3-4b-it"])
+    text = llm.generate_text(prompt, generation_config=cfg)
+    for text in llm.stream_text(prompt, generation_config=cfg): ...
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LLM_HEALTH_TTL_SEC = float(os.getenv("LLM_HEALTH_TTL_SEC", "60"))
+
+
+class LLMNotConfigured(RuntimeError):
+    """Thiếu GEMINI_API_KEY hoặc chưa cài google-generativeai."""
+
+
+def _is_quota_error(error: str) -> bool:
+    return "429" in error or "quota" in error.lower()
+
+
+class LLMRegistry:
+    def __init__(self, candidates: Sequence[str], health_ttl_sec: float = LLM_HEALTH_TTL_SEC) -> None:
+        # bỏ trùng, giữ thứ tự ưu tiên
+        self.candidates: List[str] = list(dict.fromkeys(c for c in candidates if c))
+        self.health_ttl_sec = health_ttl_sec
+        self._models: Dict[str, Any] = {}
+        # model_name -> (unhealthy_until, last_error)
+        self._health: Dict[str, Tuple[float, str]] = {}
+        self._last_ok: Optional[str] = None
+        self._lock = threading.Lock()
+
+    # ---- lazy client ----
+
+    def _model(self, name: str):
+        model = self._models.get(name)
+        if model is None:
+            genai = _configure_genai()
+            with self._lock:
+                model = self._models.get(name)
+                if model is None:
+                    model = genai.GenerativeModel(name)
+                    self._models[name] = model
+        return model
+
+    # ---- health ----
+
+    def ordered_candidates(self) -> List[str]:
+        """Model healthy trước (model OK gần nhất lên đầu), model đang unhealthy xếp cuối."""
+        now = time.monotonic()
+        with self._lock:
+            healthy = [c for c in self.candidates if self._health.get(c, (0.0, ""))[0] <= now]
+            unhealthy = [c for c in self.candidates if c not in healthy]
+            if self._last_ok in healthy:
+                healthy.remove(self._last_ok)
+                healthy.insert(0, self._last_ok)
+        return healthy + unhealthy
+
+    def mark_ok(self, name: str) -> None:
+        with self._lock:
+            self._health.pop(name, None)
+            self._last_ok = name
+
+    def mark_failed(self, name: str, error: Exception) -> None:
+        logger.warning(f"LLM model {name} failed: {error}")
+        with self._lock:
+            self._health[name] = (time.monotonic() + self.health_ttl_sec, str(error))
+            if self._last_ok == name:
+                self._last_ok = None
+
+    def status(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            unhealthy = {
+                name: {"retry_in_sec": round(until - now, 1), "error": err[:300]}
+                for name, (until, err) in self._health.items()
+                if until > now
+            }
+            active = self._last_ok
+        if len(unhealthy) == len(self.candidates) and self.candidates:
+            quota = all(_is_quota_error(v["error"]) for v in unhealthy.values())
+            state = "quota_exceeded" if quota else "error"
+        else:
+            state = "available"
+        return {"status": state, "active_model": active, "candidates": self.candidates, "unhealthy": unhealthy}
+
+    # ---- calls ----
+
+    def generate_content(
+        self,
+        prompt: str,
+        extract: Optional[Callable[[Any], Any]] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        extract(response) chạy trong lượt thử của từng model: raise (vd. response.text khi
+        candidate bị safety filter chặn / rỗng) → model bị đánh dấu lỗi và failover như lỗi API.
+        """
+        last_error: Optional[Exception] = None
+        for name in self.ordered_candidates():
+            try:
+                response = self._model(name).generate_content(prompt, **kwargs)
+                result = extract(response) if extract is not None else response
+            except LLMNotConfigured:
+                raise
+            except Exception as e:
+                self.mark_failed(name, e)
+                last_error = e
+                continue
+            self.mark_ok(name)
+            return result
+        raise last_error or RuntimeError("No LLM model configured")
+
+    def generate_text(self, prompt: str, **kwargs) -> str:
+        """generate_content rồi đọc response.text (không có text → failover sang model khác)."""
+        return self.generate_content(prompt, extract=lambda response: response.text, **kwargs)
+
+    def stream_text(self, prompt: str, **kwargs) -> Iterator[str]:
+        """
+        generate_content(stream=True); failover sang model khác chỉ khi chưa gửi chunk nào.
+        """
+        last_error: Optional[Exception] = None
+        for name in self.ordered_candidates():
+            produced = False
+            try:
+                for chunk in self._model(name).generate_content(prompt, stream=True, **kwargs):
+                    try:
+                        text = chunk.text
+                    except Exception:
+                        # chunk không có text (vd. bị safety filter chặn)
+                        continue
+                    if text:
+                        produced = True
+                        yield text
+            except LLMNotConfigured:
+                raise
+            except Exception as e:
+                self.mark_failed(name, e)
+                if produced:
+                    raise
+                last_error = e
+                continue
+            self.mark_ok(name)
+            return
+        raise last_error or RuntimeError("No LLM model configured")
+
+
+_genai = None
+_genai_lock = threading.Lock()
+_registries: Dict[str, LLMRegistry] = {}
+
+
+def _configure_genai():
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                api_key = os.getenv("GEMINI_API_KEY")
+                if not api_key:
+                    raise LLMNotConfigured("GEMINI_API_KEY not found in environment variables")
+                try:
+                    import google.generativeai as genai
+                except ImportError as e:
+                    raise LLMNotConfigured(f"google-generativeai not installed: {e}")
+                genai.configure(api_key=api_key)
+                _genai = genai
+    return _genai
+
+
+def get_llm_registry(name: str, candidates: Sequence[str]) -> LLMRegistry:
+    """Registry theo tên (vd. 'chatbot', 'goals'), tạo 1 lần / process."""
+    registry = _registries.get(name)
+    if registry is None:
+        with _genai_lock:
+            registry = _registries.get(name)
+            if registry is None:
+                registry = LLMRegistry(candidates)
+                _registries[name] = registry
+    return registry
@@ -0,0 +1,98 @@
+# apps/backend/app/tasks/essay_worker.py
+"""
+Worker chấm essay (hàng đợi ai.essay_scoring_jobs, xem modules/assessments/essay_jobs.py).
+
+Chạy riêng (có thể nhiều process song song):
+
+    python -m app.tasks.essay_worker            # loop mãi
+    python -m app.tasks.essay_worker --once     # xử lý hết job đang chờ rồi thoát
+
+Hoặc chạy như thread trong process API (ESSAY_WORKER_INPROCESS=1, mặc định),
+khi đó kết quả được push qua /ws/notifications.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import threading
+from typing import Any, Callable, Optional
+
+from app.core.db import SessionLocal
+from app.modules.assessments.essay_jobs import EssayJob, process_available_jobs
+
+ESSAY_WORKER_POLL_SEC = float(os.getenv("ESSAY_WORKER_POLL_SEC", "1.0"))
+ESSAY_WORKER_BATCH = int(os.getenv("ESSAY_WORKER_BATCH", "10"))
+
+
+def run_forever(
+    poll_sec: float = ESSAY_WORKER_POLL_SEC,
+    batch: int = ESSAY_WORKER_BATCH,
+    on_finished: Optional[Callable[[EssayJob, str], Any]] = None,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    stop = stop or threading.Event()
+    print(f"[essay_worker] started (poll={poll_sec}s, batch={batch})")
+    while not stop.is_set():
+        try:
+            n = process_available_jobs(SessionLocal, limit=batch, on_finished=on_finished)
+        except Exception as e:
+            # DB chưa sẵn sàng / mất kết nối → thử lại ở vòng sau
+            print("[essay_worker] loop error:", repr(e))
+            n = 0
+        if n == 0:
+            stop.wait(poll_sec)
+    print("[essay_worker] stopped")
+
+
+def ws_notifier(loop: asyncio.AbstractEventLoop) -> Callable[[EssayJob, str], None]:
+    """
+    on_finished cho worker chạy trong process API: đẩy sự kiện tới user qua /ws/notifications.
+    """
+    from app.modules.realtime.ws_notifications import manager
+
+    def _notify(job: EssayJob, status: str) -> None:
+        message = {"type": "essay_scoring", "essayId": job.essay_id, "status": status}
+        asyncio.run_coroutine_threadsafe(manager.send(job.user_id, message), loop)
+
+    return _notify
+
+
+def start_background_worker(loop: asyncio.AbstractEventLoop) -> tuple[threading.Thread, threading.Event]:
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=run_forever,
+        kwargs={"on_finished": ws_notifier(loop), "stop": stop},
+        name="essay-worker",
+        daemon=True,
+    )
+    thread.start()
+    return thread, stop
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Worker chấm essay (ai.essay_scoring_jobs)")
+    ap.add_argument("--once", action="store_true", help="Xử lý hết job đang chờ rồi thoát")
+    ap.add_argument("--poll", type=float, default=ESSAY_WORKER_POLL_SEC, help="Giây chờ khi hàng đợi trống")
+    ap.add_argument("--batch", type=int, default=ESSAY_WORKER_BATCH)
+    args = ap.parse_args()
+
+    if args.once:
+        total = 0
+        while True:
+            n = process_available_jobs(SessionLocal, limit=args.batch)
+            total += n
+            if n == 0:
+                break
+        print(f"[essay_worker] processed {total} job(s)")
+        return
+
+    try:
+        run_forever(poll_sec=args.poll, batch=args.batch)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
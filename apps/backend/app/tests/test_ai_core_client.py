@@ -0,0 +1,49 @@
+import asyncio
+
+import httpx
+import pytest
+from app.services.ai_core_client import AICoreClient, CircuitBreaker
+
+
+class _CancelledClient:
+    async def request(self, *args, **kwargs):
+        raise asyncio.CancelledError()
+
+
+class _OkClient:
+    async def request(self, method, path, **kwargs):
+        return httpx.Response(200, json={"ok": True})
+
+
+def _half_open_client(monkeypatch, aclient):
+    client = AICoreClient(base_url="http://ai-core.test")
+    client.breaker = CircuitBreaker(failure_threshold=1, reset_sec=0)
+    client.breaker.record_failure()
+    monkeypatch.setattr(client, "_async_client", lambda: aclient)
+    return client
+
+
+def test_cancelled_trial_releases_half_open_slot(monkeypatch):
+    client = _half_open_client(monkeypatch, _CancelledClient())
+    assert client.breaker.state == "half-open"
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(client.apost_json("/recs/top_careers", {}))
+
+    # slot thử được trả lại → call kế tiếp vẫn được thử và đóng mạch
+    assert client.breaker.state == "half-open"
+    assert client.breaker._trial_in_flight is False
+
+    monkeypatch.setattr(client, "_async_client", lambda: _OkClient())
+    assert asyncio.run(client.apost_json("/recs/top_careers", {})) == {"ok": True}
+    assert client.breaker.state == "closed"
+
+
+def test_half_open_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_sec=0)
+    breaker.record_failure()
+
+    assert breaker.allow() is True
+    assert breaker.allow() is False
+    breaker.record_failure()
+    assert breaker.allow() is True
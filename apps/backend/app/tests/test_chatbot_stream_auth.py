@@ -0,0 +1,25 @@
+import os
+
+os.environ.setdefault("DATABASE_URL", "postgresql://test@localhost/test")
+
+from app.modules.chatbot import routes  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+
+def test_stream_requires_auth_before_building_service(monkeypatch):
+    built = []
+
+    class _Service:
+        def __init__(self):
+            built.append(self)
+            raise RuntimeError("GEMINI_API_KEY not found")
+
+    monkeypatch.setattr(routes, "GeminiChatbotService", _Service)
+    app = FastAPI()
+    app.include_router(routes.router)
+
+    resp = TestClient(app).post("/api/chatbot/chat/stream", json={"message": "hi"})
+
+    assert resp.status_code == 401
+    assert built == []
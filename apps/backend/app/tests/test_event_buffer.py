@@ -0,0 +1,165 @@
+import os
+from types import SimpleNamespace
+
+# app.core.db đọc DATABASE_URL lúc import (create_engine không kết nối ngay)
+os.environ.setdefault("DATABASE_URL", "postgresql://test@localhost/test")
+
+from app.modules.analytics import event_buffer  # noqa: E402
+from app.modules.analytics.event_buffer import CareerEventBuffer, copy_events  # noqa: E402
+
+
+class FakeSession:
+    def __init__(self, cursor=None):
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+        self.executed = []
+        self._cursor = cursor
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+
+    def execute(self, stmt, params=None):
+        self.executed.append((stmt, params))
+
+    # session.connection().connection.dbapi_connection.cursor()
+    def connection(self):
+        dbapi_conn = SimpleNamespace(cursor=lambda: self._cursor)
+        return SimpleNamespace(connection=SimpleNamespace(dbapi_connection=dbapi_conn))
+
+
+class FakeDBError(Exception):
+    def __init__(self, msg, pgcode=None):
+        super().__init__(msg)
+        self.pgcode = pgcode
+
+
+class RecordingWriter:
+    def __init__(self, fail=None):
+        self.batches = []
+        self.fail = fail
+
+    def __call__(self, session, batch):
+        if self.fail is not None:
+            self.fail(batch)
+        self.batches.append([ev["job_id"] for ev in batch])
+
+
+def _events(*job_ids):
+    return [{"job_id": j, "event_type": "impression"} for j in job_ids]
+
+
+def _buffer(writer, **kwargs):
+    buf = CareerEventBuffer(session_factory=FakeSession, writer=writer, **kwargs)
+    # không chạy thread nền: test gọi flush() trực tiếp
+    buf._stop.set()
+    return buf
+
+
+def test_flush_writes_in_batches_of_batch_size():
+    writer = RecordingWriter()
+    buf = _buffer(writer, batch_size=3)
+    buf.add_many(_events(*"abcdefg"))
+
+    assert buf.flush() == 7
+    assert writer.batches == [list("abc"), list("def"), list("g")]
+    assert buf.pending() == 0
+
+
+def test_full_buffer_drops_oldest_events():
+    writer = RecordingWriter()
+    buf = _buffer(writer, batch_size=10, max_size=3)
+    buf.add_many(_events(*"abcde"))
+
+    assert buf.pending() == 3
+    assert buf.dropped == 2
+    buf.flush()
+    assert writer.batches == [list("cde")]
+
+
+def test_transient_error_requeues_batch_at_head():
+    def down(batch):
+        raise FakeDBError("connection refused")
+
+    writer = RecordingWriter(fail=down)
+    buf = _buffer(writer, batch_size=2)
+    buf.add_many(_events(*"abc"))
+
+    assert buf.flush() == 0
+    assert buf.pending() == 3
+
+    writer.fail = None
+    assert buf.flush() == 3
+    assert writer.batches == [list("ab"), list("c")]
+    assert buf.rejected == 0
+
+
+def test_rejected_event_is_isolated_and_dropped():
+    def reject_bad(batch):
+        if any(ev["job_id"] == "bad" for ev in batch):
+            raise FakeDBError("invalid input syntax", pgcode="22P02")
+
+    writer = RecordingWriter(fail=reject_bad)
+    buf = _buffer(writer, batch_size=10)
+    buf.add_many(_events("a", "b", "bad", "c", "d"))
+
+    assert buf.flush() == 4
+    assert buf.rejected == 1
+    assert buf.pending() == 0
+    assert sorted(j for b in writer.batches for j in b) == ["a", "b", "c", "d"]
+
+
+class CopyCursor:
+    def __init__(self):
+        self.sql = None
+        self.data = None
+        self.closed = False
+
+    def copy_expert(self, sql, buf):
+        self.sql = sql
+        self.data = buf.read()
+
+    def close(self):
+        self.closed = True
+
+
+class PlainCursor:
+    def close(self):
+        pass
+
+
+def test_copy_events_uses_copy_when_driver_supports_it():
+    cur = CopyCursor()
+    session = FakeSession(cursor=cur)
+    copy_events(session, [{"user_id": 1, "job_id": "j1", "event_type": "click", "dwell_ms": 5}])
+
+    assert cur.sql.startswith("COPY analytics.career_events")
+    assert cur.data.strip() == "1,,j1,click,,,neumf,,5"
+    assert cur.closed
+    assert session.executed == []
+
+
+def test_copy_events_falls_back_to_insert_without_copy():
+    session = FakeSession(cursor=PlainCursor())
+    copy_events(session, _events("j1", "j2"))
+
+    assert len(session.executed) == 1
+    _, params = session.executed[0]
+    assert params["job_id"] == ["j1", "j2"]
+    assert params["source"] == ["neumf", "neumf"]
+
+
+def test_copy_events_falls_back_to_insert_when_copy_disabled(monkeypatch):
+    monkeypatch.setattr(event_buffer, "CAREER_EVENT_USE_COPY", False)
+    cur = CopyCursor()
+    session = FakeSession(cursor=cur)
+    copy_events(session, _events("j1"))
+
+    assert cur.sql is None
+    assert len(session.executed) == 1
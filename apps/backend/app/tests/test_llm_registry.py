@@ -0,0 +1,35 @@
+from app.services.llm_registry import LLMRegistry
+
+
+class _Blocked:
+    @property
+    def text(self):
+        raise ValueError("response blocked by safety filter")
+
+
+class _Ok:
+    text = "hello"
+
+
+class _Model:
+    def __init__(self, response):
+        self.response = response
+
+    def generate_content(self, prompt, **kwargs):
+        return self.response
+
+
+def _registry(**models):
+    llm = LLMRegistry(list(models))
+    llm._models = {name: _Model(resp) for name, resp in models.items()}
+    return llm
+
+
+def test_generate_text_fails_over_when_response_has_no_text():
+    llm = _registry(blocked=_Blocked(), ok=_Ok())
+
+    assert llm.generate_text("hi") == "hello"
+    status = llm.status()
+    assert status["active_model"] == "ok"
+    assert "blocked" in status["unhealthy"]
+    assert llm.ordered_candidates() == ["ok", "blocked"]
@@ -8,6 +8,8 @@ from dotenv import load_dotenv
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, Session
 
+from ai_core.utils.vector_codec import register_sqlalchemy
+
 # -------------------------------------------------
 # 1) Nạp .env cho ai-core
 # -------------------------------------------------
@@ -43,6 +45,8 @@ engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,
 )
+# cột vector trả về pgvector.Vector thay vì string "[...]"
+register_sqlalchemy(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
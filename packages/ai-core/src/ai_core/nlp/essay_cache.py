@@ -0,0 +1,341 @@
+# src/ai_core/nlp/essay_cache.py
+"""
+Cache kết quả infer_user_traits theo nội dung essay (content-addressed).
+
+key = sha256(model_version, language, essay đã chuẩn hoá)
+- chuẩn hoá: Unicode NFC + gộp khoảng trắng → essay gửi lại / sửa xuống dòng vẫn trúng cache
+- model_version: ESSAY_MODEL_VERSION (env) hoặc tự tính từ checkpoint + NLP_RUNTIME,
+  đổi model là key đổi theo, không cần xoá cache
+
+2 tầng:
+1) LRU trong process (ESSAY_CACHE_SIZE phần tử)
+2) Tuỳ chọn Postgres ai.essay_inference_cache (ESSAY_CACHE_PG=1), dùng chung giữa các worker
+   và sống qua restart. Lỗi DB chỉ log [WARN], không chặn inference.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+from ai_core.utils.vector_codec import to_numpy, to_param
+from api.config import ESSAY_CACHE_PG, ESSAY_CACHE_SIZE, ESSAY_MODEL_VERSION
+
+from .essay_infer import (
+    PHOBERT_BIG5_DIR,
+    PHOBERT_RIASEC_DIR,
+    SBERT_USER_DIR,
+    TraitResult,
+)
+from .runtime import NLP_RUNTIME
+
+CACHE_TABLE = "ai.essay_inference_cache"
+
+
+@dataclass(frozen=True)
+class CachedTraits:
+    language_detected: str
+    essay_used: str
+    riasec: np.ndarray
+    big5: np.ndarray
+    embedding: np.ndarray
+
+    @classmethod
+    def from_result(cls, r: TraitResult) -> "CachedTraits":
+        return cls(r.language_detected, r.essay_used, r.riasec, r.big5, r.embedding)
+
+    def to_result(self, essay_original: str) -> TraitResult:
+        return TraitResult(
+            language_detected=self.language_detected,
+            language_used="vi",
+            essay_original=essay_original,
+            essay_used=self.essay_used,
+            riasec=self.riasec,
+            big5=self.big5,
+            embedding=self.embedding,
+        )
+
+
+# ------------------------
+# Key
+# ------------------------
+
+def normalize_essay(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def _fingerprint_dir(model_dir: Path) -> str:
+    parts = [model_dir.name]
+    tok = model_dir / "tokenizer_name.txt"
+    if tok.exists():
+        parts.append(tok.read_text(encoding="utf-8").strip())
+    ckpt = model_dir / "best.pt"
+    if ckpt.exists():
+        st = ckpt.stat()
+        parts.append(f"{st.st_size}:{st.st_mtime_ns}")
+    return "|".join(parts)
+
+
+_model_version: Optional[str] = None
+
+
+def model_version() -> str:
+    global _model_version
+    if _model_version is None:
+        if ESSAY_MODEL_VERSION:
+            _model_version = ESSAY_MODEL_VERSION
+        else:
+            raw = ";".join(
+                [NLP_RUNTIME] + [_fingerprint_dir(d) for d in (PHOBERT_RIASEC_DIR, PHOBERT_BIG5_DIR, SBERT_USER_DIR)]
+            )
+            _model_version = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+    return _model_version
+
+
+def cache_key(essay_text: str, language: Optional[str]) -> str:
+    raw = "\x00".join([model_version(), language or "auto", normalize_essay(essay_text)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ------------------------
+# Tầng 1: LRU
+# ------------------------
+
+class LRUCache:
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = max(0, int(maxsize))
+        self._data: "OrderedDict[str, CachedTraits]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[CachedTraits]:
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: CachedTraits) -> None:
+        if self.maxsize == 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# ------------------------
+# Tầng 2: Postgres
+# ------------------------
+
+class PgEssayCache:
+    """
+    ai.essay_inference_cache – bảng tự tạo (CREATE TABLE IF NOT EXISTS) ở lần dùng đầu.
+    """
+
+    def __init__(self, table: str = CACHE_TABLE) -> None:
+        self.table = table
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        from ai_core.utils.pg_pool import get_pool
+
+        return get_pool()
+
+    def _ensure_table(self) -> None:
+        if self._ready:
+            return
+        with self._lock:
+            if self._ready:
+                return
+            with self._pool().connection() as conn:
+                conn.execute(
+                    f"""
+                    CREATE TABLE IF NOT EXISTS {self.table} (
+                        cache_key         TEXT PRIMARY KEY,
+                        model_version     TEXT NOT NULL,
+                        language_detected TEXT NOT NULL,
+                        essay_used        TEXT NOT NULL,
+                        riasec            REAL[] NOT NULL,
+                        big5              REAL[] NOT NULL,
+                        embedding         vector(768) NOT NULL,
+                        created_at        TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                    )
+                    """
+                )
+            self._ready = True
+
+    def get(self, key: str) -> Optional[CachedTraits]:
+        self._ensure_table()
+        with self._pool().connection() as conn, conn.cursor(binary=True) as cur:
+            cur.execute(
+                f"""
+                SELECT language_detected, essay_used, riasec, big5, embedding
+                FROM {self.table}
+                WHERE cache_key = %s
+                """,
+                (key,),
+            )
+            row = cur.fetchone()
+        if not row:
+            return None
+
+        return CachedTraits(
+            language_detected=row[0],
+            essay_used=row[1],
+            riasec=np.asarray(row[2], dtype="float32"),
+            big5=np.asarray(row[3], dtype="float32"),
+            embedding=to_numpy(row[4]),
+        )
+
+    def put(self, key: str, value: CachedTraits) -> None:
+        self._ensure_table()
+        with self._pool().connection() as conn, conn.cursor(binary=True) as cur:
+            cur.execute(
+                f"""
+                INSERT INTO {self.table}
+                    (cache_key, model_version, language_detected, essay_used, riasec, big5, embedding)
+                VALUES (%s, %s, %s, %s, %s::real[], %s::real[], %b::vector(768))
+                ON CONFLICT (cache_key) DO NOTHING
+                """,
+                (
+                    key,
+                    model_version(),
+                    value.language_detected,
+                    value.essay_used,
+                    [float(x) for x in value.riasec],
+                    [float(x) for x in value.big5],
+                    to_param(value.embedding),
+                ),
+            )
+
+
+# ------------------------
+# Cache 2 tầng
+# ------------------------
+
+class EssayInferenceCache:
+    def __init__(self, maxsize: int = ESSAY_CACHE_SIZE, persistent: Optional[PgEssayCache] = None) -> None:
+        self.lru = LRUCache(maxsize)
+        self.persistent = persistent
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[CachedTraits]:
+        value = self.lru.get(key)
+        if value is None and self.persistent is not None:
+            try:
+                value = self.persistent.get(key)
+            except Exception as e:
+                print("[WARN][essay_cache] pg get failed:", repr(e))
+            if value is not None:
+                self.lru.put(key, value)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: CachedTraits) -> None:
+        self.lru.put(key, value)
+        if self.persistent is not None:
+            try:
+                self.persistent.put(key, value)
+            except Exception as e:
+                print("[WARN][essay_cache] pg put failed:", repr(e))
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.lru),
+            "maxsize": self.lru.maxsize,
+            "persistent": self.persistent is not None,
+            "hits": self.hits,
+            "misses": self.misses,
+            "model_version": model_version(),
+        }
+
+    # ---- wrappers quanh essay_infer ----
+
+    def infer(
+        self,
+        essay_text: str,
+        language: Optional[str],
+        infer_fn: Callable[..., TraitResult],
+        **kwargs,
+    ) -> TraitResult:
+        """
+        infer_fn(essay_text, language=..., **kwargs) chỉ chạy khi cache miss.
+        """
+        key = cache_key(essay_text, language)
+        cached = self.get(key)
+        if cached is not None:
+            return cached.to_result((essay_text or "").strip())
+
+        result = infer_fn(essay_text, language=language, **kwargs)
+        self.put(key, CachedTraits.from_result(result))
+        return result
+
+    def infer_many(
+        self,
+        essay_texts: Sequence[str],
+        language: Optional[str],
+        infer_many_fn: Callable[..., List[TraitResult]],
+        **kwargs,
+    ) -> List[TraitResult]:
+        """
+        Bản batch: chỉ các essay miss (đã bỏ trùng) được đưa vào infer_many_fn, giữ thứ tự input.
+        """
+        keys = [cache_key(t, language) for t in essay_texts]
+        results: List[Optional[TraitResult]] = [None] * len(keys)
+
+        miss: "OrderedDict[str, List[int]]" = OrderedDict()
+        for i, (text, key) in enumerate(zip(essay_texts, keys, strict=True)):
+            cached = self.get(key)
+            if cached is not None:
+                results[i] = cached.to_result((text or "").strip())
+            else:
+                miss.setdefault(key, []).append(i)
+
+        if miss:
+            first = [idx[0] for idx in miss.values()]
+            fresh = infer_many_fn([essay_texts[i] for i in first], language=language, **kwargs)
+            for (key, idx), r in zip(miss.items(), fresh, strict=True):
+                cached = CachedTraits.from_result(r)
+                self.put(key, cached)
+                for i in idx:
+                    results[i] = r if i == idx[0] else cached.to_result((essay_texts[i] or "").strip())
+
+        return results  # type: ignore[return-value]
+
+
+_cache: Optional[EssayInferenceCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_essay_cache() -> EssayInferenceCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EssayInferenceCache(
+                    ESSAY_CACHE_SIZE,
+                    persistent=PgEssayCache() if ESSAY_CACHE_PG else None,
+                )
+                print(f"[BOOT][essay_cache] size={ESSAY_CACHE_SIZE} pg={ESSAY_CACHE_PG}")
+    return _cache
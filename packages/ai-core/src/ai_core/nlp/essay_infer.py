@@ -3,12 +3,22 @@ from __future__ import annotations
 
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Optional, Literal
+from typing import Callable, List, Optional, Literal, Sequence, Tuple
 
 import numpy as np
 import torch
 from transformers import AutoTokenizer, AutoModel
 
+from .runtime import (
+    NLP_RUNTIME,
+    OnnxRegressor,
+    OnnxSession,
+    apply_torch_runtime,
+    is_onnx,
+    load_encoder,
+    onnx_path,
+)
+
 try:
     # dùng nếu anh cài deep_translator (ổn định hơn googletrans)
     import importlib
@@ -63,19 +73,16 @@ class PhoBERTRegressor(torch.nn.Module):
         return logits
 
 
-def _load_phobert_model(model_dir: Path, num_labels: int):
-    """
-    Loader chịu được các kiểu checkpoint:
+def _read_tokenizer_name(model_dir: Path) -> str:
+    return (model_dir / "tokenizer_name.txt").read_text(encoding="utf-8").strip()
 
-    torch.save({"model_state": model.state_dict(), "cfg": cfg}, "best.pt")
 
-    - Đọc tokenizer_name.txt → backbone_name
-    - Khởi tạo PhoBERTRegressor
-    - Nếu checkpoint bọc trong 'model_state' thì bóc ra
-    - load_state_dict(strict=False) cho an toàn
+def _read_phobert_checkpoint(model_dir: Path):
     """
-    tok_name = (model_dir / "tokenizer_name.txt").read_text(encoding="utf-8").strip()
-    tokenizer = AutoTokenizer.from_pretrained(tok_name)
+    Đọc tokenizer_name.txt + best.pt, trả về (backbone_name, state_dict).
+    Checkpoint dạng {"model_state": ..., "cfg": ...} thì bóc 'model_state' ra.
+    """
+    tok_name = _read_tokenizer_name(model_dir)
 
     ckpt_path = model_dir / "best.pt"
     if not ckpt_path.exists():
@@ -84,10 +91,10 @@ def _load_phobert_model(model_dir: Path, num_labels: int):
     state = torch.load(ckpt_path, map_location="cpu")
     if isinstance(state, dict) and "model_state" in state:
         state = state["model_state"]
+    return tok_name, state
 
-    model = PhoBERTRegressor(tok_name, num_labels=num_labels)
-    load_res = model.load_state_dict(state, strict=False)
 
+def _log_load_result(ckpt_path, load_res) -> None:
     # log missing / unexpected để debug
     try:
         missing = getattr(load_res, "missing_keys", [])
@@ -102,21 +109,153 @@ def _load_phobert_model(model_dir: Path, num_labels: int):
     except Exception:
         pass
 
+
+def _build_phobert_model(tok_name: str, state: dict, num_labels: int, ckpt_path) -> PhoBERTRegressor:
+    model = PhoBERTRegressor(tok_name, num_labels=num_labels)
+    _log_load_result(ckpt_path, model.load_state_dict(state, strict=False))
     model.to(DEVICE)
     model.eval()
+    return model
+
+
+def _load_phobert_model(model_dir: Path, num_labels: int):
+    """
+    Loader chịu được các kiểu checkpoint:
+
+    torch.save({"model_state": model.state_dict(), "cfg": cfg}, "best.pt")
+
+    - Đọc tokenizer_name.txt → backbone_name
+    - Khởi tạo PhoBERTRegressor
+    - Nếu checkpoint bọc trong 'model_state' thì bóc ra
+    - load_state_dict(strict=False) cho an toàn
+    """
+    tok_name, state = _read_phobert_checkpoint(model_dir)
+    tokenizer = AutoTokenizer.from_pretrained(tok_name)
+    model = _build_phobert_model(tok_name, state, num_labels, model_dir / "best.pt")
     return tokenizer, model
 
 
+# ------------------------
+# 2b) Shared backbone: 1 lần PhoBERT forward cho cả RIASEC + Big5
+# ------------------------
+
+class PhoBERTMultiHead(torch.nn.Module):
+    """
+    1 backbone PhoBERT + nhiều head hồi quy (vd. riasec: 6, big5: 5).
+    Dùng khi 2 checkpoint có backbone giống hệt nhau (vd. train với freeze_base).
+    """
+    def __init__(self, backbone_name: str, heads: dict[str, int]):
+        super().__init__()
+        self.backbone = AutoModel.from_pretrained(backbone_name)
+        hidden_size = self.backbone.config.hidden_size
+        self.heads = torch.nn.ModuleDict(
+            {name: torch.nn.Linear(hidden_size, n) for name, n in heads.items()}
+        )
+
+    def forward(self, input_ids, attention_mask) -> dict[str, torch.Tensor]:
+        outputs = self.backbone(input_ids=input_ids, attention_mask=attention_mask)
+        cls = outputs.last_hidden_state[:, 0, :]
+        return {name: head(cls) for name, head in self.heads.items()}
+
+
+class _HeadView(torch.nn.Module):
+    """
+    Bọc PhoBERTMultiHead để dùng như PhoBERTRegressor của 1 head
+    (giữ tương thích với _get_riasec_model / _get_big5_model).
+    """
+    def __init__(self, multi: PhoBERTMultiHead, name: str):
+        super().__init__()
+        self.multi = multi
+        self.name = name
+
+    def forward(self, input_ids, attention_mask):
+        return self.multi(input_ids, attention_mask)[self.name]
+
+
+def _backbone_state(state: dict) -> dict:
+    return {k: v for k, v in state.items() if k.startswith("backbone.")}
+
+
+def _same_backbone(state_a: dict, state_b: dict) -> bool:
+    a, b = _backbone_state(state_a), _backbone_state(state_b)
+    if not a or a.keys() != b.keys():
+        return False
+    return all(torch.equal(a[k], b[k]) for k in a)
+
+
+def _load_trait_models_onnx(runtime: str) -> dict:
+    """
+    RIASEC + Big5 từ artifact ONNX (export_runtime.py), mỗi model 1 session riêng.
+    """
+    r_tok = _read_tokenizer_name(PHOBERT_RIASEC_DIR)
+    b_tok = _read_tokenizer_name(PHOBERT_BIG5_DIR)
+    r_tokenizer = AutoTokenizer.from_pretrained(r_tok)
+    b_tokenizer = r_tokenizer if b_tok == r_tok else AutoTokenizer.from_pretrained(b_tok)
+    print(f"[PHOBERT] RIASEC + Big5 served by onnxruntime ({runtime})")
+    return {
+        "shared": None,
+        "riasec": (r_tokenizer, OnnxRegressor(OnnxSession(onnx_path(PHOBERT_RIASEC_DIR, runtime)))),
+        "big5": (b_tokenizer, OnnxRegressor(OnnxSession(onnx_path(PHOBERT_BIG5_DIR, runtime)))),
+    }
+
+
+def _load_trait_models(runtime: Optional[str] = None) -> dict:
+    """
+    Load RIASEC + Big5 cùng lúc:
+    - cùng tokenizer + backbone weights giống hệt → PhoBERTMultiHead (1 backbone trong RAM)
+    - khác nhau → 2 PhoBERTRegressor riêng như trước
+    - runtime (mặc định NLP_RUNTIME): "int8" quantize model sau khi load,
+      "onnx"/"onnx-int8" đọc artifact ONNX thay vì best.pt
+    """
+    runtime = runtime or NLP_RUNTIME
+    if is_onnx(runtime):
+        return _load_trait_models_onnx(runtime)
+
+    r_tok, r_state = _read_phobert_checkpoint(PHOBERT_RIASEC_DIR)
+    b_tok, b_state = _read_phobert_checkpoint(PHOBERT_BIG5_DIR)
+
+    if r_tok == b_tok and _same_backbone(r_state, b_state):
+        tokenizer = AutoTokenizer.from_pretrained(r_tok)
+        multi = PhoBERTMultiHead(r_tok, {"riasec": 6, "big5": 5})
+
+        state = _backbone_state(r_state)
+        for name, src in (("riasec", r_state), ("big5", b_state)):
+            for k, v in src.items():
+                if k.startswith("head."):
+                    state[f"heads.{name}.{k[len('head.'):]}"] = v
+
+        _log_load_result(PHOBERT_RIASEC_DIR / "best.pt", multi.load_state_dict(state, strict=False))
+        multi.to(DEVICE)
+        multi.eval()
+        multi = apply_torch_runtime(multi, DEVICE, runtime)
+        print("[PHOBERT] RIASEC + Big5 share one backbone (multi-head)")
+        return {
+            "shared": (tokenizer, multi),
+            "riasec": (tokenizer, _HeadView(multi, "riasec")),
+            "big5": (tokenizer, _HeadView(multi, "big5")),
+        }
+
+    r_model = apply_torch_runtime(
+        _build_phobert_model(r_tok, r_state, 6, PHOBERT_RIASEC_DIR / "best.pt"), DEVICE, runtime
+    )
+    b_model = apply_torch_runtime(
+        _build_phobert_model(b_tok, b_state, 5, PHOBERT_BIG5_DIR / "best.pt"), DEVICE, runtime
+    )
+    r_tokenizer = AutoTokenizer.from_pretrained(r_tok)
+    b_tokenizer = r_tokenizer if b_tok == r_tok else AutoTokenizer.from_pretrained(b_tok)
+    return {
+        "shared": None,
+        "riasec": (r_tokenizer, r_model),
+        "big5": (b_tokenizer, b_model),
+    }
+
+
 # ------------------------
 # 3) SBERT 768D cho user embedding
 # ------------------------
 
-def _load_sbert_embedder(model_dir: Path):
-    tok_name = (model_dir / "tokenizer_name.txt").read_text(encoding="utf-8").strip()
-    tokenizer = AutoTokenizer.from_pretrained(tok_name)
-    mdl = AutoModel.from_pretrained(tok_name).to(DEVICE)
-    mdl.eval()
-    return tokenizer, mdl
+def _load_sbert_embedder(model_dir: Path, runtime: Optional[str] = None):
+    return load_encoder(_read_tokenizer_name(model_dir), model_dir, DEVICE, runtime)
 
 
 def _mean_pool(last_hidden_state, attention_mask):
@@ -168,23 +307,23 @@ def translate_to_vi(text: str, src_lang: str) -> str:
 # 5) Singleton loaders
 # ------------------------
 
-_phobert_riasec = None
-_phobert_big5 = None
+_trait_models = None
 _sbert_user = None
 
 
+def _get_trait_models() -> dict:
+    global _trait_models
+    if _trait_models is None:
+        _trait_models = _load_trait_models()
+    return _trait_models
+
+
 def _get_riasec_model():
-    global _phobert_riasec
-    if _phobert_riasec is None:
-        _phobert_riasec = _load_phobert_model(PHOBERT_RIASEC_DIR, num_labels=6)
-    return _phobert_riasec
+    return _get_trait_models()["riasec"]
 
 
 def _get_big5_model():
-    global _phobert_big5
-    if _phobert_big5 is None:
-        _phobert_big5 = _load_phobert_model(PHOBERT_BIG5_DIR, num_labels=5)
-    return _phobert_big5
+    return _get_trait_models()["big5"]
 
 
 def _get_sbert_user():
@@ -195,81 +334,211 @@ def _get_sbert_user():
 
 
 # ------------------------
-# 6) Predict từ tiếng Việt
+# 6) Predict từ tiếng Việt (batch, dynamic padding)
 # ------------------------
 
-@torch.no_grad()
-def predict_riasec_vi(text_vi: str) -> np.ndarray:
-    tok, mdl = _get_riasec_model()
-    enc = tok(
-        text_vi,
+MAX_LENGTH = 256
+BATCH_SIZE = 16
+
+
+def _iter_batches(texts: List[str], batch_size: int):
+    """
+    Chia texts thành các batch, sort theo độ dài để batch ít padding hơn.
+    Yield (indices gốc, texts của batch).
+    """
+    order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+    for start in range(0, len(order), batch_size):
+        idx = order[start:start + batch_size]
+        yield idx, [texts[i] for i in idx]
+
+
+def _tokenize(tok, texts: List[str]):
+    # padding=True: chỉ pad tới câu dài nhất trong batch (không pad cứng 256)
+    return tok(
+        texts,
         return_tensors="pt",
         truncation=True,
-        max_length=256,
-        padding="max_length",
+        max_length=MAX_LENGTH,
+        padding=True,
     ).to(DEVICE)
-    logits = mdl(enc["input_ids"], enc["attention_mask"])
-    preds = torch.sigmoid(logits)  # giả định train trên [0,1]
-    return preds[0].detach().cpu().numpy()
 
 
 @torch.no_grad()
-def predict_big5_vi(text_vi: str) -> np.ndarray:
-    tok, mdl = _get_big5_model()
-    enc = tok(
-        text_vi,
-        return_tensors="pt",
-        truncation=True,
-        max_length=256,
-        padding="max_length",
-    ).to(DEVICE)
-    logits = mdl(enc["input_ids"], enc["attention_mask"])
-    preds = torch.sigmoid(logits)
-    return preds[0].detach().cpu().numpy()
+def _predict_phobert_many(get_model, texts: List[str], num_labels: int, batch_size: int) -> np.ndarray:
+    tok, mdl = get_model()
+    out = np.zeros((len(texts), num_labels), dtype="float32")
+    for idx, chunk in _iter_batches(texts, batch_size):
+        enc = _tokenize(tok, chunk)
+        logits = mdl(enc["input_ids"], enc["attention_mask"])
+        out[idx] = torch.sigmoid(logits).detach().cpu().numpy()  # giả định train trên [0,1]
+    return out
 
 
 @torch.no_grad()
+def predict_traits_vi_many(
+    texts_vi: List[str],
+    batch_size: int = BATCH_SIZE,
+    models: Optional[dict] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    [N] texts -> (riasec [N, 6], big5 [N, 5]).
+    Backbone dùng chung → 1 lần PhoBERT forward cho cả 2 head; ngược lại chạy 2 model.
+    models: kết quả _load_trait_models() (mặc định singleton), dùng cho parity check.
+    """
+    models = models or _get_trait_models()
+    shared = models["shared"]
+    if shared is None:
+        return (
+            _predict_phobert_many(lambda: models["riasec"], texts_vi, 6, batch_size),
+            _predict_phobert_many(lambda: models["big5"], texts_vi, 5, batch_size),
+        )
+
+    tok, mdl = shared
+    riasec = np.zeros((len(texts_vi), 6), dtype="float32")
+    big5 = np.zeros((len(texts_vi), 5), dtype="float32")
+    for idx, chunk in _iter_batches(texts_vi, batch_size):
+        enc = _tokenize(tok, chunk)
+        logits = mdl(enc["input_ids"], enc["attention_mask"])
+        riasec[idx] = torch.sigmoid(logits["riasec"]).detach().cpu().numpy()
+        big5[idx] = torch.sigmoid(logits["big5"]).detach().cpu().numpy()
+    return riasec, big5
+
+
+def predict_riasec_vi_many(texts_vi: List[str], batch_size: int = BATCH_SIZE) -> np.ndarray:
+    """[N] texts -> [N, 6]"""
+    return _predict_phobert_many(_get_riasec_model, texts_vi, 6, batch_size)
+
+
+def predict_big5_vi_many(texts_vi: List[str], batch_size: int = BATCH_SIZE) -> np.ndarray:
+    """[N] texts -> [N, 5]"""
+    return _predict_phobert_many(_get_big5_model, texts_vi, 5, batch_size)
+
+
+@torch.no_grad()
+def encode_user_embedding_many(
+    texts_vi: List[str],
+    batch_size: int = BATCH_SIZE,
+    embedder: Optional[tuple] = None,
+) -> np.ndarray:
+    """[N] texts -> [N, 768], L2-normalized"""
+    tok, mdl = embedder or _get_sbert_user()
+    out: np.ndarray | None = None
+    for idx, chunk in _iter_batches(texts_vi, batch_size):
+        enc = _tokenize(tok, chunk)
+        outputs = mdl(**enc)
+        pooled = _mean_pool(outputs.last_hidden_state, enc["attention_mask"])
+        vecs = pooled.detach().cpu().numpy().astype("float32")
+        vecs /= np.linalg.norm(vecs, axis=1, keepdims=True) + 1e-9
+        if out is None:
+            out = np.zeros((len(texts_vi), vecs.shape[1]), dtype="float32")
+        out[idx] = vecs
+    if out is None:
+        return np.zeros((0, 768), dtype="float32")
+    return out
+
+
+def predict_riasec_vi(text_vi: str) -> np.ndarray:
+    return predict_riasec_vi_many([text_vi])[0]
+
+
+def predict_big5_vi(text_vi: str) -> np.ndarray:
+    return predict_big5_vi_many([text_vi])[0]
+
+
 def encode_user_embedding(text_vi: str) -> np.ndarray:
-    tok, mdl = _get_sbert_user()
-    enc = tok(
-        text_vi,
-        return_tensors="pt",
-        truncation=True,
-        max_length=256,
-        padding="max_length",
-    ).to(DEVICE)
-    outputs = mdl(**enc)
-    pooled = _mean_pool(outputs.last_hidden_state, enc["attention_mask"])
-    vec = pooled[0].detach().cpu().numpy().astype("float32")
-    norm = np.linalg.norm(vec) + 1e-9
-    return (vec / norm).astype("float32")
+    return encode_user_embedding_many([text_vi])[0]
 
 
 # ------------------------
 # 7) Public API: infer_user_traits
 # ------------------------
 
-def infer_user_traits(
+# (riasec [6], big5 [5], embedding [768]) của 1 essay tiếng Việt
+TraitScores = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+def prepare_essay(
     essay_text: str,
     language: Optional[Literal["vi", "en", "auto"]] = "auto",
-) -> TraitResult:
+) -> Tuple[str, str, str]:
+    """
+    Bước tiền xử lý (detect + dịch) – chạy ở thread của request, không nằm trong batch model.
+    Trả về (essay_original, language_detected, essay_vi).
+    """
     essay_text = (essay_text or "").strip()
     if not essay_text:
         raise ValueError("essay_text is empty")
 
     lang_detected = detect_language(essay_text) if language in (None, "auto") else language
-    essay_vi = translate_to_vi(essay_text, lang_detected)
+    return essay_text, lang_detected, translate_to_vi(essay_text, lang_detected)
+
+
+def score_essays_vi(texts_vi: List[str], batch_size: int = BATCH_SIZE) -> List[TraitScores]:
+    """
+    Chạy 3 model (RIASEC, Big5, SBERT) theo batch cho các essay đã ở tiếng Việt.
+    Dùng làm batch fn cho MicroBatcher.
+    """
+    riasec, big5 = predict_traits_vi_many(texts_vi, batch_size=batch_size)
+    emb = encode_user_embedding_many(texts_vi, batch_size=batch_size)
+    return [(riasec[i], big5[i], emb[i]) for i in range(len(texts_vi))]
+
 
-    riasec = predict_riasec_vi(essay_vi)
-    big5 = predict_big5_vi(essay_vi)
-    emb = encode_user_embedding(essay_vi)
+def _score_one(text_vi: str) -> TraitScores:
+    return score_essays_vi([text_vi])[0]
+
+
+def infer_user_traits(
+    essay_text: str,
+    language: Optional[Literal["vi", "en", "auto"]] = "auto",
+    scorer: Optional[Callable[[str], TraitScores]] = None,
+) -> TraitResult:
+    """
+    scorer: hàm chấm 1 essay tiếng Việt; mặc định chạy trực tiếp,
+    API truyền MicroBatcher để gom các request đồng thời thành 1 batch.
+    """
+    essay_original, lang_detected, essay_vi = prepare_essay(essay_text, language)
+    riasec, big5, emb = (scorer or _score_one)(essay_vi)
 
     return TraitResult(
         language_detected=lang_detected,
         language_used="vi",
-        essay_original=essay_text,
+        essay_original=essay_original,
         essay_used=essay_vi,
         riasec=riasec,
         big5=big5,
         embedding=emb,
     )
+
+
+def infer_user_traits_many(
+    essay_texts: Sequence[str],
+    language: Optional[Literal["vi", "en", "auto"]] = "auto",
+    batch_size: int = BATCH_SIZE,
+) -> List[TraitResult]:
+    """
+    Bản batch của infer_user_traits cho backfill / re-score hàng loạt:
+    - dịch (nếu cần) từng essay
+    - mỗi model (RIASEC, Big5, SBERT) chạy theo batch với dynamic padding
+    Kết quả giữ đúng thứ tự input.
+    """
+    prepared = []
+    for i, t in enumerate(essay_texts):
+        try:
+            prepared.append(prepare_essay(t, language))
+        except ValueError as e:
+            raise ValueError(f"essay_texts[{i}] is empty") from e
+
+    scores = score_essays_vi([vi for _, _, vi in prepared], batch_size=batch_size)
+
+    return [
+        TraitResult(
+            language_detected=lang,
+            language_used="vi",
+            essay_original=original,
+            essay_used=vi,
+            riasec=riasec,
+            big5=big5,
+            embedding=emb,
+        )
+        for (original, lang, vi), (riasec, big5, emb) in zip(prepared, scores, strict=True)
+    ]
@@ -0,0 +1,213 @@
+# src/ai_core/nlp/export_runtime.py
+"""
+Export + parity check cho các runtime CPU của essay models (xem runtime.py).
+
+Export ONNX (fp32 + dynamic int8) cho riasec_phobert, big5_phobert, vi_sbert_768:
+
+    python -m ai_core.nlp.export_runtime export
+    → models/<name>/onnx/model.onnx, models/<name>/onnx/model.int8.onnx
+
+Runtime "int8" (PyTorch) quantize lúc load nên không cần export.
+
+Parity check so với fp32 PyTorch (sigmoid RIASEC/Big5: max |diff|, embedding: min cosine):
+
+    python -m ai_core.nlp.export_runtime check --runtime onnx-int8 --n 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import numpy as np
+import torch
+
+from .essay_infer import (
+    DEVICE,
+    PHOBERT_BIG5_DIR,
+    PHOBERT_RIASEC_DIR,
+    ROOT,
+    SBERT_USER_DIR,
+    _load_sbert_embedder,
+    _load_trait_models,
+    encode_user_embedding_many,
+    predict_traits_vi_many,
+)
+from .runtime import ONNX_SUBDIR, RUNTIMES, onnx_path
+
+DEFAULT_TEXTS_CSV = ROOT / "data" / "nlp" / "val_riasec.csv"
+OPSET = 17
+
+_SAMPLE_TEXTS = [
+    "Em thích lập trình và giải các bài toán logic.",
+    "Tôi muốn làm việc với con người, giúp đỡ và chia sẻ với mọi người.",
+    "Vẽ tranh, chơi nhạc và viết truyện là niềm vui của tôi.",
+]
+
+
+# ------------------------
+# Export ONNX
+# ------------------------
+
+class _EncoderLastHidden(torch.nn.Module):
+    """AutoModel → chỉ trả last_hidden_state (1 output cho ONNX)."""
+
+    def __init__(self, model: torch.nn.Module) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).last_hidden_state
+
+
+def _export_onnx(module: torch.nn.Module, tokenizer, out_path: Path, output_name: str) -> None:
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    enc = tokenizer(_SAMPLE_TEXTS, return_tensors="pt", padding=True, truncation=True, max_length=64)
+    args = (enc["input_ids"].cpu(), enc["attention_mask"].cpu())
+
+    module = module.cpu().eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            module,
+            args,
+            str(out_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=[output_name],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "seq"},
+                "attention_mask": {0: "batch", 1: "seq"},
+                output_name: {0: "batch"},
+            },
+            opset_version=OPSET,
+            dynamo=False,
+        )
+    print(f"[EXPORT] {out_path}")
+
+
+def _quantize_onnx(src: Path, dst: Path) -> None:
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+    except ImportError as e:
+        raise RuntimeError("Cần onnxruntime để quantize ONNX (pip install onnxruntime)") from e
+
+    quantize_dynamic(str(src), str(dst), weight_type=QuantType.QInt8)
+    print(f"[EXPORT] {dst} (dynamic int8)")
+
+
+def export_all(names: List[str], quantize: bool = True) -> None:
+    targets = []
+    if {"riasec", "big5"} & set(names):
+        traits = _load_trait_models(runtime="torch")
+        for name, model_dir in (("riasec", PHOBERT_RIASEC_DIR), ("big5", PHOBERT_BIG5_DIR)):
+            if name in names:
+                tok, mdl = traits[name]
+                targets.append((tok, mdl, model_dir, "logits"))
+    if "sbert" in names:
+        tok, mdl = _load_sbert_embedder(SBERT_USER_DIR, runtime="torch")
+        targets.append((tok, _EncoderLastHidden(mdl), SBERT_USER_DIR, "last_hidden_state"))
+
+    for tok, mdl, model_dir, output_name in targets:
+        fp32_path = onnx_path(model_dir, "onnx")
+        _export_onnx(mdl, tok, fp32_path, output_name)
+        if quantize:
+            _quantize_onnx(fp32_path, onnx_path(model_dir, "onnx-int8"))
+
+
+# ------------------------
+# Parity check
+# ------------------------
+
+def _load_texts(path: Path, n: int) -> List[str]:
+    if not path.exists():
+        print(f"[WARN][CHECK] {path} not found, dùng câu mẫu")
+        return list(_SAMPLE_TEXTS)
+
+    texts: List[str] = []
+    seen = set()
+    with path.open("r", encoding="utf-8-sig", newline="") as f:
+        for row in csv.DictReader(f):
+            t = (row.get("text") or "").strip()
+            if t and t not in seen:
+                seen.add(t)
+                texts.append(t)
+            if len(texts) >= n:
+                break
+    return texts or list(_SAMPLE_TEXTS)
+
+
+def _timed(fn: Callable[[], object]):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def _cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    na = np.linalg.norm(a, axis=1) + 1e-12
+    nb = np.linalg.norm(b, axis=1) + 1e-12
+    return (a * b).sum(axis=1) / (na * nb)
+
+
+def check_parity(runtime: str, texts: List[str], atol: float, min_cos: float, batch_size: int) -> bool:
+    """
+    So sánh runtime với fp32 PyTorch trên cùng texts. True nếu trong ngưỡng.
+    """
+    ref_traits = _load_trait_models(runtime="torch")
+    ref_sbert = _load_sbert_embedder(SBERT_USER_DIR, runtime="torch")
+    (ref_r, ref_b), t_ref_traits = _timed(lambda: predict_traits_vi_many(texts, batch_size, ref_traits))
+    ref_e, t_ref_emb = _timed(lambda: encode_user_embedding_many(texts, batch_size, ref_sbert))
+
+    cand_traits = _load_trait_models(runtime=runtime)
+    cand_sbert = _load_sbert_embedder(SBERT_USER_DIR, runtime=runtime)
+    (r, b), t_traits = _timed(lambda: predict_traits_vi_many(texts, batch_size, cand_traits))
+    e, t_emb = _timed(lambda: encode_user_embedding_many(texts, batch_size, cand_sbert))
+
+    diff_r = float(np.abs(r - ref_r).max())
+    diff_b = float(np.abs(b - ref_b).max())
+    cos_e = float(_cosine_rows(e, ref_e).min())
+
+    print(f"[CHECK] runtime={runtime} device={DEVICE} texts={len(texts)} batch_size={batch_size}")
+    print(f"  riasec  max|diff|={diff_r:.5f}  (atol={atol})")
+    print(f"  big5    max|diff|={diff_b:.5f}  (atol={atol})")
+    print(f"  embed   min cos  ={cos_e:.5f}  (min_cos={min_cos})")
+    print(f"  traits  {t_ref_traits:.3f}s → {t_traits:.3f}s  (x{t_ref_traits / max(t_traits, 1e-9):.2f})")
+    print(f"  embed   {t_ref_emb:.3f}s → {t_emb:.3f}s  (x{t_ref_emb / max(t_emb, 1e-9):.2f})")
+
+    ok = diff_r <= atol and diff_b <= atol and cos_e >= min_cos
+    print("[CHECK] OK" if ok else "[CHECK] FAILED")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export / kiểm tra runtime CPU cho essay models")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    ex = sub.add_parser("export", help=f"Export ONNX vào models/<name>/{ONNX_SUBDIR}/")
+    ex.add_argument("--models", nargs="+", default=["riasec", "big5", "sbert"],
+                    choices=["riasec", "big5", "sbert"], help="Model cần export")
+    ex.add_argument("--no-quantize", action="store_true", help="Không tạo model.int8.onnx")
+
+    ck = sub.add_parser("check", help="Parity check so với fp32 PyTorch")
+    ck.add_argument("--runtime", default="int8", choices=[r for r in RUNTIMES if r != "torch"])
+    ck.add_argument("--csv", default=str(DEFAULT_TEXTS_CSV), help="CSV có cột 'text'")
+    ck.add_argument("--n", type=int, default=64, help="Số câu dùng để so sánh")
+    ck.add_argument("--batch-size", type=int, default=16)
+    ck.add_argument("--atol", type=float, default=0.05, help="Ngưỡng |diff| cho điểm sigmoid")
+    ck.add_argument("--min-cos", type=float, default=0.99, help="Ngưỡng cosine tối thiểu cho embedding")
+
+    args = ap.parse_args()
+
+    if args.cmd == "export":
+        export_all(args.models, quantize=not args.no_quantize)
+        return
+
+    texts = _load_texts(Path(args.csv), args.n)
+    ok = check_parity(args.runtime, texts, args.atol, args.min_cos, args.batch_size)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+# src/ai_core/nlp/runtime.py
+"""
+Runtime cho các model NLP (PhoBERT RIASEC/Big5, vi-SBERT) khi serve trên CPU.
+
+NLP_RUNTIME (env):
+- "torch"     : fp32 PyTorch như trước (mặc định)
+- "int8"      : PyTorch + dynamic int8 quantization cho nn.Linear (quantize lúc load,
+                không cần artifact riêng; chỉ áp dụng khi device là cpu)
+- "onnx"      : ONNX Runtime, đọc <model_dir>/onnx/model.onnx
+- "onnx-int8" : ONNX Runtime, đọc <model_dir>/onnx/model.int8.onnx
+
+Artifact ONNX + parity check so với fp32: xem ai_core/nlp/export_runtime.py.
+onnxruntime là dependency tuỳ chọn – chỉ import khi runtime là onnx*.
+"""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Optional
+
+import numpy as np
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+RUNTIMES = ("torch", "int8", "onnx", "onnx-int8")
+
+NLP_RUNTIME = os.getenv("NLP_RUNTIME", "torch").strip().lower()
+# 0 = để onnxruntime tự chọn số thread
+NLP_ONNX_THREADS = int(os.getenv("NLP_ONNX_THREADS", "0"))
+
+ONNX_SUBDIR = "onnx"
+
+if NLP_RUNTIME not in RUNTIMES:
+    print(f"[WARN][NLP] Unknown NLP_RUNTIME={NLP_RUNTIME!r}, fallback to 'torch'")
+    NLP_RUNTIME = "torch"
+
+
+def is_onnx(runtime: str) -> bool:
+    return runtime in ("onnx", "onnx-int8")
+
+
+def onnx_path(model_dir: Path | str, runtime: str = "onnx") -> Path:
+    name = "model.int8.onnx" if runtime == "onnx-int8" else "model.onnx"
+    return Path(model_dir) / ONNX_SUBDIR / name
+
+
+# ------------------------
+# PyTorch: dynamic int8
+# ------------------------
+
+def quantize_int8(model: torch.nn.Module) -> torch.nn.Module:
+    """
+    Dynamic int8 cho mọi nn.Linear (weight int8, activation quantize theo batch).
+    inplace=True để các wrapper đang giữ reference (vd. _HeadView) dùng luôn model mới.
+    """
+    model.cpu().eval()
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+    )
+
+
+def apply_torch_runtime(model: torch.nn.Module, device: torch.device, runtime: str = NLP_RUNTIME):
+    """
+    fp32 model (đã .eval()) -> model dùng để serve theo runtime.
+    """
+    if runtime != "int8":
+        return model
+    if device.type != "cpu":
+        print(f"[WARN][NLP] NLP_RUNTIME=int8 chỉ hỗ trợ cpu (device={device}), giữ fp32")
+        return model
+    return quantize_int8(model)
+
+
+# ------------------------
+# ONNX Runtime
+# ------------------------
+
+def _import_onnxruntime():
+    try:
+        import onnxruntime as ort
+    except ImportError as e:
+        raise RuntimeError(
+            "NLP_RUNTIME=onnx cần package onnxruntime (pip install onnxruntime)"
+        ) from e
+    return ort
+
+
+class OnnxSession:
+    """
+    Bọc onnxruntime.InferenceSession: nhận tensor/ndarray theo tên input,
+    tự bỏ các input model không dùng (vd. token_type_ids), trả về dict output (numpy).
+    """
+
+    def __init__(self, path: Path | str, num_threads: int = NLP_ONNX_THREADS) -> None:
+        ort = _import_onnxruntime()
+        path = Path(path)
+        if not path.exists():
+            raise FileNotFoundError(
+                f"{path} not found – chạy `python -m ai_core.nlp.export_runtime export` trước"
+            )
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            opts.intra_op_num_threads = num_threads
+
+        self.path = path
+        self.session = ort.InferenceSession(
+            str(path), sess_options=opts, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        self.output_names = [o.name for o in self.session.get_outputs()]
+
+    def run(self, **inputs) -> dict[str, np.ndarray]:
+        feeds = {}
+        for name in self.input_names:
+            v = inputs[name]
+            if isinstance(v, torch.Tensor):
+                v = v.detach().cpu().numpy()
+            feeds[name] = np.asarray(v, dtype=np.int64)
+        outs = self.session.run(self.output_names, feeds)
+        return dict(zip(self.output_names, outs, strict=True))
+
+
+class OnnxRegressor:
+    """
+    Thay thế PhoBERTRegressor: mdl(input_ids, attention_mask) -> logits (torch.Tensor).
+    """
+
+    def __init__(self, session: OnnxSession) -> None:
+        self.session = session
+
+    def __call__(self, input_ids, attention_mask) -> torch.Tensor:
+        outs = self.session.run(input_ids=input_ids, attention_mask=attention_mask)
+        return torch.from_numpy(outs["logits"])
+
+
+class OnnxEncoder:
+    """
+    Thay thế AutoModel encoder: mdl(**enc).last_hidden_state (torch.Tensor, trên cpu).
+    """
+
+    def __init__(self, session: OnnxSession) -> None:
+        self.session = session
+
+    def __call__(self, **enc) -> SimpleNamespace:
+        outs = self.session.run(**enc)
+        return SimpleNamespace(last_hidden_state=torch.from_numpy(outs["last_hidden_state"]))
+
+
+def load_encoder(
+    model_name: str,
+    model_dir: Path | str,
+    device: torch.device,
+    runtime: Optional[str] = None,
+):
+    """
+    Load (tokenizer, encoder) cho vi-SBERT theo runtime.
+    model_name: tên HF / path (tokenizer_name.txt); model_dir: nơi chứa onnx/.
+    """
+    runtime = runtime or NLP_RUNTIME
+    tokenizer = AutoTokenizer.from_pretrained(model_name, use_fast=True)
+    if is_onnx(runtime):
+        path = onnx_path(model_dir, runtime)
+        print(f"[NLP] encoder {model_name} served by onnxruntime ({path})")
+        return tokenizer, OnnxEncoder(OnnxSession(path))
+
+    mdl = AutoModel.from_pretrained(model_name).to(device).eval()
+    return tokenizer, apply_torch_runtime(mdl, device, runtime)
@@ -2,20 +2,23 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Dict
+from typing import List
 from pathlib import Path
 import os
-import json
-
-import torch as T
 
 from ai_core.retrieval.service_pgvector import (
     Candidate,
     search_candidates_for_user,
     list_user_ids_with_embeddings,
 )
-from ai_core.recsys.neumf.dataset import PairDataset
-from ai_core.recsys.neumf.model import MLPScore
+from ai_core.recsys.neumf.engine import (
+    BlendWeights,
+    ScoringEngine,
+    _default_item_feats_path,
+    _default_model_path,
+    _default_user_feats_path,
+)
+from ai_core.recsys.neumf.registry import get_registry
 
 
 # ====== Kiểu dữ liệu output cho B4 ======
@@ -25,149 +28,72 @@ class ScoredItem:
     rank_score: float     # 0–1, điểm tổng để sort & show
     sim_score: float      # điểm similarity từ B3 (0–1)
     cf_score: float       # điểm collaborative từ MLP (0–1)
-    trait_score: float = 0.0  # để dành nếu sau này blend thêm trait
+    trait_score: float = 0.0  # cosine RIASEC user/item (0–1), chỉ tính khi NEUMF_BLEND_TRAIT > 0
 
 
 # ====== Global config & cache ======
 
-_DEVICE = T.device("cuda" if T.cuda.is_available() else "cpu")
-
-# THỰC DỤNG: dùng luôn model đã train ở models/recsys_mlp
-_MODEL_DIR = Path(os.getenv("NEUMF_MODEL_DIR", "models/recsys_mlp"))
-_MODEL_PATH = _MODEL_DIR / "best.pt"
+# THỰC DỤNG: dùng luôn model đã train ở models/recsys_mlp.
+# Không set env → cùng đường dẫn tuyệt đối với /rank, /recs (engine._default_*), không phụ
+# thuộc cwd lúc chạy uvicorn.
+_MODEL_DIR = os.getenv("NEUMF_MODEL_DIR")
+_MODEL_PATH = Path(_MODEL_DIR) / "best.pt" if _MODEL_DIR else _default_model_path()
 
 # Đường dẫn features (đã build từ DB)
-_USER_FEATS_PATH = Path(os.getenv("NEUMF_USER_FEATS", "data/processed/user_feats.json"))
-_ITEM_FEATS_PATH = Path(os.getenv("NEUMF_ITEM_FEATS", "data/processed/item_feats.json"))
+_USER_FEATS_PATH = Path(os.getenv("NEUMF_USER_FEATS") or _default_user_feats_path())
+_ITEM_FEATS_PATH = Path(os.getenv("NEUMF_ITEM_FEATS") or _default_item_feats_path())
 
-_MODEL: T.nn.Module | None = None
-_USER_FEATS: Dict[str, dict] | None = None
-_ITEM_FEATS: Dict[str, dict] | None = None
-
-
-def _load_json(path: Path) -> Dict:
-    if not path.exists():
-        raise FileNotFoundError(
-            f"{path} not found. Hãy chạy build_feats_from_db.py để sinh file này."
-        )
-    txt = path.read_text(encoding="utf-8").strip()
-    if not txt:
-        raise RuntimeError(f"{path} rỗng.")
-    return json.loads(txt)
+# Trọng số blend CF / sim / trait: NEUMF_BLEND_CF (0.7), NEUMF_BLEND_SIM (0.3), NEUMF_BLEND_TRAIT (0.0)
+_WEIGHTS = BlendWeights.from_env()
 
 
-def _lazy_load():
+def _get_engine() -> ScoringEngine:
     """
-    - Load user_feats.json & item_feats.json vào RAM
-    - Load MLPScore + state_dict (strict=False để bỏ qua layer thừa/thiếu)
+    ScoringEngine dùng chung từ registry (recsys/neumf/registry.py): cùng checkpoint và
+    device (NEUMF_DEVICE) với /rank, /recs → cùng 1 bản weights + feature matrices;
+    tự reload khi file đổi.
     """
-    global _MODEL, _USER_FEATS, _ITEM_FEATS
-
-    if _USER_FEATS is None or _ITEM_FEATS is None:
-        _USER_FEATS = _load_json(_USER_FEATS_PATH)
-        _ITEM_FEATS = _load_json(_ITEM_FEATS_PATH)
-        print(
-            f"[BOOT][B4] Loaded feats: users={len(_USER_FEATS)}, items={len(_ITEM_FEATS)}"
-        )
-
-    if _MODEL is None:
-        if not _MODEL_PATH.exists():
-            raise FileNotFoundError(
-                f"Model checkpoint not found: {_MODEL_PATH}. "
-                "Hãy chạy train.py để sinh best.pt."
-            )
-
-        model = MLPScore()  # kiến trúc chuẩn đã dùng khi train
-        state = T.load(_MODEL_PATH, map_location="cpu")
-
-        # Cho phép checkpoint kiểu {"state_dict": {...}}
-        if isinstance(state, dict) and "state_dict" in state and isinstance(
-            state["state_dict"], dict
-        ):
-            state = state["state_dict"]
-
-        missing, unexpected = model.load_state_dict(state, strict=False)
-        if missing or unexpected:
-            print("[WARN] Partial load NeuMF state_dict:")
-            if missing:
-                print("  - missing keys   :", missing)
-            if unexpected:
-                print("  - unexpected keys:", unexpected)
-
-        model.to(_DEVICE)
-        model.eval()
-        _MODEL = model
-
-    return _MODEL, _USER_FEATS, _ITEM_FEATS
+    return get_registry().get(
+        model_path=_MODEL_PATH,
+        user_feats_path=_USER_FEATS_PATH,
+        item_feats_path=_ITEM_FEATS_PATH,
+    )
 
 
 # ====== Public API – B4 Ranker (online) ======
 
-def infer_scores(user_id: int, candidates: List[Candidate]) -> List[ScoredItem]:
+def infer_scores(
+    user_id: int,
+    candidates: List[Candidate],
+    weights: BlendWeights | None = None,
+) -> List[ScoredItem]:
     """
-    B4 – Ranker MLP (NeuMF simplified).
+    B4 – Ranker MLP (NeuMF simplified), blend CF + similarity (+ trait) trong engine.
 
     Input:
       - user_id: core.users.id
       - candidates: list[Candidate] (job_id + score_sim) từ B3
+      - weights: None → _WEIGHTS (env)
 
     Output:
       - list[ScoredItem] sort giảm dần theo rank_score
     """
-    model, user_feats, item_feats = _lazy_load()
-
-    uid = str(user_id)
-    if uid not in user_feats:
-        raise ValueError(
-            f"user_id={user_id} không có trong user_feats "
-            f"(users={len(user_feats)}). Hãy kiểm tra build_feats_from_db."
+    res = _get_engine().score(
+        user_id,
+        [c.job_id for c in candidates],
+        sim=[c.score_sim for c in candidates],
+        weights=weights or _WEIGHTS,
+    )
+    return [
+        ScoredItem(
+            job_id=jid,
+            rank_score=float(rank),
+            sim_score=float(sim),
+            cf_score=float(cf),
+            trait_score=float(trait),
         )
-
-    # Giữ lại chỉ những job có features
-    valid_cands: List[Candidate] = [
-        c for c in candidates if c.job_id in item_feats
+        for jid, rank, sim, cf, trait in zip(res.job_ids, res.final, res.sim, res.cf, res.trait)
     ]
-    if not valid_cands:
-        return []
-
-    # Build pairs như lúc train: (user_id, job_id, label_dummy)
-    pairs = [(uid, c.job_id, 0.0) for c in valid_cands]
-
-    ds = PairDataset(pairs, user_feats, item_feats)
-
-    # Stack feature vector cho tất cả candidates
-    X_list = []
-    for i in range(len(ds)):
-        x, _ = ds[i]  # y không dùng
-        X_list.append(x)
-
-    X = T.stack(X_list).to(_DEVICE)  # [N, in_dim]
-
-    with T.no_grad():
-        logits = model(X).view(-1)                # [N]
-        cf_scores = T.sigmoid(logits).cpu().numpy()  # 0–1
-
-    # Blend CF + similarity
-    alpha = 0.7  # trọng số CF
-    beta = 0.3   # trọng số similarity
-
-    scored: List[ScoredItem] = []
-    for cand, cf in zip(valid_cands, cf_scores):
-        sim = float(cand.score_sim)
-        cf_f = float(cf)
-        rank = alpha * cf_f + beta * sim
-        scored.append(
-            ScoredItem(
-                job_id=cand.job_id,
-                rank_score=rank,
-                sim_score=sim,
-                cf_score=cf_f,
-                trait_score=0.0,
-            )
-        )
-
-    scored.sort(key=lambda s: s.rank_score, reverse=True)
-    return scored
 
 
 # ====== CLI demo – B3 + B4 ======
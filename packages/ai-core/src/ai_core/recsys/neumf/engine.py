@@ -0,0 +1,326 @@
+# src/ai_core/recsys/neumf/engine.py
+"""
+Scoring engine B4 duy nhất (NeuMF/MLP) – 1 bản weights + feature matrices / process.
+
+- Load 1 lần: user_feats / item_feats → FeatureStore (ma trận float32),
+  best.pt → MLPScore, item projection của layer đầu (SplitFirstLayerScorer),
+  RIASEC của item đã L2-normalize (cho trait score).
+- score(): 1 lần forward cho cả batch candidates, rồi blend bằng NumPy vectorised:
+
+    final = w_cf * cf + w_sim * sim + w_trait * trait
+
+    cf    : sigmoid(logit) của MLP (0–1)
+    sim   : điểm similarity từ B3 (truyền vào, cùng thứ tự job_ids)
+    trait : cosine(RIASEC user, RIASEC item), clip về [0, 1]
+
+- Trọng số mặc định lấy từ env NEUMF_BLEND_CF / NEUMF_BLEND_SIM / NEUMF_BLEND_TRAIT
+  (BlendWeights.from_env); caller có thể truyền weights riêng cho từng lời gọi.
+
+Các entry point chỉ là wrapper mỏng:
+- recsys.neumf.infer.Ranker.infer_scores  (/rank, /recs) – CF thuần (CF_ONLY)
+- ranker.service_neumf.infer_scores       – blend CF + sim (+ trait)
+Instance engine lấy qua registry (registry.py) để dùng chung + hot reload.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import torch as T
+
+from .feature_store import FeatureStore
+from .model import MLPScore, SplitFirstLayerScorer
+
+# layout cột của FeatureStore (xem dataset._flatten_*_feat):
+#   user = [text..., riasec(6), big5(5)], item = [text..., riasec(6)]
+_RIASEC_DIM = 6
+_BIG5_DIM = 5
+
+# 1 device cho mọi consumer (/rank, /recs, ranker.service_neumf) → registry giữ đúng 1 bản weights
+NEUMF_DEVICE = os.getenv("NEUMF_DEVICE", "cpu")
+
+
+# ================== Paths / IO ==================
+
+
+def _load_json(path: Path) -> Dict:
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        raise FileNotFoundError(f"Missing/empty JSON: {path}")
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _project_root() -> Path:
+    """
+    Trả về root của package ai-core:
+    .../packages/ai-core
+    engine.py nằm ở: packages/ai-core/src/ai_core/recsys/neumf/engine.py
+    → parents[4] = packages/ai-core
+    """
+    return Path(__file__).resolve().parents[4]
+
+
+def _default_model_path() -> Path:
+    # models/recsys_mlp/best.pt
+    return _project_root() / "models" / "recsys_mlp" / "best.pt"
+
+
+def _default_user_feats_path() -> Path:
+    # data/processed/user_feats.json
+    return _project_root() / "data" / "processed" / "user_feats.json"
+
+
+def _default_item_feats_path() -> Path:
+    # data/processed/item_feats.json
+    return _project_root() / "data" / "processed" / "item_feats.json"
+
+
+# ================== Blending ==================
+
+
+@dataclass(frozen=True)
+class BlendWeights:
+    cf: float = 1.0
+    sim: float = 0.0
+    trait: float = 0.0
+
+    @classmethod
+    def from_env(cls) -> "BlendWeights":
+        return cls(
+            cf=float(os.getenv("NEUMF_BLEND_CF", "0.7")),
+            sim=float(os.getenv("NEUMF_BLEND_SIM", "0.3")),
+            trait=float(os.getenv("NEUMF_BLEND_TRAIT", "0.0")),
+        )
+
+
+CF_ONLY = BlendWeights()
+
+
+@dataclass
+class ScoreBatch:
+    """Kết quả score(): các mảng cùng độ dài, đã sort giảm dần theo final."""
+    job_ids: List[str]
+    final: np.ndarray
+    cf: np.ndarray
+    sim: np.ndarray
+    trait: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+
+# ================== Engine ==================
+
+
+class ScoringEngine:
+    """
+    Giữ model + feature matrices, chấm điểm theo batch.
+    Lazy-load ở lần gọi đầu (hoặc warmup()).
+
+    strict=True (mặc định, registry / Ranker): checkpoint phải khớp đúng key của MLPScore.
+    strict=False: bỏ qua key thừa (in WARN), nhưng thiếu weights của layer nào vẫn raise.
+    """
+
+    def __init__(
+        self,
+        model_path: Optional[str | Path] = None,
+        user_feats_path: Optional[str | Path] = None,
+        item_feats_path: Optional[str | Path] = None,
+        device: Optional[str] = None,
+        split_first_layer: Optional[bool] = None,
+        strict: bool = True,
+    ) -> None:
+        self.model_path = Path(model_path or _default_model_path())
+        self.user_feats_path = Path(user_feats_path or _default_user_feats_path())
+        self.item_feats_path = Path(item_feats_path or _default_item_feats_path())
+
+        # Device: NEUMF_DEVICE (mặc định CPU cho server đơn giản)
+        self.device = T.device(device or NEUMF_DEVICE)
+
+        # Tách layer đầu: item projection tính sẵn cho cả catalog (xem SplitFirstLayerScorer)
+        if split_first_layer is None:
+            split_first_layer = os.getenv("NEUMF_SPLIT_FIRST_LAYER", "1") != "0"
+        self.split_first_layer = bool(split_first_layer)
+        self.strict = bool(strict)
+
+        self._model: Optional[MLPScore] = None
+        self._user_feats: Optional[Dict[str, Dict]] = None
+        self._item_feats: Optional[Dict[str, Dict]] = None
+        self._store: Optional[FeatureStore] = None
+        self._scorer: Optional[SplitFirstLayerScorer] = None
+        self._item_riasec: Optional[np.ndarray] = None
+
+    # ---- lazy load helpers ----
+
+    def _load_user_feats(self) -> Dict[str, Dict]:
+        if self._user_feats is None:
+            self._user_feats = _load_json(self.user_feats_path)
+        return self._user_feats
+
+    def _load_item_feats(self) -> Dict[str, Dict]:
+        if self._item_feats is None:
+            self._item_feats = _load_json(self.item_feats_path)
+        return self._item_feats
+
+    def _load_store(self) -> FeatureStore:
+        if self._store is None:
+            self._store = FeatureStore(self._load_user_feats(), self._load_item_feats())
+            # dict JSON chỉ cần lúc flatten → giải phóng, chỉ giữ ma trận
+            self._user_feats = None
+            self._item_feats = None
+        return self._store
+
+    def _load_model(self) -> MLPScore:
+        """
+        Load model từ best.pt. Hỗ trợ:
+        - torch.save(state_dict)
+        - torch.save({"state_dict": state_dict, ...})
+
+        Lưu ý: MLPScore trong project hiện tại KHÔNG nhận tham số in_dim,
+        mà tự tính kích thước input bên trong (dim_text, use_item_riasec...).
+
+        strict=False: key thừa / buffer thiếu chỉ in WARN; thiếu weights thì raise, không
+        chấm điểm bằng weights khởi tạo ngẫu nhiên.
+        """
+        if self._model is not None:
+            return self._model
+
+        if not self.model_path.exists():
+            raise FileNotFoundError(f"Missing model checkpoint: {self.model_path}")
+
+        model = MLPScore()
+
+        state = T.load(str(self.model_path), map_location=self.device)
+
+        # Hỗ trợ cả dạng {"state_dict": ...}
+        if isinstance(state, dict) and "state_dict" in state and isinstance(
+            state["state_dict"], dict
+        ):
+            state = state["state_dict"]
+
+        if self.strict:
+            model.load_state_dict(state)
+            missing, unexpected = [], []
+        else:
+            missing, unexpected = model.load_state_dict(state, strict=False)
+            params = {name for name, _ in model.named_parameters()}
+            missing_weights = [k for k in missing if k in params]
+            if missing_weights:
+                raise RuntimeError(f"NeuMF checkpoint {self.model_path} is missing weights: {missing_weights}")
+        if missing or unexpected:
+            print("[WARN] Partial load NeuMF state_dict:")
+            if missing:
+                print("  - missing keys   :", missing)
+            if unexpected:
+                print("  - unexpected keys:", unexpected)
+
+        model.to(self.device)
+        model.eval()
+        self._model = model
+        return model
+
+    def _load_scorer(self) -> SplitFirstLayerScorer:
+        if self._scorer is None:
+            store = self._load_store()
+            scorer = SplitFirstLayerScorer(
+                self._load_model(),
+                user_dim=store.user_dim,
+                item_matrix=T.from_numpy(store.item_matrix),
+            )
+            self._scorer = scorer.to(self.device).eval()
+        return self._scorer
+
+    def _load_item_riasec(self) -> np.ndarray:
+        """RIASEC item [I, 6] đã L2-normalize (tính 1 lần)."""
+        if self._item_riasec is None:
+            store = self._load_store()
+            r = store.item_matrix[:, -_RIASEC_DIM:] if store.item_dim >= _RIASEC_DIM else np.zeros((len(store), 0), "float32")
+            norms = np.linalg.norm(r, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            self._item_riasec = np.ascontiguousarray(r / norms, dtype="float32")
+        return self._item_riasec
+
+    def warmup(self) -> "ScoringEngine":
+        """Load hết feats + model (+ item projection) ngay, thay vì ở request đầu tiên."""
+        self._load_store()
+        self._load_model()
+        if self.split_first_layer:
+            self._load_scorer()
+        self._load_item_riasec()
+        return self
+
+    # ---- scoring ----
+
+    def _cf_scores(self, store: FeatureStore, uid: str, rows: np.ndarray) -> np.ndarray:
+        with T.no_grad():
+            if self.split_first_layer:
+                u = T.from_numpy(store.user_vector(uid)).to(self.device)
+                logits = self._load_scorer()(u, T.from_numpy(rows).to(self.device))
+            else:
+                X = np.empty((len(rows), store.in_dim), dtype="float32")
+                X[:, : store.user_dim] = store.user_vector(uid)
+                X[:, store.user_dim :] = store.item_matrix[rows]
+                logits = self._load_model()(T.from_numpy(X).to(self.device))
+            return T.sigmoid(logits).cpu().numpy().reshape(-1).astype("float32", copy=False)
+
+    def _trait_scores(self, store: FeatureStore, uid: str, rows: np.ndarray) -> np.ndarray:
+        item_r = self._load_item_riasec()
+        if item_r.shape[1] != _RIASEC_DIM or store.user_dim < _RIASEC_DIM + _BIG5_DIM:
+            return np.zeros(len(rows), dtype="float32")
+        u = store.user_vector(uid)[-(_RIASEC_DIM + _BIG5_DIM):-_BIG5_DIM]
+        n = float(np.linalg.norm(u))
+        if n == 0.0:
+            return np.zeros(len(rows), dtype="float32")
+        return np.clip(item_r[rows] @ (u / n), 0.0, 1.0).astype("float32", copy=False)
+
+    def score(
+        self,
+        user_id: int | str,
+        job_ids: Sequence[str],
+        sim: Optional[Sequence[float]] = None,
+        weights: Optional[BlendWeights] = None,
+    ) -> ScoreBatch:
+        """
+        Chấm điểm job_ids cho 1 user (job không có features bị bỏ qua).
+
+        sim: điểm B3 cùng thứ tự với job_ids (None → 0).
+        weights: None → CF_ONLY.
+        """
+        w = weights or CF_ONLY
+        store = self._load_store()
+
+        uid = str(user_id)
+        if not store.has_user(uid):
+            raise ValueError(
+                f"user_id={uid} không có trong user_feats (len={len(store.user_index)})"
+            )
+
+        # giữ vị trí của job có features để gather sim cùng thứ tự
+        pos = [i for i, jid in enumerate(job_ids) if jid in store.item_index]
+        kept = [job_ids[i] for i in pos]
+        if not kept:
+            empty = np.zeros(0, dtype="float32")
+            return ScoreBatch([], empty, empty, empty, empty)
+        rows = np.fromiter((store.item_index[j] for j in kept), dtype=np.int64, count=len(kept))
+
+        cf = self._cf_scores(store, uid, rows)
+        # sim giữ float64 (điểm B3 trả nguyên cho client), final theo đó cũng float64
+        sim_arr = np.asarray(sim, dtype="float64")[pos] if sim is not None else np.zeros(len(kept))
+        trait = self._trait_scores(store, uid, rows) if w.trait else np.zeros(len(kept), dtype="float32")
+
+        final = w.cf * cf + w.sim * sim_arr + w.trait * trait
+
+        # sort giảm dần theo final; stable → cùng điểm giữ thứ tự input (thứ tự retrieval)
+        order = np.argsort(-final, kind="stable")
+        return ScoreBatch(
+            job_ids=[kept[i] for i in order],
+            final=final[order],
+            cf=cf[order],
+            sim=sim_arr[order],
+            trait=trait[order],
+        )
@@ -0,0 +1,136 @@
+# src/ai_core/recsys/neumf/feature_store.py
+"""
+Feature store cho B4 – Ranker NeuMF/MLP (inference).
+
+- Flatten user_feats / item_feats MỘT lần lúc load thành ma trận float32
+  liên tục (C-contiguous) + index id → row.
+- Khi chấm điểm chỉ cần gather các row của candidates rồi ghép với vector user,
+  không phải convert list[float] → NumPy cho từng cặp (user, job) như PairDataset.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from .dataset import _flatten_item_feat, _flatten_user_feat
+from .mappings import load_item_feats, load_user_feats
+
+
+def _build_matrix(
+    feats: Dict[str, Any],
+    flatten: Callable[[Any], np.ndarray],
+) -> Tuple[Dict[str, int], np.ndarray]:
+    """
+    feats[id] -> (index id→row, ma trận [N, D] float32).
+
+    Kích thước D lấy theo phần tử đầu tiên (giống PairDataset.in_dim);
+    phần tử nào flatten ra sai kích thước thì bỏ qua (trước đây sẽ làm
+    T.stack lỗi khi nó lọt vào danh sách candidates).
+    """
+    index: Dict[str, int] = {}
+    rows: List[np.ndarray] = []
+    dim: int | None = None
+    skipped = 0
+
+    for key, meta in feats.items():
+        vec = flatten(meta)
+        if dim is None:
+            dim = int(vec.shape[0])
+        if vec.shape[0] != dim or dim == 0:
+            skipped += 1
+            continue
+        index[str(key)] = len(rows)
+        rows.append(vec)
+
+    if skipped:
+        print(f"[WARN][FeatureStore] Skipped {skipped} entries with dim != {dim}")
+
+    if not rows:
+        return index, np.zeros((0, dim or 0), dtype="float32")
+
+    return index, np.ascontiguousarray(np.stack(rows), dtype="float32")
+
+
+class FeatureStore:
+    """
+    Giữ user/item features dưới dạng ma trận dense:
+
+    - user_matrix: [U, Du]  (text + riasec + big5)
+    - item_matrix: [I, Di]  (text + riasec)
+    - user_index / item_index: id (string) → row
+
+    Thứ tự cột khớp với PairDataset: x = concat(user_feat, item_feat).
+    """
+
+    def __init__(self, user_feats: Dict[str, Any], item_feats: Dict[str, Any]) -> None:
+        self.user_index, self.user_matrix = _build_matrix(user_feats, _flatten_user_feat)
+        self.item_index, self.item_matrix = _build_matrix(item_feats, _flatten_item_feat)
+
+    @classmethod
+    def from_json(cls, user_feats_path: str | Path, item_feats_path: str | Path) -> "FeatureStore":
+        return cls(load_user_feats(user_feats_path), load_item_feats(item_feats_path))
+
+    # ---- info ----
+
+    @property
+    def user_dim(self) -> int:
+        return int(self.user_matrix.shape[1])
+
+    @property
+    def item_dim(self) -> int:
+        return int(self.item_matrix.shape[1])
+
+    @property
+    def in_dim(self) -> int:
+        return self.user_dim + self.item_dim
+
+    def has_user(self, user_id: int | str) -> bool:
+        return str(user_id) in self.user_index
+
+    def __len__(self) -> int:
+        return len(self.item_index)
+
+    # ---- lookup ----
+
+    def user_vector(self, user_id: int | str) -> np.ndarray:
+        uid = str(user_id)
+        row = self.user_index.get(uid)
+        if row is None:
+            raise KeyError(f"user_id={uid} không có trong feature store")
+        return self.user_matrix[row]
+
+    def item_row_ids(self, job_ids: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        job_ids -> (kept_job_ids, row indices int64), bỏ qua job không có features.
+        """
+        kept: List[str] = []
+        rows: List[int] = []
+        for jid in job_ids:
+            r = self.item_index.get(jid)
+            if r is not None:
+                kept.append(jid)
+                rows.append(r)
+        return kept, np.asarray(rows, dtype=np.int64)
+
+    def item_rows(self, job_ids: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Gather các row của job_ids (bỏ qua job không có features).
+
+        Returns (kept_job_ids, matrix [N, Di]).
+        """
+        kept, rows = self.item_row_ids(job_ids)
+        return kept, self.item_matrix[rows]
+
+    def pair_matrix(self, user_id: int | str, job_ids: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+        """
+        Ma trận input cho MLPScore: [N, Du + Di] = concat(user_vec (broadcast), item_rows).
+        """
+        u = self.user_vector(user_id)
+        kept, items = self.item_rows(job_ids)
+        X = np.empty((len(kept), self.in_dim), dtype="float32")
+        X[:, : self.user_dim] = u
+        X[:, self.user_dim :] = items
+        return kept, X
@@ -2,26 +2,23 @@
 
 import argparse
 import csv
-import json
 from pathlib import Path
 from typing import Dict, List, Sequence, Tuple, Optional
 
-import torch as T
-
-from .dataset import PairDataset
-from .model import MLPScore
+from .engine import (
+    CF_ONLY,
+    ScoringEngine,
+    _default_item_feats_path,
+    _default_model_path,
+    _default_user_feats_path,
+    _load_json,
+    _project_root,
+)
 
 
 # ================== Utils ==================
 
 
-def _load_json(path: Path) -> Dict:
-    path = Path(path)
-    if not path.exists() or path.stat().st_size == 0:
-        raise FileNotFoundError(f"Missing/empty JSON: {path}")
-    return json.loads(path.read_text(encoding="utf-8"))
-
-
 def load_titles_from_item_feats(item_feats_path: Path) -> Dict[str, str]:
     """
     Ưu tiên lấy title từ item_feats.json:
@@ -70,108 +67,18 @@ def load_titles_from_catalog(csv_path: Path) -> Dict[str, str]:
     return titles
 
 
-def _project_root() -> Path:
-    """
-    Trả về root của package ai-core:
-    .../packages/ai-core
-    infer.py nằm ở: packages/ai-core/src/ai_core/recsys/neumf/infer.py
-    → parents[4] = packages/ai-core
-    """
-    return Path(__file__).resolve().parents[4]
-
-
-def _default_model_path() -> Path:
-    # models/recsys_mlp/best.pt
-    return _project_root() / "models" / "recsys_mlp" / "best.pt"
-
-
-def _default_user_feats_path() -> Path:
-    # data/processed/user_feats.json
-    return _project_root() / "data" / "processed" / "user_feats.json"
-
-
-def _default_item_feats_path() -> Path:
-    # data/processed/item_feats.json
-    return _project_root() / "data" / "processed" / "item_feats.json"
-
-
 # ================== Core Ranker API ==================
 
 
-class Ranker:
+class Ranker(ScoringEngine):
     """
     B4 – Ranker NeuMF/MLP (inference cho API & backend).
 
-    - Lazy-load model + user_feats + item_feats.
-    - API chính: infer_scores(user_id, candidate_ids).
+    Wrapper mỏng trên ScoringEngine (engine.py): model + feats load 1 lần,
+    mỗi request chỉ còn gather + 1 lần forward theo batch.
+    API chính: infer_scores(user_id, candidate_ids) – điểm CF thuần.
     """
 
-    def __init__(
-        self,
-        model_path: Optional[str | Path] = None,
-        user_feats_path: Optional[str | Path] = None,
-        item_feats_path: Optional[str | Path] = None,
-        device: Optional[str] = None,
-    ) -> None:
-        self.model_path = Path(model_path or _default_model_path())
-        self.user_feats_path = Path(user_feats_path or _default_user_feats_path())
-        self.item_feats_path = Path(item_feats_path or _default_item_feats_path())
-
-        # Device: ưu tiên CPU cho server đơn giản
-        self.device = T.device(device or "cpu")
-
-        self._model: Optional[MLPScore] = None
-        self._user_feats: Optional[Dict[str, Dict]] = None
-        self._item_feats: Optional[Dict[str, Dict]] = None
-
-    # ---- lazy load helpers ----
-
-    def _load_user_feats(self) -> Dict[str, Dict]:
-        if self._user_feats is None:
-            self._user_feats = _load_json(self.user_feats_path)
-        return self._user_feats
-
-    def _load_item_feats(self) -> Dict[str, Dict]:
-        if self._item_feats is None:
-            self._item_feats = _load_json(self.item_feats_path)
-        return self._item_feats
-
-
-    def _load_model(self) -> MLPScore:
-        """
-        Load model từ best.pt. Hỗ trợ:
-        - torch.save(state_dict)
-        - torch.save({"state_dict": state_dict, ...})
-
-        Lưu ý: MLPScore trong project hiện tại KHÔNG nhận tham số in_dim,
-        mà tự tính kích thước input bên trong (dim_text, use_item_riasec...).
-        """
-        if self._model is not None:
-            return self._model
-
-        if not self.model_path.exists():
-            raise FileNotFoundError(f"Missing model checkpoint: {self.model_path}")
-
-        # KHÔNG truyền in_dim nữa
-        model = MLPScore()
-
-        state = T.load(str(self.model_path), map_location=self.device)
-
-        # Hỗ trợ cả dạng {"state_dict": ...}
-        if isinstance(state, dict) and "state_dict" in state and isinstance(
-            state["state_dict"], dict
-        ):
-            state = state["state_dict"]
-
-        model.load_state_dict(state)
-        model.to(self.device)
-        model.eval()
-        self._model = model
-        return model
-
-
-    # ---- public API ----
-
     def infer_scores(
         self,
         user_id: int | str,
@@ -192,46 +99,8 @@ class Ranker:
         List[Tuple[str, float]]
             Danh sách (job_id, score) sort giảm dần theo score.
         """
-        user_feats = self._load_user_feats()
-        item_feats = self._load_item_feats()
-
-        uid = str(user_id)
-        if uid not in user_feats:
-            raise ValueError(
-                f"user_id={uid} không có trong user_feats (len={len(user_feats)})"
-            )
-
-        # Lọc candidate tồn tại trong item_feats
-        cand: List[str] = [j for j in candidate_ids if j in item_feats]
-        if not cand:
-            return []
-
-        # Chuẩn pairs giả (label=0, không dùng trong inference)
-        pairs = [(uid, j, 0.0) for j in cand]
-
-        ds = PairDataset(pairs, user_feats, item_feats)
-        if len(ds) == 0:
-            return []
-
-        # Nếu muốn có thể assert cho chắc, nhưng không truyền in_dim vào model
-        x0, _ = ds[0]
-        # in_dim = x0.shape[-1]  # không dùng nữa
-
-        model = self._load_model()
-
-
-        # Batch infer
-        X = T.stack([ds[i][0] for i in range(len(ds))]).to(self.device)
-        with T.no_grad():
-            logits = model(X)  # [N]
-            scores = T.sigmoid(logits).cpu().numpy().reshape(-1)
-
-        ranked = sorted(
-            zip(cand, scores),
-            key=lambda x: float(x[1]),
-            reverse=True,
-        )
-        return [(jid, float(sc)) for jid, sc in ranked]
+        res = self.score(user_id, list(candidate_ids), weights=CF_ONLY)
+        return [(jid, float(sc)) for jid, sc in zip(res.job_ids, res.final)]
 
 
 # ================== Functional wrapper ==================
@@ -248,10 +117,12 @@ def infer_scores(
     Wrapper functional (giữ backward-compat), chủ yếu dùng cho scripts/CLI.
 
     Nếu truyền sẵn user_feats / item_feats → dùng luôn (không reload).
-    Nếu không truyền → Ranker sẽ tự load từ file mặc định.
+    Nếu không truyền → Ranker dùng chung từ registry (load 1 lần / process, xem registry.py).
     """
     if user_feats is None or item_feats is None:
-        rk = Ranker(model_path=model_path)
+        from .registry import get_registry
+
+        rk = get_registry().get(model_path=model_path)
         return rk.infer_scores(user_id=user_id, candidate_ids=candidates)
 
     # Trường hợp đặc biệt: muốn dùng cache ngoài (ít dùng trong app chính)
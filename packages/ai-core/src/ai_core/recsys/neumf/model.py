@@ -38,3 +38,48 @@ class MLPScore(nn.Module):
         return: [B] logit
         """
         return self.net(x).squeeze(-1)
+
+
+class SplitFirstLayerScorer(nn.Module):
+    """
+    Inference mode cho MLPScore: tách layer đầu tiên theo khối input.
+
+    Linear đầu: h1 = W·[x_user, x_item] + b = W_user·x_user + (W_item·x_item + b)
+
+    - (W_item·x_item + b) được tính sẵn cho toàn bộ catalog lúc load → item_proj [I, H].
+    - Mỗi request chỉ tính W_user·x_user 1 lần rồi cộng vào các row item_proj đã gather.
+    - Các layer còn lại (ReLU, Dropout, Linear, ...) dùng lại nguyên từ model.
+
+    x_user = [user_text, user_riasec, user_big5], x_item = [item_text, item_riasec]
+    (đúng thứ tự cột của PairDataset / FeatureStore).
+    """
+
+    def __init__(self, model: MLPScore, user_dim: int, item_matrix: torch.Tensor):
+        super().__init__()
+        first = model.net[0]
+        if not isinstance(first, nn.Linear):
+            raise TypeError("MLPScore.net[0] phải là nn.Linear")
+        if user_dim + item_matrix.shape[1] != first.in_features:
+            raise ValueError(
+                f"Feature dims ({user_dim} + {item_matrix.shape[1]}) "
+                f"!= first layer in_features ({first.in_features})"
+            )
+
+        W = first.weight.detach()
+        self.register_buffer("w_user", W[:, :user_dim].clone())  # [H, Du]
+
+        item_matrix = item_matrix.to(dtype=W.dtype, device=W.device)
+        with torch.no_grad():
+            item_proj = item_matrix @ W[:, user_dim:].T + first.bias.detach()  # [I, H]
+        self.register_buffer("item_proj", item_proj.contiguous())
+
+        self.tail = model.net[1:]
+
+    def forward(self, user_vec: torch.Tensor, item_rows: torch.Tensor) -> torch.Tensor:
+        """
+        user_vec: [Du] – vector user
+        item_rows: [B] – index row trong item_proj
+        return: [B] logit
+        """
+        h = self.item_proj.index_select(0, item_rows) + self.w_user @ user_vec
+        return self.tail(h).squeeze(-1)
@@ -0,0 +1,214 @@
+# src/ai_core/recsys/neumf/registry.py
+"""
+Registry model B4 (NeuMF/MLP) dùng chung trong process.
+
+- Mỗi bộ (checkpoint, user_feats, item_feats, device) → 1 Ranker, load đúng 1 lần
+  (model + FeatureStore + SplitFirstLayerScorer), dùng chung cho /rank, /recs/top_careers,
+  ranker.service_neumf.
+- Hot reload: khi best.pt / *_feats.json đổi mtime/size (kiểm tra tối đa mỗi
+  NEUMF_RELOAD_CHECK_SEC giây, NEUMF_HOT_RELOAD=0 để tắt) hoặc khi admin gọi
+  POST /models/reload. Hot reload load + warm Ranker mới trên thread nền rồi mới swap →
+  request phát hiện file đổi vẫn trả về bản cũ ngay, không có request nào phải chờ load
+  checkpoint (chỉ lần load đầu tiên của 1 key là đồng bộ).
+- Reload lỗi (file đang ghi dở, checkpoint hỏng) → giữ bản cũ, log WARN, không retry
+  cho tới khi file đổi tiếp.
+
+    from ai_core.recsys.neumf.registry import get_registry
+
+    ranker = get_registry().get()          # Ranker mặc định (models/recsys_mlp/best.pt)
+    ranked = ranker.infer_scores(user_id, candidate_ids)
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .engine import NEUMF_DEVICE, _default_item_feats_path, _default_model_path, _default_user_feats_path
+from .infer import Ranker
+
+NEUMF_HOT_RELOAD = os.getenv("NEUMF_HOT_RELOAD", "1") != "0"
+NEUMF_RELOAD_CHECK_SEC = float(os.getenv("NEUMF_RELOAD_CHECK_SEC", "10"))
+
+_Key = Tuple[str, str, str, str]
+
+
+def _file_sig(path: Path) -> Tuple[float, int]:
+    try:
+        st = path.stat()
+    except OSError:
+        return (0.0, -1)
+    return (st.st_mtime, st.st_size)
+
+
+@dataclass
+class _Entry:
+    ranker: Ranker
+    paths: Tuple[Path, Path, Path]
+    signature: Tuple[Tuple[float, int], ...]
+    loaded_at: float = field(default_factory=time.time)
+    checked_at: float = field(default_factory=time.monotonic)
+    failed_signature: Optional[Tuple[Tuple[float, int], ...]] = None
+    last_error: Optional[str] = None
+    reloads: int = 0
+
+
+class ModelRegistry:
+    def __init__(self, hot_reload: bool = NEUMF_HOT_RELOAD, check_sec: float = NEUMF_RELOAD_CHECK_SEC) -> None:
+        self.hot_reload = hot_reload
+        self.check_sec = check_sec
+        self._entries: Dict[_Key, _Entry] = {}
+        self._lock = threading.Lock()
+        # chỉ 1 thread load checkpoint tại 1 thời điểm
+        self._load_lock = threading.Lock()
+        self._reloader: Optional[threading.Thread] = None
+
+    # ---- helpers ----
+
+    @staticmethod
+    def _paths(model_path, user_feats_path, item_feats_path) -> Tuple[Path, Path, Path]:
+        return (
+            Path(model_path or _default_model_path()).resolve(),
+            Path(user_feats_path or _default_user_feats_path()).resolve(),
+            Path(item_feats_path or _default_item_feats_path()).resolve(),
+        )
+
+    @staticmethod
+    def _signature(paths: Tuple[Path, Path, Path]) -> Tuple[Tuple[float, int], ...]:
+        return tuple(_file_sig(p) for p in paths)
+
+    @staticmethod
+    def _build(paths: Tuple[Path, Path, Path], device: str) -> Ranker:
+        ranker = Ranker(
+            model_path=paths[0],
+            user_feats_path=paths[1],
+            item_feats_path=paths[2],
+            device=device,
+        )
+        ranker.warmup()
+        return ranker
+
+    def _reload_entry(self, key: _Key, entry: _Entry, sig) -> None:
+        try:
+            ranker = self._build(entry.paths, key[3])
+        except Exception as e:
+            entry.failed_signature = sig
+            entry.last_error = repr(e)
+            print(f"[WARN][B4] Reload {entry.paths[0]} failed, keep current model: {e!r}")
+            return
+        with self._lock:
+            self._entries[key] = _Entry(
+                ranker=ranker,
+                paths=entry.paths,
+                signature=sig,
+                reloads=entry.reloads + 1,
+            )
+        print(f"[B4] Reloaded ranker {entry.paths[0]} (reload #{entry.reloads + 1})")
+
+    def _maybe_reload(self, key: _Key, entry: _Entry) -> None:
+        now = time.monotonic()
+        if now - entry.checked_at < self.check_sec:
+            return
+        entry.checked_at = now
+        sig = self._signature(entry.paths)
+        if sig == entry.signature or sig == entry.failed_signature:
+            return
+        # thread khác đang reload → dùng bản hiện tại
+        if not self._load_lock.acquire(blocking=False):
+            return
+
+        def _run() -> None:
+            try:
+                self._reload_entry(key, entry, sig)
+            finally:
+                self._load_lock.release()
+
+        try:
+            # load trên thread nền, request hiện tại dùng luôn bản đang có
+            self._reloader = threading.Thread(target=_run, name="neumf-reload", daemon=True)
+            self._reloader.start()
+        except BaseException:
+            self._load_lock.release()
+            raise
+
+    def wait_for_reload(self, timeout: Optional[float] = None) -> None:
+        """Chờ hot reload nền (nếu có) chạy xong."""
+        reloader = self._reloader
+        if reloader is not None:
+            reloader.join(timeout)
+
+    # ---- public API ----
+
+    def get(
+        self,
+        model_path: str | Path | None = None,
+        user_feats_path: str | Path | None = None,
+        item_feats_path: str | Path | None = None,
+        device: Optional[str] = None,
+    ) -> Ranker:
+        paths = self._paths(model_path, user_feats_path, item_feats_path)
+        # mặc định NEUMF_DEVICE, dùng chung cho mọi consumer
+        key: _Key = (str(paths[0]), str(paths[1]), str(paths[2]), device or NEUMF_DEVICE)
+
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._load_lock:
+                entry = self._entries.get(key)
+                if entry is None:
+                    sig = self._signature(paths)
+                    ranker = self._build(paths, key[3])
+                    entry = _Entry(ranker=ranker, paths=paths, signature=sig)
+                    with self._lock:
+                        self._entries[key] = entry
+                    print(f"[BOOT][B4] Loaded ranker {paths[0]}")
+            return entry.ranker
+
+        if self.hot_reload:
+            self._maybe_reload(key, entry)
+            entry = self._entries[key]
+        return entry.ranker
+
+    def reload(self, force: bool = False) -> List[Dict[str, Any]]:
+        """
+        Admin trigger: reload các model đã load (force=True → reload kể cả khi file không đổi).
+        """
+        with self._load_lock:
+            for key, entry in list(self._entries.items()):
+                sig = self._signature(entry.paths)
+                if force or sig != entry.signature:
+                    self._reload_entry(key, entry, sig)
+        return self.status()
+
+    def status(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            entries = list(self._entries.items())
+        return [
+            {
+                "model_path": key[0],
+                "user_feats_path": key[1],
+                "item_feats_path": key[2],
+                "device": key[3],
+                "loaded_at": entry.loaded_at,
+                "reloads": entry.reloads,
+                "stale": self._signature(entry.paths) != entry.signature,
+                "last_error": entry.last_error,
+            }
+            for key, entry in entries
+        ]
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ModelRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
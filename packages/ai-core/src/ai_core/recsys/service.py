@@ -16,6 +16,7 @@ from typing import Iterable, List, TypedDict, Any
 # File này chỉ phụ thuộc vào Ranker, không import InferRuntime/ScoredItem
 # để tránh lỗi ModuleNotFound trong repo hiện tại.
 from .neumf.infer import Ranker
+from .neumf.registry import get_registry
 
 
 class ScoreDict(TypedDict):
@@ -29,24 +30,18 @@ class ScoreDict(TypedDict):
     rank_score: float
 
 
-# Singleton Ranker (lazy init) – chỉ load model/feature 1 lần
-_rk: Ranker | None = None
-
-
 def get_ranker() -> Ranker:
     """
-    Trả về instance Ranker dùng chung trong process.
+    Trả về instance Ranker dùng chung trong process (neumf/registry.py).
 
     Ranker chịu trách nhiệm:
     - load feature (user_feats, item_feats)
     - load model best.pt
     - infer điểm cho (user_id, job_id)
+
+    Registry load 1 lần, tự reload khi checkpoint / feats đổi → không cache Ranker ở đây.
     """
-    global _rk
-    if _rk is None:
-        # Ranker() tự lo đường dẫn model/feats theo thiết kế trong .neumf.infer
-        _rk = Ranker()
-    return _rk
+    return get_registry().get()
 
 
 def infer_scores(user_id: int, candidate_ids: Iterable[str]) -> List[ScoreDict]:
@@ -0,0 +1,105 @@
+# src/ai_core/retrieval/service.py
+"""
+Service layer cho B3 – Retrieval.
+
+Chọn backend theo config RETR_BACKEND:
+- "pgvector": query ai.retrieval_jobs_visbert trên Postgres (mặc định)
+- "memory"  : exact cosine trong RAM (service_memory.InMemoryJobIndex)
+
+Các route chỉ nên gọi qua module này để đổi backend không phải sửa code.
+"""
+
+from __future__ import annotations
+
+from typing import List, Tuple
+
+import numpy as np
+
+from ai_core.traits.loader import AssessmentSnapshot, load_traits_and_embedding_for_assessment
+from api.config import RETR_BACKEND
+
+from . import service_pgvector
+from .service_pgvector import Candidate
+
+
+def search_candidates_for_embedding(user_vec: np.ndarray, top_n: int = 200) -> List[Candidate]:
+    if RETR_BACKEND == "memory":
+        from . import service_memory
+
+        return service_memory.search_candidates_for_embedding(user_vec, top_n=top_n)
+    return service_pgvector.search_candidates_for_embedding(user_vec, top_n=top_n)
+
+
+def search_candidates_for_user(user_id: int, top_n: int = 200) -> List[Candidate]:
+    """
+    Lấy embedding essay mới nhất của user (ai.user_embeddings) rồi search theo backend đã chọn.
+    """
+    user_vec = service_pgvector._fetch_user_vector(user_id)
+    return search_candidates_for_embedding(user_vec, top_n=top_n)
+
+
+def _snapshot_from(res: service_pgvector.AssessmentCandidates) -> AssessmentSnapshot:
+    return AssessmentSnapshot(
+        user_id=res.user_id,
+        traits={"a_type": res.a_type, "scores": res.scores},
+        embedding_vector=res.embedding,
+    )
+
+
+def snapshot_and_candidates_for_assessment(
+    assessment_id: int,
+    top_n: int = 200,
+) -> Tuple[AssessmentSnapshot, List[Candidate]]:
+    """
+    Snapshot assessment + retrieval B3.
+    - pgvector: 1 round trip (CTE assessment → embedding essay → vector search)
+    - memory  : 1 query snapshot, search trong RAM
+    """
+    if RETR_BACKEND == "memory":
+        snapshot = load_traits_and_embedding_for_assessment(assessment_id)
+        return snapshot, search_candidates_for_embedding(snapshot.embedding_vector, top_n=top_n)
+
+    res = service_pgvector.search_candidates_for_assessment(assessment_id, top_n=top_n)
+    return _snapshot_from(res), res.candidates
+
+
+# ---------- async (route async) ----------
+# pgvector: I/O trên AsyncConnectionPool; memory: search trong RAM (nhanh, chạy thẳng).
+
+async def asearch_candidates_for_embedding(user_vec: np.ndarray, top_n: int = 200) -> List[Candidate]:
+    if RETR_BACKEND == "memory":
+        from . import service_memory
+
+        return service_memory.search_candidates_for_embedding(user_vec, top_n=top_n)
+    return await service_pgvector.asearch_candidates_for_embedding(user_vec, top_n=top_n)
+
+
+async def asearch_candidates_for_user(user_id: int, top_n: int = 200) -> List[Candidate]:
+    user_vec = await service_pgvector.afetch_user_vector(user_id)
+    return await asearch_candidates_for_embedding(user_vec, top_n=top_n)
+
+
+async def asnapshot_and_candidates_for_assessment(
+    assessment_id: int,
+    top_n: int = 200,
+) -> Tuple[AssessmentSnapshot, List[Candidate]]:
+    if RETR_BACKEND == "memory":
+        # snapshot 1 query (sync pool) → chạy trong threadpool, không block event loop
+        from starlette.concurrency import run_in_threadpool
+
+        snapshot = await run_in_threadpool(load_traits_and_embedding_for_assessment, assessment_id)
+        return snapshot, await asearch_candidates_for_embedding(snapshot.embedding_vector, top_n=top_n)
+
+    res = await service_pgvector.asearch_candidates_for_assessment(assessment_id, top_n=top_n)
+    return _snapshot_from(res), res.candidates
+
+
+def refresh_index() -> int:
+    """
+    Refresh hook: nạp lại index RAM (no-op với pgvector). Trả về số nghề trong index.
+    """
+    if RETR_BACKEND != "memory":
+        return 0
+    from . import service_memory
+
+    return len(service_memory.refresh_index())
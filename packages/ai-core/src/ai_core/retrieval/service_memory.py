@@ -0,0 +1,157 @@
+# src/ai_core/retrieval/service_memory.py
+"""
+B3 – Retrieval exact top-N cosine trong RAM (thay cho round trip pgvector).
+
+Catalog chỉ ~1k nghề (data/catalog/jobs.csv: 924 dòng) nên giữ toàn bộ ma trận
+embedding [N, 768] trong process là đủ nhỏ:
+- 1 phép matmul (N x 768) + argpartition → exact top-N, không cần IVF/probes.
+- Nguồn dữ liệu: file NPY + index JSON (encode_jobs.py) hoặc load 1 lần từ DB.
+- refresh_index() để nạp lại sau khi reload catalog (pgvector_load.py, ...).
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from typing import List, Sequence
+
+import numpy as np
+
+from ai_core.utils.pg_pool import get_pool
+from api.config import RETR_EMB_NPY, RETR_INDEX_JSON, RETR_MEMORY_SOURCE, RETR_TABLE
+
+from .service_pgvector import Candidate, _pgvector_to_np
+
+
+def _l2_normalize_rows(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+class InMemoryJobIndex:
+    """
+    Ma trận embedding nghề đã L2-normalize + danh sách job_id (cùng thứ tự row).
+
+    score_sim = cosine similarity, giống 1 - (embedding <=> q) của pgvector.
+    """
+
+    def __init__(self, job_ids: Sequence[str], embeddings: np.ndarray) -> None:
+        emb = np.asarray(embeddings, dtype="float32")
+        if emb.ndim != 2:
+            raise ValueError(f"Expected (N,D) embeddings, got {emb.shape}")
+        if len(job_ids) != emb.shape[0]:
+            raise ValueError(f"Row mismatch: job_ids={len(job_ids)} vs emb={emb.shape[0]}")
+
+        self.job_ids: List[str] = [str(j) for j in job_ids]
+        self.matrix = np.ascontiguousarray(_l2_normalize_rows(emb), dtype="float32")
+
+    def __len__(self) -> int:
+        return len(self.job_ids)
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1])
+
+    # ---- loaders ----
+
+    @classmethod
+    def from_npy(cls, emb_path: str | Path, index_path: str | Path) -> "InMemoryJobIndex":
+        """
+        emb_path: .npy (N, D) từ encode_jobs.py
+        index_path: JSON list[{job_id, title, ...}] cùng thứ tự row
+        """
+        emb_path, index_path = Path(emb_path), Path(index_path)
+        if not emb_path.exists():
+            raise FileNotFoundError(emb_path)
+        if not index_path.exists():
+            raise FileNotFoundError(index_path)
+
+        emb = np.load(emb_path)
+        metas = json.loads(index_path.read_text(encoding="utf-8"))
+        return cls([m["job_id"] for m in metas], emb)
+
+    @classmethod
+    def from_db(cls, table: str = RETR_TABLE) -> "InMemoryJobIndex":
+        """
+        Đọc toàn bộ (job_id, embedding) từ bảng retrieval 1 lần.
+        """
+        with get_pool().connection() as conn, conn.cursor(binary=True) as cur:
+            cur.execute(f"SELECT job_id, embedding FROM {table} ORDER BY job_id")
+            rows = cur.fetchall()
+
+        if not rows:
+            raise ValueError(f"{table} is empty")
+
+        return cls([r[0] for r in rows], np.stack([_pgvector_to_np(r[1]) for r in rows]))
+
+    # ---- search ----
+
+    def search(self, user_vec: np.ndarray, top_n: int = 200) -> List[Candidate]:
+        q = np.asarray(user_vec, dtype="float32").reshape(-1)
+        if q.shape[0] != self.dim:
+            raise ValueError(f"Query dim {q.shape[0]} != index dim {self.dim}")
+
+        n = len(self.job_ids)
+        k = min(int(top_n), n)
+        if k <= 0:
+            return []
+
+        q = q / (np.linalg.norm(q) + 1e-12)
+        sims = self.matrix @ q  # [N]
+
+        if k < n:
+            # argpartition chọn tuỳ ý giữa các job cùng điểm ở biên top-k → lấy đủ mọi job
+            # >= điểm thứ k rồi mới cắt theo tie-breaker
+            kth = sims[np.argpartition(-sims, k - 1)[k - 1]]
+            top = np.flatnonzero(sims >= kth)
+        else:
+            top = np.arange(n)
+        # sort giảm dần theo score, tie-breaker theo job_id cho deterministic
+        order = sorted(top.tolist(), key=lambda i: (-float(sims[i]), self.job_ids[i]))[:k]
+
+        return [Candidate(job_id=self.job_ids[i], score_sim=float(sims[i])) for i in order]
+
+
+# ---------- singleton + refresh hook ----------
+
+_INDEX: InMemoryJobIndex | None = None
+_LOCK = threading.Lock()
+
+
+def _build_index() -> InMemoryJobIndex:
+    if RETR_MEMORY_SOURCE == "db":
+        idx = InMemoryJobIndex.from_db()
+    else:
+        idx = InMemoryJobIndex.from_npy(RETR_EMB_NPY, RETR_INDEX_JSON)
+    print(f"[BOOT][B3] In-memory job index: source={RETR_MEMORY_SOURCE}, jobs={len(idx)}, dim={idx.dim}")
+    return idx
+
+
+def get_index() -> InMemoryJobIndex:
+    global _INDEX
+    if _INDEX is None:
+        with _LOCK:
+            if _INDEX is None:
+                _INDEX = _build_index()
+    return _INDEX
+
+
+def refresh_index() -> InMemoryJobIndex:
+    """
+    Nạp lại index (gọi sau khi catalog/embedding nghề thay đổi).
+    Request đang chạy vẫn dùng index cũ cho tới khi swap xong.
+    """
+    global _INDEX
+    new_idx = _build_index()
+    with _LOCK:
+        _INDEX = new_idx
+    return new_idx
+
+
+def search_candidates_for_embedding(user_vec: np.ndarray, top_n: int = 200) -> List[Candidate]:
+    """
+    Retrieval B3 theo VECTOR, exact cosine trong RAM.
+    """
+    return get_index().search(user_vec, top_n=top_n)
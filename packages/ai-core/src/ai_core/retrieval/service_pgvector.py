@@ -1,11 +1,11 @@
 # src/ai_core/retrieval/service_pgvector.py
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from typing import Any, List
 
 import numpy as np
-from psycopg_pool import ConnectionPool
 
-from api.config import get_pg_dsn  # helper lấy DATABASE_URL
+from ai_core.utils.pg_pool import get_async_pool, get_pool
+from ai_core.utils.vector_codec import EMB_DIM, to_numpy, to_param
 
 
 @dataclass
@@ -14,45 +14,115 @@ class Candidate:
     score_sim: float  # 0–1, similarity
 
 
-# Khởi tạo pool 1 lần, dùng chung
-pool = ConnectionPool(get_pg_dsn())
+@dataclass
+class AssessmentCandidates:
+    """Snapshot assessment (traits + embedding essay) kèm kết quả retrieval, từ 1 query."""
+    user_id: int
+    a_type: Any
+    scores: Any
+    embedding: np.ndarray
+    candidates: List[Candidate] = field(default_factory=list)
 
 
 # ---------- helper parse / format pgvector ----------
 
 def _pgvector_to_np(v) -> np.ndarray:
     """
-    Chuyển giá trị pgvector (có thể trả về dạng list / tuple / str / bytes)
+    Chuyển giá trị pgvector (pgvector.Vector từ loader binary, list, str, ...)
     thành np.ndarray(float32).
     """
-    if v is None:
-        raise ValueError("pgvector value is None")
+    return to_numpy(v)
+
+
+# ---------- SQL (dùng chung cho bản sync và async) ----------
+
+_USER_VECTOR_SQL = """
+    SELECT emb
+    FROM ai.user_embeddings
+    WHERE user_id = %s
+      AND source = 'essay'
+    ORDER BY built_at DESC
+    LIMIT 1
+"""
+
+_SEARCH_SQL = """
+    SELECT job_id,
+           1 - (embedding <=> %b::vector(768)) AS score_sim
+    FROM ai.retrieval_jobs_visbert
+    ORDER BY embedding <-> %b::vector(768)
+    LIMIT %s
+"""
+
+# Snapshot + retrieval B3 trong 1 round trip:
+# core.assessments → embedding essay mới nhất của user (ai.user_embeddings)
+# → top_n nghề gần nhất trên ai.retrieval_jobs_visbert (LATERAL, vẫn dùng index ivfflat).
+# Candidate gom bằng array_agg theo đúng thứ tự khoảng cách → trả về đúng 1 dòng.
+_ASSESSMENT_SEARCH_SQL = """
+    WITH a AS (
+        SELECT id, user_id, a_type, scores
+        FROM core.assessments
+        WHERE id = %s
+        LIMIT 1
+    ),
+    u AS (
+        SELECT ue.emb
+        FROM a
+        JOIN LATERAL (
+            SELECT emb
+            FROM ai.user_embeddings
+            WHERE user_id = a.user_id
+              AND source = 'essay'
+            ORDER BY built_at DESC
+            LIMIT 1
+        ) ue ON TRUE
+    ),
+    c AS (
+        SELECT j.job_id,
+               1 - (j.embedding <=> u.emb) AS score_sim,
+               j.dist
+        FROM u
+        CROSS JOIN LATERAL (
+            SELECT job_id, embedding, embedding <-> u.emb AS dist
+            FROM ai.retrieval_jobs_visbert
+            ORDER BY embedding <-> u.emb
+            LIMIT %s
+        ) j
+    )
+    SELECT a.user_id,
+           a.a_type,
+           a.scores,
+           (SELECT emb FROM u) AS emb,
+           (SELECT array_agg(job_id ORDER BY dist, job_id) FROM c) AS job_ids,
+           (SELECT array_agg(score_sim ORDER BY dist, job_id) FROM c) AS sims
+    FROM a
+"""
 
-    # Nếu driver trả về list/tuple/ndarray thì đơn giản
-    if isinstance(v, (list, tuple, np.ndarray)):
-        return np.asarray(v, dtype="float32")
 
-    # Nếu trả về bytes -> decode
-    if isinstance(v, (bytes, bytearray)):
-        v = v.decode("utf-8", errors="ignore")
+def _user_vector_from_row(user_id: int, row) -> np.ndarray:
+    if not row:
+        raise ValueError(f"No essay embedding for user_id={user_id}")
+    return _pgvector_to_np(row[0])
 
-    # Fallback: string "[0.01,0.02,...]"
-    s = str(v).strip().strip("[](){}")
-    if not s:
-        raise ValueError("Empty pgvector string")
 
-    parts = [p.strip() for p in s.replace("\n", "").split(",") if p.strip()]
-    vals = [float(p) for p in parts]
-    return np.asarray(vals, dtype="float32")
+def _candidates_from_rows(rows) -> List[Candidate]:
+    return [Candidate(job_id=r[0], score_sim=float(r[1])) for r in rows]
 
 
-def _np_to_pgvector_str(vec: np.ndarray) -> str:
-    """
-    Chuyển np.ndarray -> string chuẩn cho pgvector, ví dụ: "[0.1,0.2,...]".
-    Psycopg sẽ gửi string này, còn server cast ::vector(768).
-    """
-    flat = vec.astype("float32").reshape(-1)
-    return "[" + ",".join(f"{float(x):.6f}" for x in flat) + "]"
+def _assessment_candidates_from_row(assessment_id: int, row) -> AssessmentCandidates:
+    if not row:
+        raise ValueError(f"Assessment {assessment_id} not found")
+    user_id = int(row[0])
+    if row[3] is None:
+        raise ValueError(f"No essay embedding for user_id={user_id}")
+
+    job_ids, sims = row[4] or [], row[5] or []
+    return AssessmentCandidates(
+        user_id=user_id,
+        a_type=row[1],
+        scores=row[2],
+        embedding=_pgvector_to_np(row[3]),
+        candidates=[Candidate(job_id=j, score_sim=float(s)) for j, s in zip(job_ids, sims, strict=True)],
+    )
 
 
 # ---------- core logic ----------
@@ -62,45 +132,22 @@ def _fetch_user_vector(user_id: int) -> np.ndarray:
     Lấy embedding essay mới nhất của user từ ai.user_embeddings.
     Schema thật: emb vector(768)
     """
-    with pool.connection() as conn, conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT emb
-            FROM ai.user_embeddings
-            WHERE user_id = %s
-              AND source = 'essay'
-            ORDER BY built_at DESC
-            LIMIT 1
-            """,
-            (user_id,),
-        )
-        row = cur.fetchone()
-        if not row:
-            raise ValueError(f"No essay embedding for user_id={user_id}")
-
-        return _pgvector_to_np(row[0])
+    with get_pool().connection() as conn, conn.cursor(binary=True) as cur:
+        cur.execute(_USER_VECTOR_SQL, (user_id,))
+        return _user_vector_from_row(user_id, cur.fetchone())
 
 
 def search_candidates_for_embedding(user_vec: np.ndarray, top_n: int = 200) -> List[Candidate]:
     """
     Retrieval B3 theo VECTOR của bài test, không theo user_id.
     """
-    vec_str = _np_to_pgvector_str(user_vec)
+    vec = to_param(user_vec, dim=EMB_DIM)
 
-    with pool.connection() as conn, conn.cursor() as cur:
-        cur.execute(
-            """
-            SELECT job_id,
-                   1 - (embedding <=> %s::vector(768)) AS score_sim
-            FROM ai.retrieval_jobs_visbert
-            ORDER BY embedding <-> %s::vector(768)
-            LIMIT %s
-            """,
-            (vec_str, vec_str, top_n),
-        )
+    with get_pool().connection() as conn, conn.cursor(binary=True) as cur:
+        cur.execute(_SEARCH_SQL, (vec, vec, top_n))
         rows = cur.fetchall()
 
-    return [Candidate(job_id=r[0], score_sim=float(r[1])) for r in rows]
+    return _candidates_from_rows(rows)
 
 def search_candidates_for_user(user_id: int, top_n: int = 200) -> List[Candidate]:
     """
@@ -111,11 +158,43 @@ def search_candidates_for_user(user_id: int, top_n: int = 200) -> List[Candidate
     return search_candidates_for_embedding(user_vec, top_n=top_n)
 
 
+def search_candidates_for_assessment(assessment_id: int, top_n: int = 200) -> AssessmentCandidates:
+    """
+    Snapshot assessment + retrieval B3 trong 1 round trip (xem _ASSESSMENT_SEARCH_SQL).
+    """
+    with get_pool().connection() as conn, conn.cursor(binary=True) as cur:
+        cur.execute(_ASSESSMENT_SEARCH_SQL, (assessment_id, top_n))
+        row = cur.fetchone()
+
+    return _assessment_candidates_from_row(assessment_id, row)
+
+
+# ---------- async (route async, AsyncConnectionPool) ----------
+
+async def afetch_user_vector(user_id: int) -> np.ndarray:
+    async with (await get_async_pool()).connection() as conn:
+        cur = await conn.execute(_USER_VECTOR_SQL, (user_id,), binary=True)
+        return _user_vector_from_row(user_id, await cur.fetchone())
+
+
+async def asearch_candidates_for_embedding(user_vec: np.ndarray, top_n: int = 200) -> List[Candidate]:
+    vec = to_param(user_vec, dim=EMB_DIM)
+    async with (await get_async_pool()).connection() as conn:
+        cur = await conn.execute(_SEARCH_SQL, (vec, vec, top_n), binary=True)
+        return _candidates_from_rows(await cur.fetchall())
+
+
+async def asearch_candidates_for_assessment(assessment_id: int, top_n: int = 200) -> AssessmentCandidates:
+    async with (await get_async_pool()).connection() as conn:
+        cur = await conn.execute(_ASSESSMENT_SEARCH_SQL, (assessment_id, top_n), binary=True)
+        return _assessment_candidates_from_row(assessment_id, await cur.fetchone())
+
+
 def list_user_ids_with_embeddings(source: str = "essay") -> List[int]:
     """
     Trả về list user_id có embedding trong ai.user_embeddings, để test B3 cho ALL users.
     """
-    with pool.connection() as conn, conn.cursor() as cur:
+    with get_pool().connection() as conn, conn.cursor() as cur:
         cur.execute(
             """
             SELECT DISTINCT user_id
@@ -0,0 +1,138 @@
+# src/ai_core/utils/inference_pool.py
+"""
+Executor riêng cho model inference (torch / onnx) của ai-core.
+
+Route async không chạy model trên event loop, cũng không đẩy vào threadpool mặc định
+của FastAPI (40 thread, mỗi thread lại mở torch.get_num_threads() thread intra-op
+→ oversubscribe core, p99 tăng vọt khi tải cao). Thay vào đó:
+
+- ThreadPoolExecutor INFER_WORKERS thread, dùng riêng cho model work.
+- torch.set_num_threads(INFER_TORCH_THREADS) 1 lần / process (configure_torch_threads),
+  INFER_WORKERS * INFER_TORCH_THREADS ≈ số core.
+- Tối đa INFER_MAX_PENDING việc (đang chạy + chờ); vượt → InferenceOverloaded (route trả 503).
+
+Đường micro-batch (utils/micro_batch.py) đã có worker thread riêng: route gọi
+submit_batched(batcher, x) → không chiếm slot executor (giữ nguyên kích thước batch) nhưng
+vẫn tính vào cùng hạn mức INFER_MAX_PENDING; worker của batcher đã nằm trong
+INFER_TORCH_THREADS (xem api/config.py).
+
+    from ai_core.utils.inference_pool import run_inference
+
+    scored = await run_inference(infer_scores, user_id, candidate_ids)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, TypeVar
+
+from api.config import INFER_BATCHER_THREADS, INFER_MAX_PENDING, INFER_TORCH_THREADS, INFER_WORKERS
+
+if TYPE_CHECKING:
+    from ai_core.utils.micro_batch import MicroBatcher
+
+R = TypeVar("R")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+_pending = 0
+_torch_configured = False
+
+
+class InferenceOverloaded(RuntimeError):
+    """Hàng đợi inference đã đầy (INFER_MAX_PENDING)."""
+
+
+def configure_torch_threads() -> None:
+    """torch.set_num_threads theo INFER_TORCH_THREADS (gọi lúc boot, idempotent)."""
+    global _torch_configured
+    if _torch_configured:
+        return
+    import torch
+
+    torch.set_num_threads(INFER_TORCH_THREADS)
+    try:
+        # chỉ set được trước khi có parallel work đầu tiên
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    _torch_configured = True
+    print(
+        f"[BOOT][INFER] workers={INFER_WORKERS} | batchers={INFER_BATCHER_THREADS} | "
+        f"torch_threads={INFER_TORCH_THREADS} | max_pending={INFER_MAX_PENDING}"
+    )
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                configure_torch_threads()
+                _executor = ThreadPoolExecutor(max_workers=INFER_WORKERS, thread_name_prefix="ai-infer")
+    return _executor
+
+
+def _release(_: Future) -> None:
+    global _pending
+    with _lock:
+        _pending -= 1
+
+
+def _acquire() -> None:
+    global _pending
+    with _lock:
+        if _pending >= INFER_MAX_PENDING:
+            raise InferenceOverloaded(f"Inference queue full ({INFER_MAX_PENDING} pending)")
+        _pending += 1
+
+
+def submit_inference(fn: Callable[..., R], *args: Any, **kwargs: Any) -> "Future[R]":
+    executor = _get_executor()
+    _acquire()
+    try:
+        fut = executor.submit(functools.partial(fn, *args, **kwargs))
+    except BaseException:
+        _release(None)
+        raise
+    fut.add_done_callback(_release)
+    return fut
+
+
+def submit_batched(batcher: "MicroBatcher[Any, R]", item: Any) -> "Future[R]":
+    """batcher.submit(item), tính vào hạn mức INFER_MAX_PENDING chung với executor."""
+    configure_torch_threads()
+    _acquire()
+    try:
+        fut = batcher.submit(item)
+    except BaseException:
+        _release(None)
+        raise
+    fut.add_done_callback(_release)
+    return fut
+
+
+async def run_inference(fn: Callable[..., R], *args: Any, **kwargs: Any) -> R:
+    """Chạy fn(*args, **kwargs) trên executor inference, await không block event loop."""
+    return await asyncio.wrap_future(submit_inference(fn, *args, **kwargs))
+
+
+def shutdown() -> None:
+    global _executor
+    with _lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def stats() -> Dict[str, Any]:
+    return {
+        "workers": INFER_WORKERS,
+        "batcher_threads": INFER_BATCHER_THREADS,
+        "torch_threads": INFER_TORCH_THREADS,
+        "max_pending": INFER_MAX_PENDING,
+        "pending": _pending,
+    }
@@ -0,0 +1,105 @@
+# src/ai_core/utils/micro_batch.py
+"""
+Dynamic micro-batching cho model inference trên CPU.
+
+Các request đồng thời (mỗi request 1 câu) được gom trong vài ms (max_wait_ms)
+hoặc tới khi đủ max_batch, rồi chạy 1 lần forward theo batch ở 1 worker thread.
+Mỗi caller nhận kết quả qua concurrent.futures.Future.
+
+    batcher = MicroBatcher(encode_texts, max_batch=16, max_wait_ms=5, name="sbert")
+    vec = batcher(text)            # block tới khi batch chứa text chạy xong
+    fut = batcher.submit(text)     # hoặc lấy Future
+"""
+
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    fn: nhận list[T] (<= max_batch phần tử), trả về Sequence[R] cùng độ dài, cùng thứ tự.
+    Nếu fn raise → mọi Future trong batch đó nhận exception.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[List[T]], Sequence[R]],
+        max_batch: int = 16,
+        max_wait_ms: float = 5.0,
+        name: str = "micro-batch",
+    ) -> None:
+        if max_batch < 1:
+            raise ValueError("max_batch must be >= 1")
+        self.fn = fn
+        self.max_batch = int(max_batch)
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.name = name
+
+        self._queue: "queue.Queue[Tuple[T, Future]]" = queue.Queue()
+        self._worker: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    # ---- public API ----
+
+    def submit(self, item: T) -> "Future[R]":
+        self._ensure_worker()
+        fut: Future = Future()
+        self._queue.put((item, fut))
+        return fut
+
+    def __call__(self, item: T, timeout: float | None = None) -> R:
+        return self.submit(item).result(timeout=timeout)
+
+    # ---- worker ----
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> List[Tuple[T, Future]]:
+        batch = [self._queue.get()]  # block tới khi có request đầu tiên
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            # caller đã cancel thì bỏ qua
+            batch = [(item, fut) for item, fut in batch if fut.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            try:
+                results = self.fn([item for item, _ in batch])
+                if len(results) != len(batch):
+                    raise RuntimeError(
+                        f"[{self.name}] batch fn returned {len(results)} results for {len(batch)} inputs"
+                    )
+            except BaseException as e:  # noqa: BLE001 – chuyển lỗi cho từng caller
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            for (_, fut), res in zip(batch, results, strict=True):
+                fut.set_result(res)
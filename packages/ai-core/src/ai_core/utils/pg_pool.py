@@ -0,0 +1,148 @@
+# src/ai_core/utils/pg_pool.py
+"""
+Pool Postgres (psycopg 3) DUY NHẤT cho mỗi process ai-core.
+
+Dùng chung cho mọi truy cập DB trong API: retrieval pgvector (service_pgvector,
+service_memory.from_db, /search/search), traits loader, cache essay (Postgres tier).
+
+- Lazy: pool chỉ mở ở lần get_pool() đầu tiên (import module không kết nối DB).
+- configure hook chạy 1 lần / connection khi pool tạo connection:
+    * đăng ký codec pgvector binary (utils/vector_codec.py)
+    * session settings: ivfflat.probes = IVF_PROBES
+  → route không phải SET lại mỗi request.
+- Kích thước: AI_DB_POOL_MIN / AI_DB_POOL_MAX (tổng backend slot mà 1 worker chiếm).
+- Route async dùng get_async_pool() (psycopg AsyncConnectionPool, cùng configure hook,
+  kích thước AI_DB_ASYNC_POOL_MAX): I/O không chiếm thread nào.
+
+    from ai_core.utils.pg_pool import get_pool
+
+    with get_pool().connection() as conn, conn.cursor(binary=True) as cur:
+        cur.execute("... ORDER BY embedding <=> %b::vector LIMIT %s", (to_param(vec), k))
+
+    async with (await get_async_pool()).connection() as conn:
+        cur = await conn.execute("...", params, binary=True)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+from typing import Any, Dict, Optional
+
+from ai_core.utils.vector_codec import configure_connection
+
+AI_DB_POOL_MIN = int(os.getenv("AI_DB_POOL_MIN", "1"))
+AI_DB_POOL_MAX = int(os.getenv("AI_DB_POOL_MAX", "10"))
+AI_DB_POOL_TIMEOUT_SEC = float(os.getenv("AI_DB_POOL_TIMEOUT_SEC", "30"))
+AI_DB_ASYNC_POOL_MAX = int(os.getenv("AI_DB_ASYNC_POOL_MAX", "10"))
+
+_pool = None
+_async_pool = None
+_lock = threading.Lock()
+_async_lock: Optional[asyncio.Lock] = None
+
+
+def _ivf_probes() -> int:
+    from api.config import IVF_PROBES
+
+    return IVF_PROBES
+
+
+def configure_session(conn) -> None:
+    """
+    Hook `configure` của pool: codec pgvector + session settings cho connection mới.
+    """
+    configure_connection(conn)
+    # set_config(..., false) = SET cấp session, giữ nguyên suốt vòng đời connection
+    conn.execute("SELECT set_config('ivfflat.probes', %s, false)", (str(_ivf_probes()),))
+    # pool yêu cầu connection IDLE sau configure
+    if not conn.autocommit:
+        conn.commit()
+
+
+async def configure_session_async(conn) -> None:
+    """configure_session cho AsyncConnectionPool."""
+    from pgvector.psycopg import register_vector_async
+
+    await register_vector_async(conn)
+    await conn.execute("SELECT set_config('ivfflat.probes', %s, false)", (str(_ivf_probes()),))
+    if not conn.autocommit:
+        await conn.commit()
+
+
+def get_pool():
+    """ConnectionPool dùng chung của process (tạo + mở ở lần gọi đầu)."""
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                from psycopg_pool import ConnectionPool
+
+                from api.config import get_pg_dsn
+
+                _pool = ConnectionPool(
+                    get_pg_dsn(),
+                    min_size=AI_DB_POOL_MIN,
+                    max_size=max(AI_DB_POOL_MIN, AI_DB_POOL_MAX),
+                    timeout=AI_DB_POOL_TIMEOUT_SEC,
+                    configure=configure_session,
+                    name="ai-core",
+                    open=True,
+                )
+    return _pool
+
+
+async def get_async_pool():
+    """AsyncConnectionPool dùng chung (mở ở lần await đầu tiên, trên event loop của app)."""
+    global _async_pool, _async_lock
+    if _async_pool is None:
+        if _async_lock is None:
+            _async_lock = asyncio.Lock()
+        async with _async_lock:
+            if _async_pool is None:
+                from psycopg_pool import AsyncConnectionPool
+
+                from api.config import get_pg_dsn
+
+                pool = AsyncConnectionPool(
+                    get_pg_dsn(),
+                    min_size=min(AI_DB_POOL_MIN, AI_DB_ASYNC_POOL_MAX),
+                    max_size=max(1, AI_DB_ASYNC_POOL_MAX),
+                    timeout=AI_DB_POOL_TIMEOUT_SEC,
+                    configure=configure_session_async,
+                    name="ai-core-async",
+                    open=False,
+                )
+                await pool.open()
+                _async_pool = pool
+    return _async_pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+async def close_async_pool() -> None:
+    global _async_pool
+    pool, _async_pool = _async_pool, None
+    if pool is not None:
+        await pool.close()
+
+
+def _stats(pool) -> Optional[Dict[str, Any]]:
+    if pool is None:
+        return None
+    stats = dict(pool.get_stats())
+    stats["min_size"] = pool.min_size
+    stats["max_size"] = pool.max_size
+    return stats
+
+
+def pool_stats() -> Dict[str, Optional[Dict[str, Any]]]:
+    """Thống kê pool sync / async (cho /debug/config); None nếu pool chưa được mở."""
+    return {"sync": _stats(_pool), "async": _stats(_async_pool)}
@@ -0,0 +1,120 @@
+# src/ai_core/utils/vector_codec.py
+"""
+Codec dùng chung cho cột pgvector (vector(768)) trong ai-core.
+
+- psycopg 3: đăng ký dumper/loader BINARY của pgvector cho connection
+  → embedding đi trên wire dạng buffer float32, đọc về là pgvector.Vector
+  (np.frombuffer, không parse string).
+- psycopg2 / SQLAlchemy: đăng ký adapter pgvector (psycopg2 chỉ hỗ trợ text
+  protocol, nhưng ít nhất không phải tự format / json.loads nữa).
+- to_numpy(): chuẩn hoá mọi kiểu giá trị driver trả về → np.ndarray(float32).
+
+Cách dùng với psycopg 3 (đọc/ghi binary):
+
+    pool = ConnectionPool(dsn, configure=configure_connection)
+    with pool.connection() as conn, conn.cursor(binary=True) as cur:
+        cur.execute("... WHERE embedding <=> %b ...", (to_param(vec),))
+"""
+
+from __future__ import annotations
+
+import ast
+import json
+from typing import Any, Optional
+
+import numpy as np
+from pgvector import Vector
+
+# cột embedding (retrieval.jobs / ai.user_embeddings): vector(768)
+EMB_DIM = 768
+
+
+def _check_dim(arr: np.ndarray, dim: Optional[int]) -> np.ndarray:
+    if dim is not None and arr.size != dim:
+        raise ValueError(f"Expected embedding dim {dim}, got {arr.size}")
+    return arr
+
+
+def configure_connection(conn) -> None:
+    """
+    Hook `configure` cho psycopg_pool.ConnectionPool / psycopg.connect:
+    đăng ký kiểu vector (text + binary) cho connection psycopg 3.
+    """
+    from pgvector.psycopg import register_vector
+
+    register_vector(conn)
+    # TypeInfo.fetch mở transaction; pool yêu cầu connection IDLE sau configure
+    if not conn.autocommit:
+        conn.commit()
+
+
+def register_sqlalchemy(engine) -> None:
+    """
+    Đăng ký adapter pgvector cho mọi DBAPI connection của 1 SQLAlchemy engine
+    (psycopg2 hoặc psycopg 3 tuỳ dialect của DATABASE_URL).
+    """
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "connect")
+    def _register_vector(dbapi_connection, connection_record):  # noqa: ARG001
+        if type(dbapi_connection).__module__.startswith("psycopg2"):
+            from pgvector.psycopg2 import register_vector
+        else:
+            from pgvector.psycopg import register_vector
+        register_vector(dbapi_connection)
+
+
+def to_param(vec: Any, dim: Optional[int] = None) -> Vector:
+    """
+    np.ndarray / list[float] → pgvector.Vector (float32) để bind làm tham số.
+    dim: nếu truyền, sai số chiều → ValueError (thay vì lỗi cast ::vector(768) phía DB).
+    """
+    if isinstance(vec, Vector):
+        _check_dim(vec.to_numpy(), dim)
+        return vec
+    return Vector(_check_dim(np.asarray(vec, dtype="float32").reshape(-1), dim))
+
+
+def to_numpy(raw: Any, dim: Optional[int] = None) -> np.ndarray:
+    """
+    Chuẩn hoá giá trị cột vector về np.ndarray(float32).
+
+    Đường nhanh: pgvector.Vector (loader binary) / ndarray / list.
+    Đường fallback (connection chưa đăng ký codec): string "[0.1,0.2,...]".
+    dim: nếu truyền, sai số chiều → ValueError.
+    """
+    return _check_dim(_to_numpy(raw), dim)
+
+
+def _to_numpy(raw: Any) -> np.ndarray:
+    if raw is None:
+        raise ValueError("Embedding is NULL")
+
+    if isinstance(raw, Vector):
+        return raw.to_numpy()
+    if isinstance(raw, np.ndarray):
+        return raw.astype("float32", copy=False)
+    if isinstance(raw, (list, tuple)):
+        return np.asarray(raw, dtype="float32")
+
+    if isinstance(raw, (bytes, bytearray, memoryview)):
+        raw = bytes(raw).decode("utf-8", errors="ignore")
+
+    if isinstance(raw, str):
+        s = raw.strip()
+        if not s:
+            raise ValueError("Empty embedding string")
+        try:
+            return np.asarray(Vector.from_text(s).to_numpy(), dtype="float32")
+        except ValueError:
+            pass
+        try:
+            try:
+                arr = json.loads(s)
+            except json.JSONDecodeError:
+                arr = ast.literal_eval(s)
+        except Exception as e:
+            raise ValueError(f"Cannot parse embedding string: {e}") from e
+        return np.asarray(arr, dtype="float32")
+
+    raise ValueError(f"Unsupported embedding type: {type(raw)}")
@@ -1,11 +1,27 @@
 ﻿# src/api/main.py
 
 from fastapi import FastAPI
-from .config import DB_URL, RETR_TABLE, MODEL_DIR, IVF_PROBES
+from .config import (
+    DB_URL,
+    IVF_PROBES,
+    MICROBATCH_ENABLED,
+    MICROBATCH_MAX_BATCH,
+    MICROBATCH_MAX_WAIT_MS,
+    MODEL_DIR,
+    NLP_RUNTIME,
+    RETR_BACKEND,
+    RETR_TABLE,
+)
+from ai_core.utils import inference_pool
+from ai_core.utils.pg_pool import close_async_pool, close_pool, pool_stats
 from .routes_retrieval import router as retrieval_router
 from .routes_traits import router as traits_router
 from api.routes_rank import router as rank_router
 from .routes_recs import router as recs_router
+from .routes_models import router as models_router
+
+# torch intra-op threads theo INFER_TORCH_THREADS trước khi có request / model nào chạy
+inference_pool.configure_torch_threads()
 
 app = FastAPI(
     title="AI Core Service",
@@ -29,12 +45,28 @@ def health():
 def debug_cfg():
     return {
         "retr_table": RETR_TABLE,
+        "retr_backend": RETR_BACKEND,
         "model_dir": MODEL_DIR,
         "database_url": DB_URL,
         "ivf_probes": str(IVF_PROBES),
+        "db_pool": pool_stats(),
+        "inference": inference_pool.stats(),
+        "nlp_runtime": NLP_RUNTIME,
+        "microbatch": {
+            "enabled": MICROBATCH_ENABLED,
+            "max_batch": MICROBATCH_MAX_BATCH,
+            "max_wait_ms": MICROBATCH_MAX_WAIT_MS,
+        },
     }
 
+@app.on_event("shutdown")
+async def _shutdown():
+    inference_pool.shutdown()
+    await close_async_pool()
+    close_pool()
+
 app.include_router(retrieval_router)
 app.include_router(traits_router)
 app.include_router(rank_router)
 app.include_router(recs_router)
+app.include_router(models_router)
@@ -0,0 +1,37 @@
+# src/api/routes_models.py
+import hmac
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from ai_core.recsys.neumf.registry import get_registry
+from ai_core.utils.inference_pool import InferenceOverloaded, run_inference
+from api.config import AI_ADMIN_TOKEN
+
+router = APIRouter(prefix="/models", tags=["models"])
+
+
+def require_admin_token(x_admin_token: str | None = Header(default=None)) -> None:
+    """Shared secret cho endpoint admin: header X-Admin-Token phải khớp env AI_ADMIN_TOKEN."""
+    if not AI_ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints disabled (AI_ADMIN_TOKEN not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), AI_ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@router.get("/status")
+def models_status():
+    """Các model B4 đang load trong process (registry), stale=True nếu file đã đổi mà chưa reload."""
+    return {"rankers": get_registry().status()}
+
+
+@router.post("/reload", dependencies=[Depends(require_admin_token)])
+async def reload_models(force: bool = False):
+    """
+    Admin trigger: reload model B4 không cần restart (sau khi train.py / build_feats_from_db.py
+    ghi lại best.pt / *_feats.json). force=true → reload kể cả khi file không đổi.
+    """
+    try:
+        rankers = await run_inference(get_registry().reload, force)
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    return {"ok": True, "rankers": rankers}
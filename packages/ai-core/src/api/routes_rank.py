@@ -3,9 +3,9 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List
 
-from ai_core.retrieval.service_pgvector import search_candidates_for_user
-from ai_core.recsys.neumf.infer import infer_scores   # dùng B4
-from ai_core.recsys.neumf.mappings import load_mappings  # để map user_feat & item_feat
+from ai_core.retrieval.service import asearch_candidates_for_user
+from ai_core.utils.inference_pool import InferenceOverloaded, run_inference
+from ai_core.recsys.service import get_ranker  # B4 – Ranker dùng chung (registry)
 
 router = APIRouter(prefix="/rank", tags=["ranking"])
 
@@ -25,20 +25,22 @@ class RankResponse(BaseModel):
     items: List[RankedItem]
 
 
+def _rerank(user_id: int, candidate_ids: List[str]):
+    """
+    B4 – NeuMF re-rank (CPU / torch), chạy trên executor inference.
+    Ranker lấy từ registry: model + feats đã load sẵn, không đọc best.pt / *.json mỗi request.
+    """
+    return get_ranker().infer_scores(str(user_id), candidate_ids)
+
+
 @router.post("", response_model=RankResponse)
-def rank_careers(payload: RankRequest):
+async def rank_careers(payload: RankRequest):
     try:
         # B3 – lấy candidates bằng pgvector
-        cands = search_candidates_for_user(payload.user_id, top_n=max(200, payload.top_k))
+        cands = await asearch_candidates_for_user(payload.user_id, top_n=max(200, payload.top_k))
 
         # B4 – NeuMF re-rank
-        user_feats, item_feats = load_mappings()
-        ranked = infer_scores(
-            user_id=str(payload.user_id),
-            candidates=[c.job_id for c in cands],
-            user_feats=user_feats,
-            item_feats=item_feats,
-        )
+        ranked = await run_inference(_rerank, payload.user_id, [c.job_id for c in cands])
 
         # chọn top_k sau khi rank
         ranked = ranked[: payload.top_k]
@@ -49,6 +51,8 @@ def rank_careers(payload: RankRequest):
             items=items,
         )
 
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
     except Exception as e:
         print("ERROR in /rank:", e)
         raise HTTPException(status_code=500, detail=str(e))
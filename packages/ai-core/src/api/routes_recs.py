@@ -5,10 +5,10 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List
 
-from ai_core.retrieval.service_pgvector import search_candidates_for_embedding
+from ai_core.retrieval.service import asnapshot_and_candidates_for_assessment
 from ai_core.recsys.bandit import FinalItem, recommend_with_bandit
 from ai_core.recsys.service import infer_scores
-from ai_core.traits.loader import load_traits_and_embedding_for_assessment
+from ai_core.utils.inference_pool import InferenceOverloaded, run_inference
 
 router = APIRouter(prefix="/recs", tags=["recommendations"])
 
@@ -27,39 +27,12 @@ class TopCareersResponse(BaseModel):
     items: List[CareerItem]
 
 
-@router.post("/top_careers", response_model=TopCareersResponse)
-def top_careers(req: TopCareersRequest):
+def _rank_with_fallback(user_id: int, candidates: list, top_k: int) -> list[FinalItem]:
     """
-    Recommend theo ASSESSMENT.
-    B3: vector = embedding của bài essay thuộc assessment_id
-    B4: ranker dùng đúng snapshot traits
-    B5: bandit (stub)
-
-    Nếu NeuMF không có user_id trong user_feats (cold-start)
-    thì fallback: dùng luôn thứ tự retrieval làm recommendation.
+    B4 + B5 (CPU / torch) – chạy trên executor inference, không trên event loop.
     """
-
-    # ---- 1) Lấy vector + traits theo assessment ----
-    try:
-        snapshot = load_traits_and_embedding_for_assessment(req.assessment_id)
-    except Exception as e:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Error loading assessment snapshot: {e}",
-        )
-
-    user_vec = snapshot.embedding_vector  # np.ndarray
-    user_id = snapshot.user_id            # dùng cho Ranker (train theo user_id)
-    # traits = snapshot.traits            # để dành sau này nếu mix traits
-
-    # ---- 2) Retrieval B3 ----
-    candidates = search_candidates_for_embedding(user_vec, top_n=200)
-    if not candidates:
-        raise HTTPException(status_code=404, detail="No candidates from retrieval")
-
     candidate_ids = [c.job_id for c in candidates]
 
-    # ---- 3) Rank B4 + Bandit B5, có fallback cold-start ----
     final_items: list[FinalItem]
 
     try:
@@ -71,7 +44,7 @@ def top_careers(req: TopCareersRequest):
         final_items = recommend_with_bandit(
             ranked_items=scored,
             user_id=user_id,
-            top_k=req.top_k,
+            top_k=top_k,
         )
 
     except ValueError as e:
@@ -104,6 +77,44 @@ def top_careers(req: TopCareersRequest):
                     final_score=float(base),
                 )
             )
+    return final_items
+
+
+@router.post("/top_careers", response_model=TopCareersResponse)
+async def top_careers(req: TopCareersRequest):
+    """
+    Recommend theo ASSESSMENT.
+    B3: vector = embedding của bài essay thuộc assessment_id
+    B4: ranker dùng đúng snapshot traits
+    B5: bandit (stub)
+
+    Nếu NeuMF không có user_id trong user_feats (cold-start)
+    thì fallback: dùng luôn thứ tự retrieval làm recommendation.
+
+    I/O: AsyncConnectionPool; ranker: executor inference (utils/inference_pool.py).
+    """
+
+    # ---- 1+2) Snapshot (vector + traits) theo assessment + Retrieval B3, 1 round trip ----
+    try:
+        snapshot, candidates = await asnapshot_and_candidates_for_assessment(req.assessment_id, top_n=200)
+    except Exception as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Error loading assessment snapshot: {e}",
+        )
+
+    user_id = snapshot.user_id            # dùng cho Ranker (train theo user_id)
+    # traits = snapshot.traits            # để dành sau này nếu mix traits
+
+    if not candidates:
+        raise HTTPException(status_code=404, detail="No candidates from retrieval")
+
+    # ---- 3) Rank B4 + Bandit B5, có fallback cold-start ----
+    try:
+        final_items = await run_inference(_rank_with_fallback, user_id, candidates, req.top_k)
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
     # ---- 4) Trả kết quả ----
     return TopCareersResponse(
         items=[
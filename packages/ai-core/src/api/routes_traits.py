@@ -1,10 +1,16 @@
 # src/api/routes_traits.py
 from fastapi import APIRouter, HTTPException, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
 import json
+import os
 
-from ai_core.nlp.essay_infer import infer_user_traits
+from ai_core.nlp.essay_cache import get_essay_cache
+from ai_core.nlp.essay_infer import TraitResult, TraitScores, infer_user_traits, infer_user_traits_many, score_essays_vi
+from ai_core.utils.inference_pool import InferenceOverloaded, run_inference, submit_batched
+from ai_core.utils.micro_batch import MicroBatcher
+from api.config import ESSAY_CACHE_ENABLED, MICROBATCH_ENABLED, MICROBATCH_MAX_BATCH, MICROBATCH_MAX_WAIT_MS
 
 router = APIRouter(prefix="/ai", tags=["traits"])
 
@@ -25,16 +31,29 @@ class InferRes(BaseModel):
     embedding: list[float]
 
 
-@router.post("/infer_user_traits", response_model=InferRes)
-def infer_user_traits_api(req: InferReq):
-    text = (req.essay_text or "").strip()
-    if len(text) < 5:
-        raise HTTPException(status_code=422, detail="essay_text quá ngắn")
+class InferBatchReq(BaseModel):
+    items: list[InferReq]
 
-    result = infer_user_traits(text, language=req.lang)
-    emb = result.embedding
 
-    payload = {
+class InferBatchRes(BaseModel):
+    items: list[InferRes]
+
+
+# Gom các request /infer_user_traits đồng thời thành 1 batch cho 3 model
+_traits_batcher = MicroBatcher(
+    score_essays_vi,
+    max_batch=MICROBATCH_MAX_BATCH,
+    max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+    name="traits-batcher",
+)
+
+# Giới hạn số essay / request batch (backfill nên chia nhỏ phía client)
+BATCH_MAX_ITEMS = int(os.getenv("TRAITS_BATCH_MAX_ITEMS", "256"))
+
+
+def _to_payload(result: TraitResult) -> dict:
+    emb = result.embedding
+    return {
         "detected_lang": result.language_detected,
         "used_lang": result.language_used,
         "essay_original": result.essay_original,
@@ -45,6 +64,54 @@ def infer_user_traits_api(req: InferReq):
         "embedding": emb.tolist(),
     }
 
+
+def _batched_score(essay_vi: str) -> TraitScores:
+    # đầy hạn mức INFER_MAX_PENDING → InferenceOverloaded (503), không xếp hàng vô hạn trong batcher
+    return submit_batched(_traits_batcher, essay_vi).result()
+
+
+def _infer_one(text: str, lang: str) -> TraitResult:
+    scorer = _batched_score if MICROBATCH_ENABLED else None
+    if ESSAY_CACHE_ENABLED:
+        # essay gửi lại / retry sau timeout → trả ngay từ cache, không dịch + chạy model lại
+        return get_essay_cache().infer(text, lang, infer_user_traits, scorer=scorer)
+    return infer_user_traits(text, language=lang, scorer=scorer)
+
+
+def _infer_many(texts: list[str], langs: list[str]) -> list[TraitResult]:
+    by_lang: dict[str, list[int]] = {}
+    for i, lang in enumerate(langs):
+        by_lang.setdefault(lang, []).append(i)
+
+    results: list[TraitResult | None] = [None] * len(texts)
+    for lang, idx in by_lang.items():
+        chunk = [texts[i] for i in idx]
+        if ESSAY_CACHE_ENABLED:
+            chunk_results = get_essay_cache().infer_many(chunk, lang, infer_user_traits_many)
+        else:
+            chunk_results = infer_user_traits_many(chunk, language=lang)
+        for i, r in zip(idx, chunk_results, strict=True):
+            results[i] = r
+    return results
+
+
+@router.post("/infer_user_traits", response_model=InferRes)
+async def infer_user_traits_api(req: InferReq):
+    text = (req.essay_text or "").strip()
+    if len(text) < 5:
+        raise HTTPException(status_code=422, detail="essay_text quá ngắn")
+
+    try:
+        if MICROBATCH_ENABLED:
+            # model chạy trên worker của _traits_batcher; thread ở đây chỉ dịch / đọc cache / chờ Future,
+            # không chiếm slot executor inference (giữ nguyên kích thước micro-batch), vẫn tính vào INFER_MAX_PENDING
+            result = await run_in_threadpool(_infer_one, text, req.lang)
+        else:
+            result = await run_inference(_infer_one, text, req.lang)
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+    payload = _to_payload(result)
+
     pretty_json = json.dumps(
         jsonable_encoder(payload),
         indent=2,
@@ -55,3 +122,44 @@ def infer_user_traits_api(req: InferReq):
         content=pretty_json,
         media_type="application/json; charset=utf-8",
     )
+
+
+@router.post("/infer_user_traits:batch", response_model=InferBatchRes)
+async def infer_user_traits_batch_api(req: InferBatchReq):
+    """
+    Batch nhiều essay / 1 request (backfill, re-score hằng đêm).
+    Mỗi model chạy theo batch với dynamic padding; thứ tự kết quả = thứ tự input.
+    Essay có lang khác nhau được gom theo lang rồi ghép lại đúng vị trí.
+    """
+    if not req.items:
+        raise HTTPException(status_code=422, detail="items rỗng")
+    if len(req.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Tối đa {BATCH_MAX_ITEMS} essay / request")
+
+    texts = [(it.essay_text or "").strip() for it in req.items]
+    for i, t in enumerate(texts):
+        if len(t) < 5:
+            raise HTTPException(status_code=422, detail=f"items[{i}].essay_text quá ngắn")
+
+    try:
+        results = await run_inference(_infer_many, texts, [it.lang for it in req.items])
+    except InferenceOverloaded as e:
+        raise HTTPException(status_code=503, detail=str(e)) from e
+
+    payload = {"items": [_to_payload(r) for r in results]}
+
+    pretty_json = json.dumps(
+        jsonable_encoder(payload),
+        indent=2,
+        ensure_ascii=False,
+    )
+
+    return Response(
+        content=pretty_json,
+        media_type="application/json; charset=utf-8",
+    )
+
+
+@router.get("/essay_cache/stats")
+def essay_cache_stats():
+    return {"enabled": ESSAY_CACHE_ENABLED, **get_essay_cache().stats()}
@@ -0,0 +1,30 @@
+# tests/conftest.py
+import pytest
+
+
+@pytest.fixture(scope="session")
+def tiny_backbone(tmp_path_factory):
+    """
+    BERT 2 layer / hidden 16 + tokenizer lưu local (không tải gì từ hub),
+    đủ để chạy các hàm PhoBERT / SBERT của essay_infer với dynamic padding.
+    """
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    path = tmp_path_factory.mktemp("tiny_backbone")
+    words = "toi thich lam viec voi con nguoi va may tinh day hoc nghien cuu khoa hoc nghe thuat kinh doanh".split()
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *dict.fromkeys(words)]
+    (path / "vocab.txt").write_text("\n".join(vocab), encoding="utf-8")
+    BertTokenizer(str(path / "vocab.txt")).save_pretrained(path)
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=16,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=32,
+        max_position_embeddings=64,
+    )
+    BertModel(config).save_pretrained(path)
+    return str(path)
@@ -0,0 +1,61 @@
+# tests/test_essay_cache.py
+import numpy as np
+
+from ai_core.nlp.essay_cache import EssayInferenceCache, cache_key
+from ai_core.nlp.essay_infer import TraitResult
+
+
+def _fake_result(text: str, language=None) -> TraitResult:
+    seed = sum(map(ord, text))
+    return TraitResult(
+        language_detected="vi",
+        language_used="vi",
+        essay_original=text.strip(),
+        essay_used=text.strip(),
+        riasec=np.full(6, seed % 7, dtype="float32"),
+        big5=np.full(5, seed % 5, dtype="float32"),
+        embedding=np.full(768, seed % 3, dtype="float32"),
+    )
+
+
+def test_key_ignores_whitespace_but_not_language():
+    assert cache_key("Em thích  lập trình\n", "vi") == cache_key(" Em thích lập trình", "vi")
+    assert cache_key("Em thích lập trình", "vi") != cache_key("Em thích lập trình", "en")
+
+
+def test_infer_hits_cache_and_lru_evicts():
+    calls = []
+
+    def infer(text, language=None):
+        calls.append(text)
+        return _fake_result(text)
+
+    cache = EssayInferenceCache(maxsize=2)
+    r1 = cache.infer("essay một", "vi", infer)
+    r2 = cache.infer("essay  một ", "vi", infer)
+    assert calls == ["essay một"]
+    assert r2.essay_original == "essay  một"
+    np.testing.assert_array_equal(r1.embedding, r2.embedding)
+
+    cache.infer("essay hai", "vi", infer)
+    cache.infer("essay ba", "vi", infer)  # đẩy "essay một" ra khỏi LRU
+    cache.infer("essay một", "vi", infer)
+    assert calls == ["essay một", "essay hai", "essay ba", "essay một"]
+
+
+def test_infer_many_only_runs_unique_misses_in_order():
+    batches = []
+
+    def infer_many(texts, language=None):
+        batches.append(list(texts))
+        return [_fake_result(t) for t in texts]
+
+    cache = EssayInferenceCache(maxsize=16)
+    cache.infer("cũ", "vi", lambda t, language=None: _fake_result(t))
+
+    texts = ["mới a", "cũ", "mới b", "mới  a"]
+    out = cache.infer_many(texts, "vi", infer_many)
+
+    assert batches == [["mới a", "mới b"]]
+    assert [r.essay_original for r in out] == texts
+    np.testing.assert_array_equal(out[0].riasec, out[3].riasec)
@@ -0,0 +1,56 @@
+# tests/test_feature_store.py
+import numpy as np
+import torch
+
+from ai_core.recsys.neumf.dataset import PairDataset
+from ai_core.recsys.neumf.feature_store import FeatureStore
+from ai_core.recsys.neumf.model import MLPScore, SplitFirstLayerScorer
+
+
+def _feats(n_users=3, n_items=10, dim=8):
+    rng = np.random.default_rng(0)
+    uf = {
+        str(u): {"text": rng.random(dim).tolist(), "riasec": rng.random(6).tolist(), "big5": rng.random(5).tolist()}
+        for u in range(n_users)
+    }
+    it = {
+        f"11-{i:04d}.00": {"text": rng.random(dim).tolist(), "riasec": rng.random(6).tolist(), "title": f"Job {i}"}
+        for i in range(n_items)
+    }
+    return uf, it
+
+
+def test_pair_matrix_matches_pair_dataset():
+    uf, it = _feats()
+    store = FeatureStore(uf, it)
+    cands = list(it)[:5] + ["99-9999.00"]  # job cuối không có features
+
+    kept, X = store.pair_matrix("1", cands)
+    assert kept == cands[:5]
+    assert X.dtype == np.float32 and X.shape == (5, store.in_dim)
+
+    ds = PairDataset([("1", j, 0.0) for j in kept], uf, it)
+    ref = np.stack([ds[i][0].numpy() for i in range(len(ds))])
+    assert np.array_equal(X, ref)
+
+
+def test_skips_entries_with_wrong_dim():
+    uf, it = _feats()
+    it["broken"] = {"text": [0.1, 0.2], "riasec": []}
+    store = FeatureStore(uf, it)
+    assert "broken" not in store.item_index
+    assert store.item_matrix.flags["C_CONTIGUOUS"]
+
+
+def test_split_first_layer_matches_full_forward():
+    uf, it = _feats(dim=768)
+    store = FeatureStore(uf, it)
+    model = MLPScore().eval()
+    scorer = SplitFirstLayerScorer(model, store.user_dim, torch.from_numpy(store.item_matrix)).eval()
+
+    kept, X = store.pair_matrix("2", list(it))
+    _, rows = store.item_row_ids(kept)
+    with torch.no_grad():
+        full = model(torch.from_numpy(X))
+        split = scorer(torch.from_numpy(store.user_vector("2")), torch.from_numpy(rows))
+    assert torch.allclose(full, split, atol=1e-5)
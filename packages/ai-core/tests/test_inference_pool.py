@@ -0,0 +1,38 @@
+# tests/test_inference_pool.py
+import threading
+import time
+
+import pytest
+
+from ai_core.utils import inference_pool
+from ai_core.utils.inference_pool import InferenceOverloaded, submit_batched
+from ai_core.utils.micro_batch import MicroBatcher
+
+
+def test_batched_submissions_share_pending_limit(monkeypatch):
+    monkeypatch.setattr(inference_pool, "INFER_MAX_PENDING", 2)
+    monkeypatch.setattr(inference_pool, "_pending", 0)
+    gate = threading.Event()
+
+    def fn(items):
+        gate.wait(5)
+        return [x * 10 for x in items]
+
+    batcher = MicroBatcher(fn, max_batch=4, max_wait_ms=1)
+    futs = [submit_batched(batcher, i) for i in range(2)]
+    assert inference_pool.stats()["pending"] == 2
+
+    # batcher đầy hạn mức → executor inference cũng bị chặn
+    with pytest.raises(InferenceOverloaded):
+        submit_batched(batcher, 2)
+    with pytest.raises(InferenceOverloaded):
+        inference_pool.submit_inference(fn, [3])
+
+    gate.set()
+    assert [f.result(timeout=5) for f in futs] == [0, 10]
+    # done-callback (trả slot) chạy ngay sau khi Future có kết quả
+    deadline = time.monotonic() + 5
+    while inference_pool.stats()["pending"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert inference_pool.stats()["pending"] == 0
+    assert submit_batched(batcher, 5).result(timeout=5) == 50
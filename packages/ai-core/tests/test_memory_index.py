@@ -0,0 +1,64 @@
+# tests/test_memory_index.py
+import numpy as np
+import pytest
+
+from ai_core.retrieval.service_memory import InMemoryJobIndex
+
+
+def _brute_force(job_ids, emb, q, top_n):
+    emb = np.asarray(emb, dtype="float64")
+    q = np.asarray(q, dtype="float64")
+    sims = emb @ q / (np.linalg.norm(emb, axis=1) * np.linalg.norm(q))
+    order = sorted(range(len(job_ids)), key=lambda i: (-round(sims[i], 5), job_ids[i]))
+    return [(job_ids[i], sims[i]) for i in order[:top_n]]
+
+
+def _check(index, job_ids, emb, q, top_n):
+    got = index.search(q, top_n=top_n)
+    ref = _brute_force(job_ids, emb, q, top_n)
+    assert [c.job_id for c in got] == [j for j, _ in ref]
+    assert np.allclose([c.score_sim for c in got], [s for _, s in ref], atol=1e-5)
+
+
+@pytest.mark.parametrize("top_n", [1, 5, 37, 100])
+def test_search_matches_brute_force_cosine(top_n):
+    rng = np.random.default_rng(0)
+    job_ids = [f"11-{i:04d}.00" for i in range(100)]
+    emb = rng.normal(size=(100, 16))
+    index = InMemoryJobIndex(job_ids, emb)
+
+    for _ in range(5):
+        _check(index, job_ids, emb, rng.normal(size=16), top_n)
+
+
+def test_ties_at_top_n_boundary_break_by_job_id():
+    # 6 job cùng hướng (cùng cosine, khác norm), job_id xáo trộn thứ tự row
+    job_ids = ["j5", "j2", "j9", "j1", "j7", "j3", "j0", "j4"]
+    emb = np.array(
+        [[2.0, 0.0], [1.0, 0.0], [3.0, 0.0], [0.5, 0.0], [1.0, 0.0], [4.0, 0.0], [0.0, 1.0], [-1.0, 0.0]]
+    )
+    index = InMemoryJobIndex(job_ids, emb)
+
+    got = index.search(np.array([1.0, 0.0]), top_n=3)
+    assert [c.job_id for c in got] == ["j1", "j2", "j3"]
+    for top_n in range(1, len(job_ids) + 1):
+        _check(index, job_ids, emb, np.array([1.0, 0.0]), top_n)
+
+
+def test_top_n_larger_than_index_returns_everything_sorted():
+    rng = np.random.default_rng(1)
+    job_ids = [f"j{i}" for i in range(7)]
+    emb = rng.normal(size=(7, 4))
+    index = InMemoryJobIndex(job_ids, emb)
+    q = rng.normal(size=4)
+
+    got = index.search(q, top_n=50)
+    assert len(got) == 7
+    _check(index, job_ids, emb, q, 50)
+    assert index.search(q, top_n=0) == []
+
+
+def test_query_dim_mismatch_raises():
+    index = InMemoryJobIndex(["a", "b"], np.eye(2))
+    with pytest.raises(ValueError):
+        index.search(np.ones(3))
@@ -0,0 +1,39 @@
+# tests/test_micro_batch.py
+import threading
+
+import pytest
+
+from ai_core.utils.micro_batch import MicroBatcher
+
+
+def test_concurrent_calls_are_batched_and_keep_order():
+    sizes = []
+
+    def fn(items):
+        sizes.append(len(items))
+        return [x * 10 for x in items]
+
+    batcher = MicroBatcher(fn, max_batch=8, max_wait_ms=50)
+    results = {}
+
+    def call(i):
+        results[i] = batcher(i, timeout=5)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(20)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == {i: i * 10 for i in range(20)}
+    assert max(sizes) <= 8
+    assert len(sizes) < 20  # có gom batch
+
+
+def test_exception_is_propagated_to_every_caller():
+    def fn(items):
+        raise RuntimeError("boom")
+
+    batcher = MicroBatcher(fn, max_batch=4, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="boom"):
+        batcher(1, timeout=5)
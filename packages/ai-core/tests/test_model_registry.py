@@ -0,0 +1,77 @@
+# tests/test_model_registry.py
+import json
+import os
+
+import numpy as np
+import torch
+
+from ai_core.recsys.neumf.model import MLPScore
+from ai_core.recsys.neumf.registry import ModelRegistry
+
+
+def _write_artifacts(tmp_path, seed=0):
+    rng = np.random.default_rng(seed)
+    uf = {
+        str(u): {"text": rng.random(768).tolist(), "riasec": rng.random(6).tolist(), "big5": rng.random(5).tolist()}
+        for u in range(3)
+    }
+    it = {
+        f"11-{i:04d}.00": {"text": rng.random(768).tolist(), "riasec": rng.random(6).tolist()}
+        for i in range(10)
+    }
+    (tmp_path / "user_feats.json").write_text(json.dumps(uf), encoding="utf-8")
+    (tmp_path / "item_feats.json").write_text(json.dumps(it), encoding="utf-8")
+    torch.manual_seed(seed)
+    torch.save(MLPScore().state_dict(), tmp_path / "best.pt")
+    return dict(
+        model_path=tmp_path / "best.pt",
+        user_feats_path=tmp_path / "user_feats.json",
+        item_feats_path=tmp_path / "item_feats.json",
+    )
+
+
+def test_loads_once_and_shares_ranker(tmp_path):
+    paths = _write_artifacts(tmp_path)
+    reg = ModelRegistry(hot_reload=True, check_sec=0)
+
+    rk = reg.get(**paths)
+    assert reg.get(**paths) is rk
+    assert reg.get(**paths, device="cpu") is rk
+
+    ranked = rk.infer_scores("1", ["11-0001.00", "11-0002.00", "99-9999.00"])
+    assert {j for j, _ in ranked} == {"11-0001.00", "11-0002.00"}
+
+
+def test_hot_reload_on_file_change(tmp_path):
+    paths = _write_artifacts(tmp_path)
+    reg = ModelRegistry(hot_reload=True, check_sec=0)
+    rk = reg.get(**paths)
+    before = rk.infer_scores("1", ["11-0001.00"])[0][1]
+
+    torch.manual_seed(123)
+    torch.save(MLPScore().state_dict(), paths["model_path"])
+    st = os.stat(paths["model_path"])
+    os.utime(paths["model_path"], (st.st_atime, st.st_mtime + 5))
+
+    # request phát hiện file đổi không chờ load: trả bản cũ, reload chạy nền
+    assert reg.get(**paths) is rk
+    reg.wait_for_reload(timeout=30)
+
+    rk2 = reg.get(**paths)
+    assert rk2 is not rk
+    assert rk2.infer_scores("1", ["11-0001.00"])[0][1] != before
+    assert reg.status()[0]["reloads"] == 1
+
+
+def test_failed_reload_keeps_current_model(tmp_path):
+    paths = _write_artifacts(tmp_path)
+    reg = ModelRegistry(hot_reload=True, check_sec=0)
+    rk = reg.get(**paths)
+
+    paths["model_path"].write_bytes(b"not a checkpoint")
+    assert reg.get(**paths) is rk
+    reg.wait_for_reload(timeout=30)
+    assert reg.get(**paths) is rk
+    assert reg.status()[0]["last_error"]
+
+    assert reg.reload(force=True)[0]["reloads"] == 0
@@ -0,0 +1,60 @@
+# tests/test_nlp_runtime.py
+import pytest
+import torch
+from transformers import BertConfig, BertModel
+
+from ai_core.nlp.runtime import apply_torch_runtime, onnx_path
+
+
+def _tiny_bert():
+    torch.manual_seed(0)
+    cfg = BertConfig(vocab_size=50, hidden_size=32, num_hidden_layers=2, num_attention_heads=4, intermediate_size=64)
+    return BertModel(cfg).eval()
+
+
+def _inputs():
+    ids = torch.randint(5, 50, (3, 12))
+    mask = torch.ones_like(ids)
+    mask[0, 8:] = 0
+    return ids, mask
+
+
+def test_int8_runtime_close_to_fp32():
+    ids, mask = _inputs()
+    model = _tiny_bert()
+    with torch.no_grad():
+        ref = model(input_ids=ids, attention_mask=mask).last_hidden_state
+
+    q = apply_torch_runtime(model, torch.device("cpu"), runtime="int8")
+    assert any(type(m).__module__.startswith("torch.ao.nn.quantized") for m in q.modules())
+    with torch.no_grad():
+        out = q(input_ids=ids, attention_mask=mask).last_hidden_state
+
+    cos = torch.nn.functional.cosine_similarity(out.flatten(1), ref.flatten(1), dim=1)
+    assert cos.min().item() > 0.99
+
+
+def test_onnx_encoder_matches_fp32(tmp_path):
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("onnx")
+    from ai_core.nlp.export_runtime import _EncoderLastHidden
+    from ai_core.nlp.runtime import OnnxEncoder, OnnxSession
+
+    ids, mask = _inputs()
+    model = _tiny_bert()
+    path = onnx_path(tmp_path, "onnx")
+    path.parent.mkdir(parents=True)
+    with torch.no_grad():
+        ref = model(input_ids=ids, attention_mask=mask).last_hidden_state
+    torch.onnx.export(
+        _EncoderLastHidden(model).eval(), (ids, mask), str(path),
+        input_names=["input_ids", "attention_mask"], output_names=["last_hidden_state"],
+        dynamic_axes={"input_ids": {0: "b", 1: "s"}, "attention_mask": {0: "b", 1: "s"}},
+        opset_version=17, dynamo=False,
+    )
+
+    # token_type_ids không có trong graph → bị bỏ qua
+    out = OnnxEncoder(OnnxSession(path))(
+        input_ids=ids, attention_mask=mask, token_type_ids=torch.zeros_like(ids)
+    ).last_hidden_state
+    assert torch.allclose(out, ref, atol=1e-4)
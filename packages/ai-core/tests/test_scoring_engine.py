@@ -0,0 +1,78 @@
+# tests/test_scoring_engine.py
+import numpy as np
+import pytest
+from test_model_registry import _write_artifacts
+
+from ai_core.recsys.neumf.engine import BlendWeights, ScoringEngine
+from ai_core.recsys.neumf.infer import Ranker
+
+
+def test_blend_matches_components(tmp_path):
+    engine = ScoringEngine(**_write_artifacts(tmp_path)).warmup()
+    jobs = ["11-0003.00", "99-9999.00", "11-0001.00", "11-0007.00"]  # job thứ 2 không có features
+    sim = [0.9, 0.5, 0.1, 0.4]
+    w = BlendWeights(cf=0.6, sim=0.3, trait=0.1)
+
+    res = engine.score("2", jobs, sim=sim, weights=w)
+    assert sorted(res.job_ids) == ["11-0001.00", "11-0003.00", "11-0007.00"]
+    assert np.all(np.diff(res.final) <= 0)
+    assert np.allclose(res.final, 0.6 * res.cf + 0.3 * res.sim + 0.1 * res.trait)
+    got = dict(zip(res.job_ids, res.sim, strict=True))
+    assert np.allclose([got["11-0003.00"], got["11-0001.00"], got["11-0007.00"]], [0.9, 0.1, 0.4])
+    assert np.all((res.trait >= 0) & (res.trait <= 1))
+
+
+def test_ranker_is_cf_only_and_matches_full_forward(tmp_path):
+    paths = _write_artifacts(tmp_path)
+    split = Ranker(**paths, split_first_layer=True)
+    full = Ranker(**paths, split_first_layer=False)
+    jobs = [f"11-{i:04d}.00" for i in range(10)]
+
+    a = split.infer_scores("1", jobs)
+    b = full.infer_scores("1", jobs)
+    assert [j for j, _ in a] == [j for j, _ in b]
+    assert np.allclose([s for _, s in a], [s for _, s in b], atol=1e-5)
+
+    res = split.score("1", jobs)
+    assert np.allclose(res.final, res.cf) and not res.trait.any()
+
+
+
+def _write_partial_checkpoint(paths, drop_weight):
+    import torch
+
+    state = torch.load(paths["model_path"])
+    dropped = next(iter(state)) if drop_weight else None
+    if dropped:
+        state.pop(dropped)
+    state["extra.weight"] = torch.zeros(1)
+    torch.save({"state_dict": state}, paths["model_path"])
+    return dropped
+
+
+def test_strict_load_rejects_mismatched_checkpoint(tmp_path):
+    paths = _write_artifacts(tmp_path)
+    _write_partial_checkpoint(paths, drop_weight=False)
+
+    with pytest.raises(RuntimeError, match="extra.weight"):
+        ScoringEngine(**paths).warmup()
+
+
+def test_non_strict_load_ignores_extra_keys_with_warning(tmp_path, capsys):
+    paths = _write_artifacts(tmp_path)
+    _write_partial_checkpoint(paths, drop_weight=False)
+
+    res = ScoringEngine(**paths, strict=False).warmup().score("1", ["11-0001.00", "11-0002.00"])
+    assert len(res) == 2
+
+    out = capsys.readouterr().out
+    assert "[WARN] Partial load NeuMF state_dict:" in out
+    assert "extra.weight" in out
+
+
+def test_non_strict_load_still_rejects_missing_weights(tmp_path):
+    paths = _write_artifacts(tmp_path)
+    dropped = _write_partial_checkpoint(paths, drop_weight=True)
+
+    with pytest.raises(RuntimeError, match=dropped):
+        ScoringEngine(**paths, strict=False).warmup()
@@ -0,0 +1,64 @@
+# tests/test_trait_multihead.py
+import numpy as np
+import torch
+from transformers import AutoTokenizer
+
+from ai_core.nlp import essay_infer as ei
+
+TEXTS = [
+    "toi thich may tinh",
+    "toi thich lam viec voi con nguoi va day hoc",
+    "nghe thuat va kinh doanh va nghien cuu khoa hoc",
+]
+
+
+def _save_checkpoint(model_dir, tok_name, model):
+    model_dir.mkdir()
+    (model_dir / "tokenizer_name.txt").write_text(tok_name, encoding="utf-8")
+    torch.save({"model_state": model.state_dict(), "cfg": {}}, model_dir / "best.pt")
+
+
+def _separate_models(tiny_backbone, tmp_path, monkeypatch, perturb_big5_backbone=False):
+    torch.manual_seed(2)
+    riasec = ei.PhoBERTRegressor(tiny_backbone, 6).eval()
+    big5 = ei.PhoBERTRegressor(tiny_backbone, 5).eval()
+    if perturb_big5_backbone:
+        with torch.no_grad():
+            big5.backbone.pooler.dense.bias.add_(0.1)
+
+    _save_checkpoint(tmp_path / "riasec", tiny_backbone, riasec)
+    _save_checkpoint(tmp_path / "big5", tiny_backbone, big5)
+    monkeypatch.setattr(ei, "PHOBERT_RIASEC_DIR", tmp_path / "riasec")
+    monkeypatch.setattr(ei, "PHOBERT_BIG5_DIR", tmp_path / "big5")
+
+    tok = AutoTokenizer.from_pretrained(tiny_backbone)
+    return {"shared": None, "riasec": (tok, riasec), "big5": (tok, big5)}
+
+
+def test_shared_backbone_matches_separate_models(tiny_backbone, tmp_path, monkeypatch):
+    separate = _separate_models(tiny_backbone, tmp_path, monkeypatch)
+
+    shared = ei._load_trait_models(runtime="torch")
+    assert shared["shared"] is not None
+
+    r_sep, b_sep = ei.predict_traits_vi_many(TEXTS, models=separate)
+    r_shared, b_shared = ei.predict_traits_vi_many(TEXTS, models=shared)
+    assert r_shared.shape == (3, 6) and b_shared.shape == (3, 5)
+    assert np.allclose(r_shared, r_sep, atol=1e-6)
+    assert np.allclose(b_shared, b_sep, atol=1e-6)
+
+    # _HeadView (đường predict_riasec_vi_many / predict_big5_vi_many) cho cùng kết quả
+    r_view = ei._predict_phobert_many(lambda: shared["riasec"], TEXTS, 6, 16)
+    assert np.allclose(r_view, r_sep, atol=1e-6)
+
+
+def test_different_backbones_are_not_merged(tiny_backbone, tmp_path, monkeypatch):
+    separate = _separate_models(tiny_backbone, tmp_path, monkeypatch, perturb_big5_backbone=True)
+
+    models = ei._load_trait_models(runtime="torch")
+    assert models["shared"] is None
+
+    r_sep, b_sep = ei.predict_traits_vi_many(TEXTS, models=separate)
+    r, b = ei.predict_traits_vi_many(TEXTS, models=models)
+    assert np.allclose(r, r_sep, atol=1e-6)
+    assert np.allclose(b, b_sep, atol=1e-6)
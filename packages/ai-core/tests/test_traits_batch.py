@@ -0,0 +1,54 @@
+# tests/test_traits_batch.py
+import numpy as np
+import pytest
+import torch
+from transformers import AutoModel, AutoTokenizer
+
+from ai_core.nlp import essay_infer as ei
+from api import routes_traits
+
+ESSAYS = [
+    ("toi thich may tinh", "vi"),
+    ("toi thich lam viec voi con nguoi va day hoc nghien cuu khoa hoc", "vi"),
+    ("nghe thuat", "en"),
+    ("kinh doanh va may tinh va con nguoi va nghe thuat va khoa hoc va day hoc", "vi"),
+    ("toi thich nghien cuu", "en"),
+]
+
+
+@pytest.fixture
+def tiny_models(tiny_backbone, monkeypatch):
+    tok = AutoTokenizer.from_pretrained(tiny_backbone)
+    torch.manual_seed(1)
+    riasec = ei.PhoBERTRegressor(tiny_backbone, 6).eval()
+    big5 = ei.PhoBERTRegressor(tiny_backbone, 5).eval()
+    sbert = AutoModel.from_pretrained(tiny_backbone).eval()
+
+    monkeypatch.setattr(ei, "_trait_models", {"shared": None, "riasec": (tok, riasec), "big5": (tok, big5)})
+    monkeypatch.setattr(ei, "_sbert_user", (tok, sbert))
+    # không dịch (essay 'en' giữ nguyên text), không đọc/ghi cache
+    monkeypatch.setattr(ei, "GoogleTranslator", None)
+    monkeypatch.setattr(routes_traits, "ESSAY_CACHE_ENABLED", False)
+
+
+def test_batch_endpoint_matches_per_essay_inference(tiny_models):
+    texts = [t for t, _ in ESSAYS]
+    langs = [lang for _, lang in ESSAYS]
+
+    batched = routes_traits._infer_many(texts, langs)
+    single = [ei.infer_user_traits(t, language=lang) for t, lang in ESSAYS]
+
+    assert [r.essay_original for r in batched] == texts
+    assert [r.language_detected for r in batched] == langs
+    for b, s in zip(batched, single, strict=True):
+        assert np.allclose(b.riasec, s.riasec, atol=1e-5)
+        assert np.allclose(b.big5, s.big5, atol=1e-5)
+        assert np.allclose(b.embedding, s.embedding, atol=1e-5)
+
+
+def test_batch_size_does_not_change_scores(tiny_models):
+    texts = [t for t, _ in ESSAYS]
+    # batch_size=2: nhiều batch, mỗi batch pad tới độ dài khác nhau
+    for a, b in zip(ei.score_essays_vi(texts, batch_size=2), ei.score_essays_vi(texts, batch_size=16), strict=True):
+        for x, y in zip(a, b, strict=True):
+            assert np.allclose(x, y, atol=1e-5)
@@ -0,0 +1,59 @@
+# tests/test_vector_codec.py
+import numpy as np
+import pytest
+from pgvector import Vector
+
+from ai_core.utils.vector_codec import to_numpy, to_param
+
+
+def _vec(dim=8):
+    return np.random.default_rng(0).normal(size=dim).astype("float32")
+
+
+@pytest.mark.parametrize(
+    "make",
+    [
+        lambda v: v,
+        lambda v: v.astype("float64"),
+        lambda v: v.tolist(),
+        lambda v: tuple(v.tolist()),
+        lambda v: Vector(v),
+    ],
+    ids=["ndarray", "ndarray64", "list", "tuple", "vector"],
+)
+def test_to_param_to_numpy_round_trip(make):
+    v = _vec()
+    param = to_param(make(v))
+    assert isinstance(param, Vector)
+
+    out = to_numpy(param)
+    assert out.dtype == np.float32 and out.shape == (8,)
+    assert np.array_equal(out, v)
+    assert np.array_equal(to_numpy(make(v)), v)
+
+
+def test_to_numpy_parses_text_forms():
+    v = _vec()
+    text = Vector(v).to_text()
+    assert text.startswith("[")
+    assert np.allclose(to_numpy(text), v)
+    assert np.allclose(to_numpy(text.encode()), v)
+    # repr list kiểu Python / JSON
+    assert np.allclose(to_numpy(str(v.tolist())), v)
+
+
+def test_wrong_dimension_raises():
+    v = _vec(8)
+    assert to_numpy(v, dim=8).shape == (8,)
+    with pytest.raises(ValueError):
+        to_param(v, dim=768)
+    with pytest.raises(ValueError):
+        to_param(Vector(v), dim=768)
+    with pytest.raises(ValueError):
+        to_numpy(Vector(v).to_text(), dim=768)
+
+
+@pytest.mark.parametrize("raw", [None, "", "not a vector", object()])
+def test_invalid_values_raise(raw):
+    with pytest.raises(ValueError):
+        to_numpy(raw)